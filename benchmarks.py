@@ -0,0 +1,249 @@
+"""
+Benchmark suite for the reservation system's hot paths: building a seat map, occupancy queries, pricing,
+change-making and chart rendering, over a range of cabin sizes and occupancy levels.
+
+    python benchmarks.py [--sizes default,medium,large] [--occupancy 0,50,100] [--storage objects,bitmap]
+                         [--output results.json] [--baseline baseline.json] [--threshold 0.25]
+
+Every benchmark is timed once per round, and the rounds run through the whole suite in turn, so a stretch of time
+when the machine is busy slows one round of many benchmarks rather than every round of a few. Results are written as
+JSON, keyed by benchmark name: the median seconds per call over the rounds, and the noise, the interquartile range of
+the rounds as a fraction of the median. Given a baseline written by an earlier run, every benchmark whose median got
+slower by more than the threshold plus the noise of both runs is reported, and the exit status is 1. Slow-downs are
+measured after dividing out the drift, the median slow-down across every benchmark, since a shared machine can run a
+whole suite faster or slower from one run to the next; a change that slows every benchmark alike is not caught.
+"""
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import timeit
+from datetime import datetime
+from io import StringIO
+
+from chaffey_flight_reservation_sys import (MoneyManipulator, Passenger, Seat, SeatingStructure, SeatStorageType,
+                                            Tier, NUM_COACH_ROWS, NUM_COACH_SEATS_PER_ROW, NUM_FC_ROWS,
+                                            NUM_FC_SEATS_PER_ROW)
+
+CABIN_SIZES: dict = {
+    "default": (NUM_FC_ROWS, NUM_FC_SEATS_PER_ROW, NUM_COACH_ROWS, NUM_COACH_SEATS_PER_ROW),
+    "medium": (20, 4, 200, 6),
+    "large": (100, 4, 5000, 6),
+}
+DEFAULT_OCCUPANCY_PERCENTS: tuple = (0, 50, 100)
+DEFAULT_THRESHOLD: float = 0.25
+ROUNDS: int = 7
+MIN_RUN_SECONDS: float = 0.05
+PASSENGER_NAMES: tuple = ("Ann Lee", "Bob Smith", "Carla Diaz", "Dev Patel", "Eve Park")
+
+
+def time_calls(benchmarks: dict, rounds: int = ROUNDS) -> dict:
+    """
+    Times every benchmark the way timeit does, first scaling its calls per run until a run takes at least
+    MIN_RUN_SECONDS, then running each once per round, all of them in turn, rounds times over
+    :param benchmarks: Each benchmark's function, keyed by name
+    :return: each benchmark's median seconds per call, noise, and calls per run, keyed by name
+    """
+    timers: dict = {}
+    for name, func in benchmarks.items():
+        func()  # fill any caches the first call builds, so they are not counted against the calls per run
+        timer: timeit.Timer = timeit.Timer(func)
+        number: int = 1
+        while timer.timeit(number=number) < MIN_RUN_SECONDS:
+            number *= 2
+        timers[name] = (timer, number)
+    samples: dict = {name: [] for name in benchmarks}
+    for _ in range(rounds):
+        for name, (timer, number) in timers.items():
+            samples[name].append(timer.timeit(number=number) / number)
+    results: dict = {}
+    for name, (timer, number) in timers.items():
+        median: float = statistics.median(samples[name])
+        lower_quartile, _, upper_quartile = statistics.quantiles(samples[name], n=4)
+        results[name] = {"seconds_per_call": median, "noise": (upper_quartile - lower_quartile) / median,
+                         "calls": number, "rounds": rounds}
+    return results
+
+
+def make_passenger(rng: random.Random) -> Passenger:
+    passenger: Passenger = Passenger(name=rng.choice(PASSENGER_NAMES), age=rng.randint(0, 100))
+    passenger.set_tax_rate(rng.choice([0.0, 0.05, 0.0725, 0.1]))
+    return passenger
+
+
+def fill_seating_structure(model: SeatingStructure, occupancy_percent: int, rng: random.Random):
+    """
+    Books the given percentage of every tier's seats, chosen at random
+    """
+    for tier in Tier:
+        seats: list = [(row_number, seat_letter) for row_number in model.get_row_options(tier)
+                       for seat_letter in model.get_seat_options(tier)]
+        for row_number, seat_letter in rng.sample(seats, len(seats) * occupancy_percent // 100):
+            seat: Seat = Seat(seat_letter=seat_letter, row_number=row_number, tier=tier)
+            seat.assign_passenger(make_passenger(rng))
+            model.set_seat(seat)
+
+
+def toggle_first_seat(model: SeatingStructure, passenger: Passenger):
+    """
+    Books the first coach seat if it is open, or cancels it if it is booked, so the next chart has a changed row
+    """
+    seat: Seat = model.get_seat(tier=Tier.coach, row_number=1, seat_letter=model.get_seat_options(Tier.coach)[0])
+    if seat.is_taken():
+        seat.remove_passenger()
+    else:
+        seat.assign_passenger(passenger)
+
+
+def make_seat_map_benchmarks(size_name: str, occupancy_percent: int, storage_type: SeatStorageType) -> dict:
+    """
+    :return: each seat-map benchmark's function, keyed by name, over a seat map built and filled up front
+    """
+    fc_rows, fc_seats, coach_rows, coach_seats = CABIN_SIZES[size_name]
+    suffix: str = f"[{size_name}/{occupancy_percent}%/{storage_type.name}]"
+    benchmarks: dict = {}
+
+    def build() -> SeatingStructure:
+        return SeatingStructure(fc_rows=fc_rows, fc_seats=fc_seats, coach_rows=coach_rows, coach_seats=coach_seats,
+                                storage_type=storage_type)
+
+    if occupancy_percent == 0:
+        benchmarks[f"construct{suffix}"] = build
+    rng: random.Random = random.Random(0)
+    model: SeatingStructure = build()
+    fill_seating_structure(model=model, occupancy_percent=occupancy_percent, rng=rng)
+    passenger: Passenger = make_passenger(rng)
+
+    benchmarks[f"get_available_rows{suffix}"] = lambda: [model.get_available_rows(tier) for tier in Tier]
+    benchmarks[f"get_full_rows{suffix}"] = lambda: [model.get_full_rows(tier) for tier in Tier]
+    benchmarks[f"is_full{suffix}"] = model.is_full
+    benchmarks[f"is_empty{suffix}"] = model.is_empty
+    benchmarks[f"generate_chart_cached{suffix}"] = model.generate_chart
+
+    def generate_chart_after_change():
+        toggle_first_seat(model=model, passenger=passenger)
+        model.generate_chart()
+
+    benchmarks[f"generate_chart_after_change{suffix}"] = generate_chart_after_change
+    benchmarks[f"write_chart{suffix}"] = lambda: model.write_chart(StringIO())
+    return benchmarks
+
+
+def make_pricing_benchmarks() -> dict:
+    rng: random.Random = random.Random(0)
+    booked_seats: list = []
+    for number in range(100):
+        seat: Seat = Seat(seat_letter="A", row_number=number + 1, tier=rng.choice(list(Tier)))
+        seat.assign_passenger(make_passenger(rng))
+        booked_seats.append(seat)
+    open_seats: list = [Seat(seat_letter="B", row_number=number + 1, tier=rng.choice(list(Tier)))
+                        for number in range(100)]
+    amounts: list = [rng.randint(0, 100000) for _ in range(100)]
+    return {
+        "get_price_cents[x100]": lambda: [seat.get_price_cents() for seat in booked_seats],
+        "compare_cost_cents[x100]": lambda: [from_seat.compare_cost_cents(to_seat=to_seat)
+                                             for from_seat, to_seat in zip(booked_seats, open_seats)],
+        "make_change[x100]": lambda: [MoneyManipulator.make_change(amount) for amount in amounts],
+    }
+
+
+def run_benchmarks(size_names: list, occupancy_percents: list, storage_types: list, rounds: int = ROUNDS) -> dict:
+    benchmarks: dict = make_pricing_benchmarks()
+    for size_name in size_names:
+        for storage_type in storage_types:
+            for occupancy_percent in occupancy_percents:
+                benchmarks.update(make_seat_map_benchmarks(size_name=size_name, occupancy_percent=occupancy_percent,
+                                                           storage_type=storage_type))
+    return {"created": datetime.now().isoformat(timespec='seconds'),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": time_calls(benchmarks, rounds=rounds)}
+
+
+def get_drift(results: dict, baseline: dict) -> float:
+    """
+    :return: the median ratio of new to baseline seconds per call over the benchmarks both runs share, or 1
+    """
+    ratios: list = [result["seconds_per_call"] / baseline["results"][name]["seconds_per_call"]
+                    for name, result in results["results"].items() if name in baseline["results"]]
+    return statistics.median(ratios) if len(ratios) > 0 else 1.0
+
+
+def compare_to_baseline(results: dict, baseline: dict, threshold: float = DEFAULT_THRESHOLD) -> list:
+    """
+    A benchmark regressed if its median, with the drift divided out, slowed by more than the threshold plus the
+    noise of both runs, since either median may be off by about its own run's spread. Baselines from before noise
+    was recorded count as noiseless.
+    :param threshold: The fractional slow-down tolerated before a benchmark counts as a regression
+    :return: (name, baseline seconds, new seconds) for every benchmark that regressed, worst first
+    """
+    drift: float = get_drift(results=results, baseline=baseline)
+    regressions: list = []
+    for name, result in results["results"].items():
+        old_result: dict = baseline["results"].get(name)
+        if old_result is None:
+            continue
+        old_seconds: float = old_result["seconds_per_call"]
+        new_seconds: float = result["seconds_per_call"]
+        tolerance: float = threshold + old_result.get("noise", 0.0) + result.get("noise", 0.0)
+        if new_seconds > old_seconds * drift * (1 + tolerance):
+            regressions.append((name, old_seconds, new_seconds))
+    regressions.sort(key=lambda regression: regression[2] / regression[1], reverse=True)
+    return regressions
+
+
+def format_seconds(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:8.2f} {unit}"
+    return f"{seconds / 1e-9:8.2f} ns"
+
+
+def main():
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Benchmark the reservation system")
+    parser.add_argument("--sizes", default=",".join(CABIN_SIZES), help=f"any of {', '.join(CABIN_SIZES)}")
+    parser.add_argument("--occupancy", default=",".join(map(str, DEFAULT_OCCUPANCY_PERCENTS)),
+                        help="percentages of seats booked")
+    parser.add_argument("--storage", default=f"{SeatStorageType.objects.name},{SeatStorageType.bitmap.name}",
+                        help="seat storage engines to measure")
+    parser.add_argument("--output", default=None, help="file to write the JSON results to")
+    parser.add_argument("--baseline", default=None, help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="fractional slow-down, beyond the runs' noise, that counts as a regression")
+    parser.add_argument("--rounds", type=int, default=ROUNDS, help="times to run through every benchmark")
+    args = parser.parse_args()
+    for size_name in args.sizes.split(","):
+        if size_name not in CABIN_SIZES:
+            parser.error(f"Unknown cabin size '{size_name}'; expected one of {', '.join(CABIN_SIZES)}")
+    storage_types: list = [SeatStorageType[name] for name in args.storage.split(",")]
+    if SeatStorageType.mapped in storage_types:
+        parser.error("Mapped storage needs a seat-map file and is not benchmarked here")
+    if args.rounds < 2:
+        parser.error("At least two rounds are needed to measure noise")
+
+    results: dict = run_benchmarks(size_names=args.sizes.split(","),
+                                   occupancy_percents=[int(percent) for percent in args.occupancy.split(",")],
+                                   storage_types=storage_types, rounds=args.rounds)
+    for name, result in results["results"].items():
+        print(f"{format_seconds(result['seconds_per_call'])} +/-{result['noise']:4.0%}  {name}")
+    if args.output is not None:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump(results, output_file, indent=2)
+    if args.baseline is not None:
+        with open(args.baseline, 'r', encoding='utf-8') as baseline_file:
+            baseline: dict = json.load(baseline_file)
+        print(f"Drift against {args.baseline}: {get_drift(results=results, baseline=baseline):.2f}x")
+        regressions: list = compare_to_baseline(results=results, baseline=baseline, threshold=args.threshold)
+        for name, old_seconds, new_seconds in regressions:
+            print(f"REGRESSION {name}: {format_seconds(old_seconds)} -> {format_seconds(new_seconds)} "
+                  f"({new_seconds / old_seconds:.2f}x)")
+        if len(regressions) > 0:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,337 @@
+"""
+Asyncio booking service: serves one shared SeatingStructure to many concurrent agent sessions over a local
+JSON-over-TCP protocol (one JSON object per line, in each direction).
+
+    python booking_service.py serve [--host 127.0.0.1] [--port 8642]
+    python booking_service.py loadtest [--host 127.0.0.1] [--port 8642] [--sessions 50] [--requests 200] [--spawn]
+
+Requests name an "op" (book, change, cancel, hold, release, availability or chart) plus its fields; every
+response carries "ok", and either the result fields or an "error" message. A hold sets an open seat aside for
+"ttl_seconds" and returns a "hold_id"; passing that id with the book (or change) request for the seat books it.
+Until then, or until the hold is released or expires, nobody else can book or hold the seat.
+A batch request carries a list of "changes", each a book, cancel, move or swap with the same fields as the single
+request (a move or swap names its second seat with to_tier, to_row and to_seat); they are committed all together
+or not at all.
+An availability request with an "adjacent" count (and optionally "best_fit") returns a block of that many adjacent
+open seats in one row. Without a row or an "adjacent" count, it also returns each tier's current base fare, which
+rises as the cabin fills if the model has a fare ladder.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from math import ceil
+
+from chaffey_flight_reservation_sys import (AircraftLayout, Seat, SeatHold, SeatHolds, SeatingStructure,
+                                            SeatStorageType, SeatTransaction, Tier, NUM_COACH_ROWS,
+                                            NUM_COACH_SEATS_PER_ROW, NUM_FC_ROWS, NUM_FC_SEATS_PER_ROW,
+                                            parse_booking_record, parse_tier)
+
+DEFAULT_HOST: str = "127.0.0.1"
+DEFAULT_PORT: int = 8642
+STREAM_LIMIT: int = 16 * 1024 * 1024
+ENCODING: str = 'utf-8'
+
+
+class BookingService:
+
+    def __init__(self, model: SeatingStructure):
+        self.__model: SeatingStructure = model
+        self.__handlers: dict = {
+            "book": self.__book,
+            "change": self.__change,
+            "cancel": self.__cancel,
+            "hold": self.__hold,
+            "release": self.__release,
+            "batch": self.__batch,
+            "availability": self.__availability,
+            "chart": self.__chart,
+        }
+
+    def get_model(self) -> SeatingStructure:
+        return self.__model
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self.handle_connection, host=host, port=port, limit=STREAM_LIMIT)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line: bytes = await reader.readline()
+                if not line:
+                    break
+                response: dict = self.handle_line(line)
+                writer.write(json.dumps(response, separators=(',', ':')).encode(ENCODING) + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def handle_line(self, line: bytes) -> dict:
+        try:
+            request: dict = json.loads(line)
+        except ValueError as e:
+            return {"ok": False, "error": f"Request is not valid JSON: {e}"}
+        return self.handle_request(request)
+
+    def handle_request(self, request: dict) -> dict:
+        """
+        Runs one request against the model. The event loop only switches sessions between requests,
+        so every request sees and leaves the model in a consistent state.
+        """
+        try:
+            if not isinstance(request, dict):
+                raise Exception("Request must be a JSON object")
+            handler = self.__handlers.get(request.get("op"))
+            if handler is None:
+                raise Exception(f"Unknown op '{request.get('op')}'; expected one of {', '.join(self.__handlers)}")
+            response: dict = handler(request)
+            response["ok"] = True
+            return response
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
+    def __find_seat(self, request: dict, prefix: str = "") -> Seat:
+        tier: Tier = parse_tier(str(request[f"{prefix}tier"]))
+        row_number: int = int(request[f"{prefix}row"])
+        seat_letter: str = str(request[f"{prefix}seat"]).strip().upper()
+        return self.__model.find_seat(tier=tier, row_number=row_number, seat_letter=seat_letter)
+
+    def __find_hold(self, request: dict) -> SeatHold:
+        """
+        :return: the unexpired hold named by the request's hold_id, SeatHolds.NO_HOLD if it names none
+        """
+        if request.get("hold_id") is None:
+            return SeatHolds.NO_HOLD
+        hold: SeatHold = self.__model.get_seat_holds().get_hold_by_id(int(request["hold_id"]))
+        if hold is SeatHolds.NO_HOLD:
+            raise Exception(f"Hold {request['hold_id']} has expired or been released")
+        return hold
+
+    def __book(self, request: dict) -> dict:
+        seat: Seat = parse_booking_record(request)
+        hold: SeatHold = self.__find_hold(request)
+        if hold is SeatHolds.NO_HOLD:
+            self.__model.book_seat(seat)
+        else:
+            self.__model.confirm_hold(hold=hold, seat=seat)
+        return {"seat": seat.get_tier_row_seat_str(), "price_cents": seat.get_price_cents()}
+
+    def __change(self, request: dict) -> dict:
+        from_seat: Seat = self.__find_seat(request)
+        probe: Seat = self.__find_seat(request, prefix="to_")
+        to_seat: Seat = Seat(seat_letter=probe.get_seat_letter(), row_number=probe.get_row_number(),
+                             tier=probe.get_tier())
+        additional_cost_cents: int = from_seat.compare_cost_cents(to_seat=probe)
+        self.__model.move_passenger(from_seat=from_seat, to_seat=to_seat, hold=self.__find_hold(request))
+        return {"from_seat": from_seat.get_tier_row_seat_str(), "to_seat": to_seat.get_tier_row_seat_str(),
+                "additional_cost_cents": additional_cost_cents}
+
+    def __cancel(self, request: dict) -> dict:
+        seat: Seat = self.__find_seat(request)
+        if not seat.is_taken():
+            raise Exception(f"{seat.get_tier_row_seat_str()} does not have a passenger assigned to it")
+        seat.remove_passenger()
+        return {"seat": seat.get_tier_row_seat_str()}
+
+    def __hold(self, request: dict) -> dict:
+        tier: Tier = parse_tier(str(request["tier"]))
+        ttl_seconds: float = float(request.get("ttl_seconds", SeatHolds.DEFAULT_TTL_SECONDS))
+        hold: SeatHold = self.__model.hold_seat(tier=tier, row_number=int(request["row"]),
+                                                seat_letter=str(request["seat"]).strip().upper(),
+                                                ttl_seconds=ttl_seconds, holder=str(request.get("holder", "")))
+        return {"hold_id": hold.get_hold_id(), "ttl_seconds": ttl_seconds}
+
+    def __release(self, request: dict) -> dict:
+        hold: SeatHold = self.__find_hold(request)
+        if hold is SeatHolds.NO_HOLD:
+            raise Exception("A release must name a hold_id")
+        return {"released": self.__model.release_hold(hold)}
+
+    def __batch(self, request: dict) -> dict:
+        changes: list = request.get("changes")
+        if not isinstance(changes, list):
+            raise Exception("A batch must carry a list of changes")
+        transaction: SeatTransaction = SeatTransaction()
+        for change in changes:
+            op = change.get("op") if isinstance(change, dict) else None
+            if op == SeatTransaction.BOOK_OP:
+                transaction.book(parse_booking_record(change))
+            elif op == SeatTransaction.CANCEL_OP:
+                transaction.cancel(self.__find_seat(change))
+            elif op == SeatTransaction.MOVE_OP:
+                transaction.move(from_seat=self.__find_seat(change), to_seat=self.__find_seat(change, prefix="to_"))
+            elif op == "swap":
+                transaction.swap(seat_a=self.__find_seat(change), seat_b=self.__find_seat(change, prefix="to_"))
+            else:
+                raise Exception(f"Unknown batch change '{op}'; expected one of book, cancel, move, swap")
+        seats: list = self.__model.commit_transaction(transaction)
+        return {"changed": [seat.get_tier_row_seat_str() for seat in seats]}
+
+    def __availability(self, request: dict) -> dict:
+        model: SeatingStructure = self.__model
+        tiers: list = list(Tier) if request.get("tier") is None else [parse_tier(str(request["tier"]))]
+        if request.get("adjacent") is not None:
+            for tier in tiers:
+                seats: list = model.find_adjacent_seats(tier=tier, num_seats=int(request["adjacent"]),
+                                                        best_fit=bool(request.get("best_fit", False)))
+                if len(seats) > 0:
+                    return {"tier": tier.get_tier_name(), "row": seats[0].get_row_number(),
+                            "seats": [seat.get_seat_letter() for seat in seats]}
+            return {"tier": None, "row": None, "seats": []}
+        if request.get("row") is not None:
+            row_number: int = int(request["row"])
+            tier: Tier = tiers[0]
+            if not model.is_valid_row(tier=tier, row_number=row_number):
+                raise Exception(f"Row '{row_number}' is not a valid option")
+            return {"tier": tier.get_tier_name(), "row": row_number,
+                    "seats": list(model.get_available_seats(tier=tier, row_number=row_number))}
+        tier_rows: dict = {}
+        tier_fares: dict = {}
+        for tier in tiers:
+            tier_rows[tier.get_tier_name()] = list(model.get_available_rows(tier=tier))
+            tier_fares[tier.get_tier_name()] = model.get_fare_cents(tier=tier)
+        return {"full": model.is_full(), "rows": tier_rows, "fares_cents": tier_fares}
+
+    def __chart(self, request: dict) -> dict:
+        return {"chart": self.__model.generate_chart()}
+
+
+class BookingClient:
+
+    def __init__(self):
+        self.__reader: asyncio.StreamReader = None
+        self.__writer: asyncio.StreamWriter = None
+
+    async def connect(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        self.__reader, self.__writer = await asyncio.open_connection(host=host, port=port, limit=STREAM_LIMIT)
+
+    async def close(self):
+        if self.__writer is not None:
+            self.__writer.close()
+            await self.__writer.wait_closed()
+            self.__writer = None
+
+    async def request(self, op: str, **fields) -> dict:
+        fields["op"] = op
+        self.__writer.write(json.dumps(fields, separators=(',', ':')).encode(ENCODING) + b'\n')
+        await self.__writer.drain()
+        line: bytes = await self.__reader.readline()
+        if not line:
+            raise ConnectionError("The booking service closed the connection")
+        return json.loads(line)
+
+
+def make_random_request(rng: random.Random, session_number: int) -> tuple:
+    """
+    :return: an (op, fields) pair drawn from a mix weighted towards availability checks, as agents make them
+    """
+    tier: Tier = rng.choice(list(Tier))
+    layout: AircraftLayout = AircraftLayout.get_default()
+    seat_fields: dict = {"tier": tier.value[2],
+                         "row": rng.choice(layout.get_row_options(tier)),
+                         "seat": rng.choice(layout.get_seat_options(tier))}
+    roll: float = rng.random()
+    if roll < 0.6:
+        return "availability", {"tier": tier.value[2]}
+    if roll < 0.8:
+        seat_fields.update({"name": f"Agent {session_number}", "age": rng.randint(0, 100), "tax_rate": 0.08})
+        return "book", seat_fields
+    if roll < 0.95:
+        return "cancel", seat_fields
+    return "chart", {}
+
+
+async def run_session(host: str, port: int, session_number: int, num_requests: int, latencies: list) -> int:
+    """
+    :return: the number of requests the service rejected (such as booking a taken seat); latencies are appended
+    """
+    rng: random.Random = random.Random(session_number)
+    client: BookingClient = BookingClient()
+    await client.connect(host=host, port=port)
+    rejected: int = 0
+    try:
+        for _ in range(num_requests):
+            op, fields = make_random_request(rng=rng, session_number=session_number)
+            start: float = time.perf_counter()
+            response: dict = await client.request(op, **fields)
+            latencies.append(time.perf_counter() - start)
+            if not response["ok"]:
+                rejected += 1
+    finally:
+        await client.close()
+    return rejected
+
+
+def get_percentile(sorted_values: list, percentile: float) -> float:
+    if len(sorted_values) == 0:
+        return 0.0
+    return sorted_values[max(0, ceil(percentile / 100 * len(sorted_values)) - 1)]
+
+
+async def run_load_test(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, sessions: int = 50,
+                        requests_per_session: int = 200, spawn: bool = False) -> dict:
+    """
+    Drives many concurrent client sessions against a booking service and measures it
+    :param spawn: True to start a service on an empty model in this event loop first
+    :return: the request count, elapsed seconds, requests per second, and p50/p99 latency in milliseconds
+    """
+    server: asyncio.AbstractServer = None
+    if spawn:
+        model: SeatingStructure = SeatingStructure(fc_rows=NUM_FC_ROWS, fc_seats=NUM_FC_SEATS_PER_ROW,
+                                                   coach_rows=NUM_COACH_ROWS, coach_seats=NUM_COACH_SEATS_PER_ROW,
+                                                   storage_type=SeatStorageType.bitmap)
+        server = await BookingService(model).start(host=host, port=port)
+    latencies: list = []
+    try:
+        start: float = time.perf_counter()
+        rejected: list = await asyncio.gather(*[run_session(host=host, port=port, session_number=number,
+                                                            num_requests=requests_per_session, latencies=latencies)
+                                                for number in range(sessions)])
+        elapsed: float = time.perf_counter() - start
+    finally:
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+    latencies.sort()
+    return {"requests": len(latencies),
+            "rejected": sum(rejected),
+            "seconds": elapsed,
+            "requests_per_second": len(latencies) / elapsed if elapsed > 0 else 0.0,
+            "p50_ms": get_percentile(latencies, 50) * 1000,
+            "p99_ms": get_percentile(latencies, 99) * 1000}
+
+
+async def serve(host: str, port: int):
+    model: SeatingStructure = SeatingStructure(fc_rows=NUM_FC_ROWS, fc_seats=NUM_FC_SEATS_PER_ROW,
+                                               coach_rows=NUM_COACH_ROWS, coach_seats=NUM_COACH_SEATS_PER_ROW)
+    server: asyncio.AbstractServer = await BookingService(model).start(host=host, port=port)
+    print(f"Booking service listening on {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Chaffey Airlines booking service")
+    parser.add_argument("mode", choices=["serve", "loadtest"])
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--sessions", type=int, default=50, help="concurrent client sessions (loadtest)")
+    parser.add_argument("--requests", type=int, default=200, help="requests per session (loadtest)")
+    parser.add_argument("--spawn", action="store_true", help="start a service in-process to test (loadtest)")
+    args = parser.parse_args()
+    if args.mode == "serve":
+        asyncio.run(serve(host=args.host, port=args.port))
+    else:
+        results: dict = asyncio.run(run_load_test(host=args.host, port=args.port, sessions=args.sessions,
+                                                  requests_per_session=args.requests, spawn=args.spawn))
+        print(f"{results['requests']} requests ({results['rejected']} rejected) in {results['seconds']:.2f}s: "
+              f"{results['requests_per_second']:.0f} req/s, p50 {results['p50_ms']:.2f}ms, "
+              f"p99 {results['p99_ms']:.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,31 @@
 from abc import ABCMeta, abstractmethod
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+from collections.abc import Mapping
+from contextlib import ExitStack, contextmanager, nullcontext
+import csv
+from datetime import date
 from enum import Enum
-from math import ceil, floor
+from functools import lru_cache, wraps
+import heapq
+from math import ceil, floor, gcd
 from os import linesep
 from io import StringIO
+from itertools import count, product
+import json
+import mmap
+import os
+from string import ascii_uppercase
+import struct
+import sys
+from time import monotonic, perf_counter
 from locale import currency, setlocale, LC_ALL
+from threading import Condition, Event, Lock, RLock, Thread, current_thread, local
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 MAX_NAME_DISPLAY_LEN: int = 12
 CELL_SEPARATOR: str = '|'
@@ -35,6 +57,7 @@ NUM_COACH_SEATS_PER_ROW: int = 4
 NUM_FC_SEATS_PER_ROW: int = 2
 QUIT_GUIDANCE_TEXT: str = f"Enter '{QUIT_CHAR}' at any point to quit out of the application"
 RETURN_GUIDANCE_TEXT: str = f"Enter '{RETURN_TO_MAIN_CHAR}' at any point to Return to the main menu"
+METRICS_DUMP_INTERVAL_SECONDS: float = 10.0
 
 
 def build_app_header_string(text="") -> str:
@@ -54,23 +77,109 @@ def build_app_header_string(text="") -> str:
     return header
 
 
-def print_app_header():
-    print(build_app_header_string())
-    print(build_app_header_string(text=WELCOME_TEXT))
-    print(build_app_header_string())
-    print(build_app_header_string(text=INFO_TEXT))
-    print(build_app_header_string())
+class Console:
+    """
+    The attendant's terminal as the controllers and prompts see it: entries are read from an input stream, and
+    prompts and results written to an output stream. Each session is handed its own console, so booking flows can
+    be driven from a script, several at once, without touching the process's standard streams.
+    """
+    NO_STREAM = None
+
+    def __init__(self, input_stream=NO_STREAM, output_stream=NO_STREAM):
+        """
+        :param input_stream: Anything with a readline() method; the process's standard input if not given
+        :param output_stream: Anything with a write(str) method; the process's standard output if not given
+        """
+        self.__input_stream = input_stream
+        self.__output_stream = output_stream
+
+    def __get_output_stream(self):
+        return sys.stdout if self.__output_stream is self.NO_STREAM else self.__output_stream
 
+    def print(self, *values, sep: str = SPACE, end: str = "\n"):
+        print(*values, sep=sep, end=end, file=self.__get_output_stream())
 
-def run_reservation_system_pos():
-    print_app_header()
-    model: SeatingStructure = SeatingStructure(fc_rows=NUM_FC_ROWS,
-                                               coach_rows=NUM_COACH_ROWS,
-                                               fc_seats=NUM_FC_SEATS_PER_ROW,
-                                               coach_seats=NUM_COACH_SEATS_PER_ROW)
+    def read_line(self, prompt: str = EMPTY_STR) -> str:
+        """
+        Like input(): writes the prompt, then reads one entry. Raises EOFError once the input stream is exhausted.
+        :return: the entry, without its line ending
+        """
+        if self.__input_stream is self.NO_STREAM and self.__output_stream is self.NO_STREAM:
+            return input(prompt)
+        output_stream = self.__get_output_stream()
+        output_stream.write(prompt)
+        if hasattr(output_stream, "flush"):
+            output_stream.flush()
+        line: str = sys.stdin.readline() if self.__input_stream is self.NO_STREAM else self.__input_stream.readline()
+        if line == EMPTY_STR:
+            raise EOFError()
+        return line[:-1] if line.endswith("\n") else line
+
+
+TERMINAL_CONSOLE: Console = Console()
+
+
+def print_app_header(console: Console = TERMINAL_CONSOLE):
+    console.print(build_app_header_string())
+    console.print(build_app_header_string(text=WELCOME_TEXT))
+    console.print(build_app_header_string())
+    console.print(build_app_header_string(text=INFO_TEXT))
+    console.print(build_app_header_string())
+
+
+def run_reservation_system_pos(journal_directory: str = None, metrics_path: str = None,
+                               metrics_interval_seconds: float = METRICS_DUMP_INTERVAL_SECONDS,
+                               input_stream=None, output_stream=None, cash_drawer: 'CashDrawer' = None,
+                               fare_ladder: 'FareLadder' = None):
+    """
+    :param journal_directory: If given, bookings are journaled there and recovered from it on start-up
+    :param metrics_path: If given, hot paths are instrumented and their metrics dumped to this file
+    every metrics_interval_seconds, and once more on exit
+    :param input_stream: Where the attendant's entries are read from, one per line; defaults to the terminal
+    :param output_stream: Where prompts and results are written; defaults to the terminal
+    :param cash_drawer: If given, payments go into and change comes out of this drawer, which is reconciled on exit;
+    otherwise change is made as if every denomination were unlimited
+    :param fare_ladder: If given, fares rise with each cabin's load factor; otherwise every tier has its static fare
+    """
+    if metrics_path is not None:
+        INSTRUMENTATION.enable()
+        INSTRUMENTATION.start_periodic_dump(path=metrics_path, interval_seconds=metrics_interval_seconds)
+    journal: BookingJournal = None
+    console: Console = Console(input_stream=input_stream, output_stream=output_stream)
+    try:
+        print_app_header(console=console)
+        model: SeatingStructure = SeatingStructure(fc_rows=NUM_FC_ROWS,
+                                                   coach_rows=NUM_COACH_ROWS,
+                                                   fc_seats=NUM_FC_SEATS_PER_ROW,
+                                                   coach_seats=NUM_COACH_SEATS_PER_ROW)
+        model.set_fare_ladder(fare_ladder)
+        if journal_directory is not None:
+            journal = BookingJournal(directory=journal_directory)
+            journal.open(model)
+        CashDrawer.set_active(cash_drawer)
+        try:
+            run_controllers(model, console=console)
+        finally:
+            CashDrawer.set_active(CashDrawer.NO_DRAWER)
+            if cash_drawer is not None:
+                cash_drawer.print_reconciliation(console=console)
+    finally:
+        if journal is not None:
+            journal.close()
+        if metrics_path is not None:
+            INSTRUMENTATION.stop_periodic_dump()
+            INSTRUMENTATION.dump(metrics_path)
+            INSTRUMENTATION.disable()
+
+
+def run_controllers(model: 'SeatingStructure', console: Console = TERMINAL_CONSOLE):
+    """
+    Runs the menu controllers against the model, from the main menu until the attendant quits
+    :param console: Where the attendant's entries are read from and the prompts and results written to
+    """
     controller: Controller = MainController()
     while controller is not None:
-        controller = controller.do(model)
+        controller = controller.do(model, console)
 
 
 class MoneyManipulator(Enum):
@@ -86,7 +195,7 @@ class MoneyManipulator(Enum):
     pennies = 1
 
     @classmethod
-    def make_change(cls, amount_cents: int, do_print: bool = False) -> dict:
+    def make_change(cls, amount_cents: int, do_print: bool = False, console: Console = TERMINAL_CONSOLE) -> dict:
         original_amt: int = amount_cents
         data = {}
         for member in cls:
@@ -95,17 +204,17 @@ class MoneyManipulator(Enum):
             if count > 0:
                 data[member] = count
         if do_print:
-            cls.print_change(data, original_amount_cents=original_amt)
+            cls.print_change(data, original_amount_cents=original_amt, console=console)
         return data
 
     @classmethod
-    def print_change(cls, amounts: dict, original_amount_cents: int = 0):
+    def print_change(cls, amounts: dict, original_amount_cents: int = 0, console: Console = TERMINAL_CONSOLE):
         if len(amounts) == 0:
-            print('No change necessary')
+            console.print('No change necessary')
         else:
             if original_amount_cents > 0:
-                print(f"Amount Returned: {cls.convert_cents_to_dollar_str(original_amount_cents)}")
-            print("Change Dispensed:")
+                console.print(f"Amount Returned: {cls.convert_cents_to_dollar_str(original_amount_cents)}")
+            console.print("Change Dispensed:")
             longest_name: int = 0
             longest_amt: int = 0
             for amount in amounts.keys():
@@ -117,7 +226,7 @@ class MoneyManipulator(Enum):
                     value = amounts[member]
                     name_buffer: str = SPACE * (longest_name - len(name))
                     val_buffer: str = SPACE * (longest_amt - len(str(value)))
-                    print(f"\t{name_buffer}{member.name.capitalize()}: {val_buffer}{amounts[member]}")
+                    console.print(f"\t{name_buffer}{member.name.capitalize()}: {val_buffer}{amounts[member]}")
 
     def get_name(self) -> str:
         return self.name
@@ -130,13 +239,201 @@ class MoneyManipulator(Enum):
         return currency(cents / 100)
 
 
+class CashDrawer:
+    """
+    The bills and coins on hand at a counter, by MoneyManipulator denomination.
+    Payments are put in the drawer and change is taken out of it, so change can only be made from what is there:
+    a greedy pass is tried first, and is kept if no denomination ran short, since greedy change is then the fewest
+    pieces; otherwise an exact search (memoized dynamic programming over the amount still to pay out) finds the
+    change using the fewest pieces, if any exists.
+    The drawer tallies everything taken in and paid out, for the end-of-shift reconciliation.
+    """
+    NO_DRAWER = None
+    __active_drawer: 'CashDrawer' = None
+
+    def __init__(self, counts: dict = None):
+        """
+        :param counts: The number of each denomination in the drawer at the start of the shift; missing ones are 0
+        """
+        counts = counts if counts is not None else {}
+        self.__opening_counts: dict = {member: counts.get(member, 0) for member in MoneyManipulator}
+        self.__counts: dict = dict(self.__opening_counts)
+        self.__received_cents: int = 0
+        self.__dispensed_cents: int = 0
+
+    @classmethod
+    def get_active(cls) -> 'CashDrawer':
+        """
+        :return: the drawer the booking controllers take payments into, or NO_DRAWER to make change without limits
+        """
+        return cls.__active_drawer
+
+    @classmethod
+    def set_active(cls, drawer: 'CashDrawer'):
+        cls.__active_drawer = drawer
+
+    def get_count(self, denomination: MoneyManipulator) -> int:
+        return self.__counts[denomination]
+
+    def get_counts(self) -> dict:
+        return dict(self.__counts)
+
+    def get_balance_cents(self) -> int:
+        return sum(member.value * count for member, count in self.__counts.items())
+
+    def take_payment(self, paid_cents: int, change_cents: int = 0) -> dict:
+        """
+        Puts a payment in the drawer and takes the change due out of it. If the drawer cannot make the change,
+        the payment is handed back and the drawer is left as it was.
+        The payment is assumed to be tendered in the largest bills and coins that make it up.
+        :return: the change dispensed, as a MoneyManipulator-to-count dict
+        """
+        if change_cents > paid_cents:
+            raise Exception("Change cannot be more than the amount paid")
+        tendered: dict = MoneyManipulator.make_change(amount_cents=paid_cents)
+        for member, count in tendered.items():
+            self.__counts[member] += count
+        try:
+            change: dict = self.make_change(amount_cents=change_cents)
+        except Exception:
+            for member, count in tendered.items():
+                self.__counts[member] -= count
+            raise
+        for member, count in change.items():
+            self.__counts[member] -= count
+        self.__received_cents += paid_cents
+        self.__dispensed_cents += change_cents
+        return change
+
+    def make_change(self, amount_cents: int) -> dict:
+        """
+        Works out the change for an amount from what is in the drawer, without taking it out
+        :return: a MoneyManipulator-to-count dict, using the fewest pieces the drawer allows
+        """
+        if amount_cents < 0:
+            raise Exception("Change cannot be negative")
+        change: dict = {}
+        remaining: int = amount_cents
+        ran_short: bool = False
+        for member in MoneyManipulator:
+            wanted: int = remaining // member.value
+            count: int = min(self.__counts[member], wanted)
+            ran_short = ran_short or count < wanted
+            remaining -= count * member.value
+            if count > 0:
+                change[member] = count
+        # with every denomination it wanted, greedy change is the fewest pieces; once one ran short, a pass that
+        # still made the change may have made up the shortfall in more pieces than needed
+        if not ran_short:
+            return change
+        return self.__make_exact_change(amount_cents=amount_cents)
+
+    def __make_exact_change(self, amount_cents: int) -> dict:
+        # smallest denomination first, over only the denominations on hand: whatever is left after choosing how many
+        # of one to use must be a multiple of the gcd of the larger ones, and no more than they add up to, which
+        # leaves only a few counts to try at each step and rules out impossible amounts almost at once
+        denominations: list = [member for member in reversed(MoneyManipulator) if self.__counts[member] > 0]
+        values: list = [member.value for member in denominations]
+        counts: list = [self.__counts[member] for member in denominations]
+        gcd_above: list = [0] * len(denominations)
+        capacity_above: list = [0] * len(denominations)
+        for index in range(len(denominations) - 2, -1, -1):
+            gcd_above[index] = gcd(gcd_above[index + 1], values[index + 1])
+            capacity_above[index] = capacity_above[index + 1] + values[index + 1] * counts[index + 1]
+        no_change: int = amount_cents + 1
+
+        def get_count_range(index: int, remaining: int) -> range:
+            value: int = values[index]
+            least: int = max(0, ceil((remaining - capacity_above[index]) / value))
+            most: int = min(counts[index], remaining // value)
+            if gcd_above[index] == 0:
+                # the largest denomination on hand has to pay out everything left
+                return range(remaining // value, remaining // value + 1) if remaining % value == 0 else range(0)
+            step: int = gcd_above[index] // gcd(value, gcd_above[index])
+            first: int = least
+            while first < least + step and (remaining - first * value) % gcd_above[index] != 0:
+                first += 1
+            return range(first, most + 1, step) if first < least + step else range(0)
+
+        @lru_cache(maxsize=None)
+        def fewest_pieces(index: int, remaining: int) -> int:
+            if remaining == 0:
+                return 0
+            if index == len(denominations):
+                return no_change
+            best: int = no_change
+            for count in get_count_range(index=index, remaining=remaining):
+                best = min(best, count + fewest_pieces(index + 1, remaining - count * values[index]))
+            return best
+
+        if amount_cents > self.get_balance_cents() or fewest_pieces(0, amount_cents) >= no_change:
+            raise Exception(f"The cash drawer cannot make {MoneyManipulator.convert_cents_to_dollar_str(amount_cents)}"
+                            f" in change from what is on hand")
+        change: dict = {}
+        remaining: int = amount_cents
+        for index, member in enumerate(denominations):
+            if remaining == 0:
+                break
+            for count in get_count_range(index=index, remaining=remaining):
+                if count + fewest_pieces(index + 1, remaining - count * values[index]) == \
+                        fewest_pieces(index, remaining):
+                    break
+            remaining -= count * values[index]
+            if count > 0:
+                change[member] = count
+        return {member: change[member] for member in MoneyManipulator if member in change}
+
+    def reconcile(self, counted: dict = None) -> dict:
+        """
+        :param counted: The number of each denomination counted in the drawer at the end of the shift, if known
+        :return: for each denomination, a (opening, expected, counted, difference) tuple; counted and difference
+        are None when no count is given
+        """
+        reconciliation: dict = {}
+        for member in MoneyManipulator:
+            expected: int = self.__counts[member]
+            counted_count: int = None if counted is None else counted.get(member, 0)
+            difference: int = None if counted is None else counted_count - expected
+            reconciliation[member] = (self.__opening_counts[member], expected, counted_count, difference)
+        return reconciliation
+
+    def print_reconciliation(self, counted: dict = None, console: Console = TERMINAL_CONSOLE):
+        to_dollars = MoneyManipulator.convert_cents_to_dollar_str
+        opening_cents: int = sum(member.value * count for member, count in self.__opening_counts.items())
+        console.print(f"Cash Drawer Reconciliation:")
+        console.print(f"\tOpening balance: {to_dollars(opening_cents)}")
+        console.print(f"\tTaken in:        {to_dollars(self.__received_cents)}")
+        console.print(f"\tChange given:    {to_dollars(self.__dispensed_cents)}")
+        console.print(f"\tExpected:        {to_dollars(self.get_balance_cents())}")
+        longest_name: int = max(len(member.name) for member in MoneyManipulator)
+        over_short_cents: int = 0
+        for member, (opening, expected, counted_count, difference) in self.reconcile(counted=counted).items():
+            line: str = f"\t\t{member.name.capitalize():>{longest_name}}: {opening:>5} -> {expected:>5}"
+            if counted_count is not None:
+                line += f", counted {counted_count:>5}"
+                if difference != 0:
+                    line += f" ({'over' if difference > 0 else 'short'} {abs(difference)})"
+                over_short_cents += difference * member.value
+            console.print(line)
+        if counted is not None:
+            status: str = "balanced" if over_short_cents == 0 else \
+                f"{'over' if over_short_cents > 0 else 'short'} by {to_dollars(abs(over_short_cents))}"
+            console.print(f"\tDrawer is {status}")
+
+
+def get_age_discount_rate(age: int) -> float:
+    return 0.0 if DISCOUNT_LOW_AGE <= age < DISCOUNT_HIGH_AGE else AGE_DISCOUNT
+
+
 class Passenger:
+    NO_FARE = None
 
     def __init__(self, name: str, age: int):
 
         self.__passenger_name: str = EMPTY_STR
         self.__age: int = -1
         self.__tax_rate = 0.0
+        self.__fare_cents: int = self.NO_FARE
         self.__set_data(name, age)
 
     def get_tax_rate(self) -> float:
@@ -145,6 +442,15 @@ class Passenger:
     def set_tax_rate(self, new_rate: float):
         self.__tax_rate = new_rate
 
+    def get_fare_cents(self) -> int:
+        """
+        :return: The base fare, in cents, this passenger was charged for their seat, or NO_FARE before they are booked
+        """
+        return self.__fare_cents
+
+    def set_fare_cents(self, fare_cents: int):
+        self.__fare_cents = fare_cents
+
     def get_name(self) -> str:
         return self.__passenger_name
 
@@ -174,8 +480,7 @@ class Passenger:
             raise Exception(f"Age, '{age}' is out of bounds ({MIN_AGE} to {MAX_AGE})")
 
     def get_discount_rate(self) -> float:
-        age: int = self.get_age()
-        return 0.0 if age in range(DISCOUNT_LOW_AGE, DISCOUNT_HIGH_AGE) else 0.2
+        return get_age_discount_rate(self.get_age())
 
     def __eq__(self, other) -> bool:
         return (type(self) == type(other)
@@ -236,27 +541,151 @@ class Tier(Enum):
         return self.value[1]
 
 
+class FareQuoteCache:
+    """
+    Bounded, memoizing cache of fare quotes. A quote depends only on the tier's base fare, the passenger's age band
+    (whether the age discount applies) and the tax rate, and only a handful of those combinations ever occur, so
+    each one is computed once and then served from the cache, with the least recently used quotes evicted first.
+    Base fares are part of the key, so a fare change is never served a stale quote; call invalidate when fares change
+    anyway, to release the quotes that can no longer be used.
+    """
+    DEFAULT_MAX_QUOTES: int = 1024
+    STATIC_FARE = None
+
+    def __init__(self, max_quotes: int = DEFAULT_MAX_QUOTES):
+        self.__max_quotes: int = max_quotes
+        self.__quote = lru_cache(maxsize=max_quotes)(self.compute_quote_cents)
+
+    @staticmethod
+    def compute_quote_cents(base_cost_cents: int, discount_rate: float, tax_rate: float) -> int:
+        return floor((base_cost_cents * (1 - discount_rate)) * (1 + tax_rate))
+
+    def quote_cents(self, tier: Tier, age: int, tax_rate: float, fare_cents: int = STATIC_FARE) -> int:
+        """
+        :param fare_cents: The tier's base fare in cents, if not its static fare (see FareLadder)
+        :return: the price in cents of a seat in the tier, for a passenger of the given age and tax rate
+        """
+        fare_cents = tier.get_tier_base_cost_cents() if fare_cents is self.STATIC_FARE else fare_cents
+        return self.__quote(fare_cents, get_age_discount_rate(age), tax_rate)
+
+    def quote_change_cents(self, from_tier: Tier, to_tier: Tier, passenger: Passenger,
+                           from_fare_cents: int = STATIC_FARE, to_fare_cents: int = STATIC_FARE) -> int:
+        """
+        :return: the additional cost in cents of moving the passenger from a seat in one tier to a seat in another;
+        never negative, since no refunds are given for moving to a cheaper seat
+        """
+        if from_tier is to_tier and from_fare_cents == to_fare_cents:
+            return 0
+        age: int = passenger.get_age()
+        tax_rate: float = passenger.get_tax_rate()
+        return max(0, self.quote_cents(tier=to_tier, age=age, tax_rate=tax_rate, fare_cents=to_fare_cents)
+                   - self.quote_cents(tier=from_tier, age=age, tax_rate=tax_rate, fare_cents=from_fare_cents))
+
+    def invalidate(self):
+        """
+        Drops every cached quote; the hook to call when fares change
+        """
+        self.__quote.cache_clear()
+
+    def get_stats(self) -> dict:
+        """
+        :return: the cache's hits, misses, current size and maximum size
+        """
+        info = self.__quote.cache_info()
+        return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max_quotes": self.__max_quotes}
+
+
+FARE_QUOTES: FareQuoteCache = FareQuoteCache()
+
+
+class FareLadder:
+    """
+    Yield-management fares: each tier's base fare steps up as its cabin fills. A ladder lists, for every tier,
+    (load factor, fare in cents) steps in increasing load-factor order, the first at a load factor of 0; a cabin's
+    fare is that of the last step its load factor has reached. Fine-grained ladders approximate a fare curve.
+    The load factor is the share of the tier's seats already booked, not counting the seat being priced.
+    """
+
+    def __init__(self, steps: dict):
+        """
+        :param steps: Tier -> list of (load factor, fare in cents) steps; tiers left out keep their static fare
+        """
+        self.__thresholds: dict = {}
+        self.__fares: dict = {}
+        for tier in Tier:
+            tier_steps: list = list(steps.get(tier, [(0.0, tier.get_tier_base_cost_cents())]))
+            thresholds: list = [float(load_factor) for load_factor, fare_cents in tier_steps]
+            fares: list = [int(fare_cents) for load_factor, fare_cents in tier_steps]
+            if len(thresholds) == 0 or thresholds[0] != 0.0 or thresholds != sorted(set(thresholds)):
+                raise Exception(f"The {tier.get_tier_name()} fare ladder must start at a load factor of 0 "
+                                f"and go up in distinct steps")
+            if any(fare_cents < 0 for fare_cents in fares):
+                raise Exception(f"The {tier.get_tier_name()} fare ladder has a negative fare")
+            self.__thresholds[tier] = thresholds
+            self.__fares[tier] = fares
+
+    @classmethod
+    def from_multipliers(cls, multipliers: list) -> 'FareLadder':
+        """
+        :param multipliers: (load factor, multiplier) steps applied to every tier's static fare
+        """
+        return cls({tier: [(load_factor, round(tier.get_tier_base_cost_cents() * multiplier))
+                           for load_factor, multiplier in multipliers] for tier in Tier})
+
+    def get_steps(self, tier: Tier) -> list:
+        return list(zip(self.__thresholds[tier], self.__fares[tier]))
+
+    def get_fare_cents(self, tier: Tier, load_factor: float) -> int:
+        return self.__fares[tier][bisect_right(self.__thresholds[tier], load_factor) - 1]
+
+
 class Seat:
     NO_PASSENGER = None
+    NO_OWNER = None
 
     def __init__(self, seat_letter: str, row_number: int, tier: Tier):
         self.__seat_letter: str = seat_letter
         self.__row_number: int = row_number
         self.__tier: Tier = tier
         self.__passenger = self.NO_PASSENGER
+        self.__owner = self.NO_OWNER
 
     def is_taken(self) -> bool:
         return self.__passenger is not self.NO_PASSENGER
 
+    def get_owner(self) -> 'SeatingStructure':
+        return self.__owner
+
+    def set_owner(self, owner: 'SeatingStructure'):
+        self.__owner = owner
+
+    def __notify_owner(self, was_taken: bool):
+        if self.__owner is not self.NO_OWNER:
+            self.__owner.on_seat_changed(seat=self, was_taken=was_taken)
+
+    def __lock_row(self):
+        if self.__owner is self.NO_OWNER:
+            return nullcontext()
+        return self.__owner.lock_rows([self])
+
     def assign_passenger(self, passenger: Passenger):
-        old_passenger: Passenger = self.get_passenger()
-        if old_passenger == self.NO_PASSENGER:
-            self.__passenger = passenger
-        else:
-            self.__raise_seat_taken_exception()
+        with self.__lock_row():
+            old_passenger: Passenger = self.get_passenger()
+            if old_passenger == self.NO_PASSENGER and self.__owner is not self.NO_OWNER:
+                # another copy of this seat may have been booked through the owner since this one was handed out
+                old_passenger = self.__owner.get_seat(tier=self.get_tier(),
+                                                      row_number=self.get_row_number(),
+                                                      seat_letter=self.get_seat_letter()).get_passenger()
+            if old_passenger == self.NO_PASSENGER:
+                if self.__owner is not self.NO_OWNER:
+                    self.__owner.validate_not_held(self)
+                self.__passenger = passenger
+                self.__notify_owner(was_taken=False)
+            else:
+                self.__raise_seat_taken_exception(old_passenger)
 
-    def __raise_seat_taken_exception(self):
-        name = self.__passenger.get_name()
+    def __raise_seat_taken_exception(self, passenger: Passenger):
+        name = passenger.get_name()
         tier_name = self.get_tier().get_tier_name()
         row_number = self.get_row_number()
         seat_letter = self.get_seat_letter()
@@ -264,7 +693,10 @@ class Seat:
         raise Exception(msg)
 
     def remove_passenger(self):
-        self.__passenger = self.NO_PASSENGER
+        with self.__lock_row():
+            was_taken: bool = self.is_taken()
+            self.__passenger = self.NO_PASSENGER
+            self.__notify_owner(was_taken=was_taken)
 
     def get_row_number(self) -> int:
         return self.__row_number
@@ -278,26 +710,44 @@ class Seat:
     def get_price_dollars(self) -> float:
         return self.get_price_cents() / 100
 
-    def get_price_cents(self, passenger=NO_PASSENGER) -> int:
+    def get_fare_cents(self, model: 'SeatingStructure' = NO_OWNER) -> int:
+        """
+        :param model: The seating structure whose fares apply, if the seat does not belong to one
+        :return: the base fare in cents of the seat, before discounts and taxes; a booked seat keeps the fare its
+        passenger was charged, while an open seat is static unless the seating structure has a fare ladder
+        """
+        if self.is_taken() and self.get_passenger().get_fare_cents() is not Passenger.NO_FARE:
+            return self.get_passenger().get_fare_cents()
+        model = self.__owner if model is self.NO_OWNER else model
+        if model is self.NO_OWNER:
+            return self.get_tier().get_tier_base_cost_cents()
+        return model.get_fare_cents(tier=self.get_tier(), seat_booked_here=self.__owner is model and self.is_taken())
+
+    def get_price_cents(self, passenger=NO_PASSENGER, model: 'SeatingStructure' = NO_OWNER) -> int:
+        """
+        :param model: The seating structure whose fares apply, if the seat does not belong to one
+        """
         passenger: Passenger = self.get_passenger() if (passenger is self.NO_PASSENGER) else passenger
         self.__validate_passenger_existance(passenger)
-        # validated_passenger: Passenger = passenger
-        tier_price: int = self.get_tier().get_tier_base_cost_cents()
-        discount_rate: float = passenger.get_discount_rate()
-        tax_rate: float = passenger.get_tax_rate()
-        passenger.set_tax_rate(tax_rate)
-        total_price: int = floor((tier_price * (1 - discount_rate)) * (1 + tax_rate))
-        return total_price
+        return FARE_QUOTES.quote_cents(tier=self.get_tier(), age=passenger.get_age(), tax_rate=passenger.get_tax_rate(),
+                                       fare_cents=self.get_fare_cents(model))
 
     def __validate_passenger_existance(self, passenger):
-        if passenger == self.NO_PASSENGER:
+        if passenger is self.NO_PASSENGER:
             raise Exception("No Passenger supplied or found for price comparison")
 
-    def compare_cost_cents(self, to_seat: 'Seat') -> int:
+    def compare_cost_cents(self, to_seat: 'Seat', model: 'SeatingStructure' = NO_OWNER) -> int:
+        """
+        :param model: The seating structure whose fares apply, if this seat does not belong to one
+        """
         self.__validate_seat_move_possible(to_seat)
-        to_seat = to_seat.copy()
-        to_seat_cost: int = to_seat.get_price_cents(self.get_passenger())
-        return max(0, to_seat_cost - self.get_price_cents())
+        from_fare_cents: int = self.get_fare_cents(model)
+        model = self.__owner if model is self.NO_OWNER else model
+        # a move within a cabin leaves its load unchanged, so both seats are on the same step of the ladder
+        to_fare_cents: int = from_fare_cents if to_seat.get_tier() is self.get_tier() else to_seat.get_fare_cents(model)
+        return FARE_QUOTES.quote_change_cents(from_tier=self.get_tier(), to_tier=to_seat.get_tier(),
+                                              passenger=self.get_passenger(),
+                                              from_fare_cents=from_fare_cents, to_fare_cents=to_fare_cents)
 
     def __validate_seat_move_possible(self, to_seat: 'Seat'):
         if to_seat.is_taken():
@@ -338,70 +788,78 @@ class Seat:
         return f"'{self.get_tier().get_tier_name()}'-{self.get_row_number()}-{self.get_seat_letter()}"
 
 
-def make_dict_keys_str(items: dict):
-    return f"({', '.join(map(str, items.keys()))})"
+class FarePricer:
+    """
+    Prices many seats in one call, using the same formula as Seat.get_price_cents:
+    floor((tier_price * (1 - discount)) * (1 + tax)).
+    The arithmetic is vectorized with NumPy when it is installed, and falls back to a plain loop otherwise;
+    both evaluate the formula in the same order on IEEE doubles, so results are identical.
+    """
 
+    @classmethod
+    def price_cents_batch(cls, tiers: list, ages: list, tax_rates: list, fares: list = None) -> list:
+        """
+        :param tiers: The Tier of each seat being priced
+        :param ages: The age of the passenger for each seat
+        :param tax_rates: The tax rate for each seat, in decimal form
+        :param fares: The base fare in cents of each seat, if not its tier's static fare
+        :return: the price in cents of each seat, in input order
+        """
+        if not len(tiers) == len(ages) == len(tax_rates):
+            raise Exception(f"Cannot price {len(tiers)} tiers, {len(ages)} ages "
+                            f"and {len(tax_rates)} tax rates together")
+        if fares is None:
+            base_cost_by_tier: dict = {tier: tier.get_tier_base_cost_cents() for tier in Tier}
+            base_costs: list = list(map(base_cost_by_tier.__getitem__, tiers))
+        elif len(fares) != len(tiers):
+            raise Exception(f"Cannot price {len(tiers)} tiers with {len(fares)} fares")
+        else:
+            base_costs: list = fares
+        if numpy is None:
+            return [floor((base_cost * (1 - get_age_discount_rate(age))) * (1 + tax_rate))
+                    for base_cost, age, tax_rate in zip(base_costs, ages, tax_rates)]
+        age_array = numpy.asarray(ages)
+        full_fare = (age_array >= DISCOUNT_LOW_AGE) & (age_array < DISCOUNT_HIGH_AGE)
+        discounts = numpy.where(full_fare, 0.0, AGE_DISCOUNT)
+        prices = numpy.floor((numpy.asarray(base_costs, dtype=numpy.float64) * (1 - discounts))
+                             * (1 + numpy.asarray(tax_rates, dtype=numpy.float64)))
+        return prices.astype(numpy.int64).tolist()
 
-class SeatingStructure:
-    UNINITIALIZED_INT = -1
-    UNICODE_BASE: int = 65
-    OPEN_SEAT_NAME: str = "OPEN"
-    PRINT_HEADER_TEXT: str = "SEATING ASSIGNMENTS"
-    INNER_CELL_WIDTH: int = MAX_NAME_DISPLAY_LEN + 2
-    OUTER_CELL_WIDTH: int = INNER_CELL_WIDTH + 2 * len(CELL_SEPARATOR)
-
-    def __init__(self, fc_rows, fc_seats, coach_rows, coach_seats):
-        self.TOP_HEADER_TEXT: str = "SEATING DISPLAY"
-        self.__structure: dict = {}
-        self.__seating_options: dict = {}
-        self.__row_options: dict = {}
-        self.__header_width: int = coach_seats * self.OUTER_CELL_WIDTH
-        self.__subheader_width: int = fc_seats * self.OUTER_CELL_WIDTH
-        self.__side_marker_len: int = len(str(coach_rows)) + 1
-        self.__title_bar_header: str = EMPTY_STR
-        self.__tier_headers: dict = {}
-        self.__seat_headers: dict = {}
-
-        self.__populate_row_options(tier=Tier.coach, num_rows=coach_rows, num_seats=coach_seats)
-        self.__populate_row_options(tier=Tier.first_class, num_rows=fc_rows, num_seats=fc_seats)
+    @classmethod
+    def price_booked_seats(cls, model: 'SeatingStructure') -> dict:
+        """
+        :return: the price in cents of every booked seat in the model, keyed by (tier, row-number, seat-letter)
+        """
+        keys: list = []
+        tiers: list = []
+        ages: list = []
+        tax_rates: list = []
+        fares: list = []
         for tier in Tier:
-            self.__populate_section(tier)
+            for row_number in model.get_occupied_rows(tier=tier):
+                for seat_letter, seat in model.get_occupied_seats(tier=tier, row_number=row_number).items():
+                    passenger: Passenger = seat.get_passenger()
+                    keys.append((tier, row_number, seat_letter))
+                    tiers.append(tier)
+                    ages.append(passenger.get_age())
+                    tax_rates.append(passenger.get_tax_rate())
+                    fares.append(seat.get_fare_cents(model))
+        return dict(zip(keys, cls.price_cents_batch(tiers=tiers, ages=ages, tax_rates=tax_rates, fares=fares)))
 
-    def __populate_row_options(self, tier: Tier, num_rows: int, num_seats: int):
-        self.__row_options[tier] = list(range(1, num_rows + 1))
-        self.__seating_options[tier] = list(map(chr, range(self.UNICODE_BASE, self.UNICODE_BASE + num_seats)))
 
-    def set_seat(self, new_seat: Seat):
-        self.__validate_seat_existence(new_seat)
-        tier: Tier = new_seat.get_tier()
-        row_number: int = new_seat.get_row_number()
-        seat_letter: str = new_seat.get_seat_letter()
-        self.__get_structure()[tier][row_number][seat_letter] = new_seat
+def make_dict_keys_str(items: dict):
+    return f"({', '.join(map(str, items.keys()))})"
 
-    def __validate_seat_existence(self, new_seat):
-        errs = EMPTY_STR
-        tier: Tier = new_seat.get_tier()
-        row_number = new_seat.get_row_number()
-        seat_letter = new_seat.get_seat_letter()
-        if row_number not in self.get_row_options(tier):
-            range_first = self.get_row_options(tier)[0]
-            range_last = self.get_row_options(tier)[-1]
-            errs += f"Row number '{row_number}'-{tier.get_tier_name()} does not exist on this flight.{linesep}"
-            errs += f"Rows in {tier.get_tier_name()} range from {range_first} to {range_last}.{linesep}"
-        if seat_letter not in self.get_seat_options(tier):
-            range_first = self.get_seat_options(tier)[0]
-            range_last = self.get_seat_options(tier)[-1]
-            errs += f"Seat letter '{seat_letter}'-({tier.get_tier_name()}) does not exist on this flight.{linesep}"
-            errs += f"Seats in {tier.get_tier_name()} range from {range_first} to {range_last}.{linesep}"
-        if errs != EMPTY_STR:
-            errs = errs.rstrip(errs[-1])  # strip off linesep
-            raise Exception(errs)
 
-    def get_seat(self, tier: Tier, row_number: int, seat_letter: str) -> Seat:
-        return self.__get_structure()[tier][row_number][seat_letter]
+class SeatStorage(metaclass=ABCMeta):
 
-    def generate_chart(self) -> str:
-        return self.__generate_printout()
+    def __init__(self, owner: 'SeatingStructure', row_options: dict, seat_options: dict):
+        self.__owner: SeatingStructure = owner
+        self.__row_options: dict = row_options
+        self.__seating_options: dict = seat_options
+
+    def get_owner(self) -> 'SeatingStructure':
+        return self.__owner
 
     def get_row_options(self, tier: Tier) -> list:
         return self.__row_options[tier]
@@ -409,75 +867,91 @@ class SeatingStructure:
     def get_seat_options(self, tier: Tier) -> list:
         return self.__seating_options[tier]
 
-    def __generate_printout(self) -> str:
-        builder: StringIO = StringIO()
-        builder.write(f"{self.__generate_top_bar_header()}{linesep}")
-        for tier in Tier:
-            builder.write(f"{self.__generate_tier_display(tier=tier)}{linesep}")
-        builder.write(self.__generate_bottom_line())
-        return builder.getvalue()
+    def flush(self):
+        pass
 
-    def __generate_top_bar_header(self) -> str:
-        return self.__generate_bar_header(width=self.__header_width,
-                                          text=self.TOP_HEADER_TEXT,
-                                          front_buffer_width=self.__side_marker_len)
+    def close(self):
+        pass
 
-    @classmethod
-    def __generate_bar_header(cls,
-                              width: int,
-                              text: str = EMPTY_STR,
-                              rear_buffer_width: int = 0,
-                              front_buffer_width: int = 0) -> str:
-        if text != EMPTY_STR:
-            text = f"{SPACE}{text}{SPACE}"
-        if len(text) > width:
-            raise Exception(f"Cannot fit the text '{text}' within a header of length {width}")
-        side_width: float = (width - len(text)) / 2
-        first_bar_width: int = floor(side_width)
-        last_bar_width: int = ceil(side_width)
-        first_bar: str = first_bar_width * BAR_CHAR
-        last_bar: str = last_bar_width * BAR_CHAR
-        return f"{SPACE * front_buffer_width}{first_bar}{text}{last_bar}{SPACE * rear_buffer_width}"
+    @abstractmethod
+    def get_seat(self, tier: Tier, row_number: int, seat_letter: str) -> Seat:
+        """
+        :return: the seat stored at the given position, owned by this storage's seating structure
+        """
+
+    @abstractmethod
+    def set_seat(self, new_seat: Seat):
+        """
+        :param new_seat: The seat to store; its tier, row-number and seat-letter determine its position
+        """
 
-    def __generate_tier_header(self, tier: Tier) -> str:
-        width: int = len(self.get_seat_options(tier)) * OUTER_CELL_WIDTH
-        return self.__generate_bar_header(width=width, text=tier.get_tier_name().upper())
+    @abstractmethod
+    def get_row(self, tier: Tier, row_number: int) -> Mapping:
+        """
+        :return: the seats of a single row, keyed by seat-letter
+        """
 
-    def __get_structure(self) -> dict:
-        return self.__structure
+    @abstractmethod
+    def is_seat_booked(self, tier: Tier, row_number: int, seat_letter: str) -> bool:
+        pass
 
-    def __generate_tier_display(self, tier: Tier) -> str:
-        builder: StringIO = StringIO()
+    @abstractmethod
+    def get_occupied_seats(self, tier: Tier, row_number: int) -> dict:
+        pass
 
-        builder.write(f"{self.__generate_row_marker()}{self.__generate_tier_header(tier)}{linesep}")
-        row_options: list = self.get_row_options(tier=tier)
-        seat_options: list = self.get_seat_options(tier=tier)
-        builder.write(f"{self.__generate_seat_headers(options=self.get_seat_options(tier=tier))}{linesep}")
-        for row_number in row_options:
-            builder.write(self.__generate_row_marker(row_number))
-            for seat_letter in seat_options:
-                seat: Seat = self.get_seat(tier=tier,
-                                           row_number=row_number,
-                                           seat_letter=seat_letter)
-                builder.write(seat.generate_seat_display())
-            if row_number != row_options[-1]:
-                builder.write(linesep)
-        return builder.getvalue()
+    @abstractmethod
+    def get_available_seats(self, tier: Tier, row_number: int) -> dict:
+        pass
 
-    def __generate_row_marker(self, row_number: int = UNSET_INT) -> str:
-        marker_len: int = self.__side_marker_len
-        number_len: int = len(str(row_number))
-        diff: int = marker_len if row_number == UNSET_INT else marker_len - number_len
-        if diff < 0:
-            raise Exception(f"Row-marker '{row_number}' does not fit into a {marker_len}-character string")
-        if row_number == UNSET_INT:
-            return SPACE * marker_len
-        else:
-            return f"{SPACE * (diff - 1)}{row_number} "
+    @abstractmethod
+    def get_occupied_rows(self, tier: Tier) -> dict:
+        pass
+
+    @abstractmethod
+    def get_available_rows(self, tier: Tier) -> dict:
+        pass
+
+    @abstractmethod
+    def get_full_rows(self, tier: Tier) -> dict:
+        pass
+
+    @abstractmethod
+    def get_empty_rows(self, tier: Tier) -> dict:
+        pass
+
+    @abstractmethod
+    def is_tier_full(self, tier: Tier) -> bool:
+        pass
+
+    @abstractmethod
+    def is_tier_empty(self, tier: Tier) -> bool:
+        pass
+
+    @abstractmethod
+    def count_booked_seats(self, tier: Tier) -> int:
+        pass
+
+    def get_occupied_letters(self, tier: Tier) -> dict:
+        """
+        :return: the letters of the booked seats of every row with any, keyed by row number
+        """
+        return {row_number: set(self.get_occupied_seats(tier=tier, row_number=row_number))
+                for row_number in self.get_occupied_rows(tier=tier)}
+
+
+class ObjectSeatStorage(SeatStorage):
+    """
+    Stores every seat as a full Seat object inside a tier -> row -> letter dictionary
+    """
+
+    def __init__(self, owner: 'SeatingStructure', row_options: dict, seat_options: dict):
+        super().__init__(owner=owner, row_options=row_options, seat_options=seat_options)
+        self.__structure: dict = {}
+        for tier in Tier:
+            self.__populate_section(tier)
 
-    def __generate_bottom_line(self) -> str:
-        return self.__generate_bar_header(width=self.__header_width,
-                                          front_buffer_width=self.__side_marker_len)
+    def __get_structure(self) -> dict:
+        return self.__structure
 
     def __populate_section(self, tier: Tier):
         structure: dict = self.__get_structure()
@@ -488,33 +962,20 @@ class SeatingStructure:
             structure[tier][row_number] = new_row
             for seat_letter in self.get_seat_options(tier):
                 seat: Seat = Seat(row_number=row_number, seat_letter=seat_letter, tier=tier)
+                seat.set_owner(self.get_owner())
                 new_row[seat_letter] = seat
 
-    def __generate_seat_headers(self, options: list) -> str:
-        builder: StringIO = StringIO()
-        builder.write(self.__generate_row_marker())
-
-        for item in options:
-            builder.write(CELL_SEPARATOR)
-            builder.write(self.__generate_bar_header(width=INNER_CELL_WIDTH, text=item))
-            builder.write(CELL_SEPARATOR)
-        return builder.getvalue()
-
-    def print_occupied_seats(self, tier: Tier, row_number: int):
-        print(f"\tOccupied Seats for {tier.get_tier_name()}: "
-              f"row-{row_number}: {make_dict_keys_str(self.get_occupied_seats(tier=tier, row_number=row_number))}")
-
-    def print_available_seats(self, tier: Tier, row_number: int):
-        print(f"\tAvailable Seats for {tier.get_tier_name()}: row-{row_number}: "
-              f"{make_dict_keys_str(self.get_available_seats(tier=tier, row_number=row_number))}")
+    def get_seat(self, tier: Tier, row_number: int, seat_letter: str) -> Seat:
+        return self.__get_structure()[tier][row_number][seat_letter]
 
-    def print_occupied_rows(self, tier: Tier):
-        print(f"\tOccupied Rows for {tier.get_tier_name()}: "
-              f"{make_dict_keys_str(items=self.get_occupied_rows(tier=tier))}")
+    def set_seat(self, new_seat: Seat):
+        tier: Tier = new_seat.get_tier()
+        row_number: int = new_seat.get_row_number()
+        seat_letter: str = new_seat.get_seat_letter()
+        self.__get_structure()[tier][row_number][seat_letter] = new_seat
 
-    def print_available_rows(self, tier: Tier):
-        print(f"\tAvailable Rows for {tier.get_tier_name()}: "
-              f"{make_dict_keys_str(self.get_available_rows(tier=tier))}")
+    def get_row(self, tier: Tier, row_number: int) -> dict:
+        return self.__get_structure()[tier][row_number]
 
     def is_seat_booked(self, tier: Tier, row_number: int, seat_letter: str) -> bool:
         return self.__get_structure()[tier][row_number][seat_letter].is_taken()
@@ -607,68 +1068,3164 @@ class SeatingStructure:
                 rtn_dict[row_key] = rows[row_key]
         return rtn_dict
 
-    def is_full(self):
-        full: bool = True
-        for tier in Tier:
-            if len(self.get_available_rows(tier=tier)) > 0:
-                full = False
-                break
-        return full
+    def is_tier_full(self, tier: Tier) -> bool:
+        return len(self.get_available_rows(tier=tier)) == 0
 
-    def is_empty(self):
-        empty: bool = True
-        for tier in Tier:
-            if len(self.get_occupied_rows(tier=tier)) > 0:
-                empty = False
-                break
-        return empty
+    def is_tier_empty(self, tier: Tier) -> bool:
+        return len(self.get_occupied_rows(tier=tier)) == 0
 
+    def count_booked_seats(self, tier: Tier) -> int:
+        count: int = 0
+        for row in self.__get_structure()[tier].values():
+            for seat in row.values():
+                if seat.is_taken():
+                    count += 1
+        return count
 
-class Controller(metaclass=ABCMeta):
 
-    @abstractmethod
-    def do(self, model: SeatingStructure) -> 'Controller':
+class SeatRowView(Mapping):
+    """
+    Read-only view of a single row of a SeatStorage, keyed by seat-letter.
+    Seats are only looked up when they are accessed.
+    """
+
+    def __init__(self, storage: SeatStorage, tier: Tier, row_number: int):
+        self.__storage: SeatStorage = storage
+        self.__tier: Tier = tier
+        self.__row_number: int = row_number
+
+    def __getitem__(self, seat_letter: str) -> Seat:
+        return self.__storage.get_seat(tier=self.__tier, row_number=self.__row_number, seat_letter=seat_letter)
+
+    def __iter__(self):
+        return iter(self.__storage.get_seat_options(self.__tier))
+
+    def __len__(self) -> int:
+        return len(self.__storage.get_seat_options(self.__tier))
+
+
+class BitmapSeatStorage(SeatStorage):
+    """
+    Stores occupancy for each tier as a packed bit array held in a single int; one bit per seat, with each row
+    occupying a fixed-width slice of (seats-per-row) bits. Only booked seats are kept as Seat objects; open seats
+    are created on request. Row queries are answered with word-level bit operations over the whole tier.
+    """
+    NO_SEATS: int = 0
+
+    def __init__(self, owner: 'SeatingStructure', row_options: dict, seat_options: dict):
+        super().__init__(owner=owner, row_options=row_options, seat_options=seat_options)
+        self.__occupancy: dict = {}
+        self.__booked_seats: dict = {}
+        self.__row_indexes: dict = {}
+        self.__seat_indexes: dict = {}
+        self.__row_masks: dict = {}
+        self.__row_start_masks: dict = {}
+        self.__full_masks: dict = {}
+        for tier in Tier:
+            self.__populate_section(tier)
+
+    def __populate_section(self, tier: Tier):
+        row_options: list = self.get_row_options(tier)
+        seat_options: list = self.get_seat_options(tier)
+        width: int = len(seat_options)
+        row_mask: int = (1 << width) - 1
+        row_start_mask: int = 0
+        for row_index in range(len(row_options)):
+            row_start_mask |= 1 << (row_index * width)
+        self.__occupancy[tier] = self.NO_SEATS
+        self.__booked_seats[tier] = {}
+        self.__row_indexes[tier] = {row_number: index for index, row_number in enumerate(row_options)}
+        self.__seat_indexes[tier] = {seat_letter: index for index, seat_letter in enumerate(seat_options)}
+        self.__row_masks[tier] = row_mask
+        self.__row_start_masks[tier] = row_start_mask
+        # every row-slice filled: the row-start bits each multiplied out to a full row
+        self.__full_masks[tier] = row_start_mask * row_mask
+
+    def __get_bit_index(self, tier: Tier, row_number: int, seat_letter: str) -> int:
+        width: int = len(self.get_seat_options(tier))
+        return self.__row_indexes[tier][row_number] * width + self.__seat_indexes[tier][seat_letter]
+
+    def __get_row_bits(self, tier: Tier, row_number: int) -> int:
+        width: int = len(self.get_seat_options(tier))
+        offset: int = self.__row_indexes[tier][row_number] * width
+        return (self.__occupancy[tier] >> offset) & self.__row_masks[tier]
+
+    def __fold_rows(self, tier: Tier, match_all: bool) -> int:
         """
-        :param model: The model to use for this controller
-        :return: the next controller that needs to be used, or None if the program is to quit
+        :param match_all: True to AND the bits of each row together, False to OR them
+        :return: a mask with only the first bit of each row-slice possibly set, holding that row's folded result
         """
+        occupancy: int = self.__occupancy[tier]
+        folded: int = occupancy
+        for shift in range(1, len(self.get_seat_options(tier))):
+            if match_all:
+                folded &= occupancy >> shift
+            else:
+                folded |= occupancy >> shift
+        return folded & self.__row_start_masks[tier]
 
+    def __get_rows_from_mask(self, tier: Tier, row_start_bits: int) -> dict:
+        width: int = len(self.get_seat_options(tier))
+        row_options: list = self.get_row_options(tier)
+        rtn_dict: dict = {}
+        if width == 0:
+            return rtn_dict
+        bits: str = bin(row_start_bits)[:1:-1]
+        for row_index, flag in enumerate(bits[::width]):
+            if flag == '1':
+                row_number: int = row_options[row_index]
+                rtn_dict[row_number] = self.get_row(tier=tier, row_number=row_number)
+        return rtn_dict
 
-class QuitController(Controller):
+    def __get_seats_from_row_bits(self, tier: Tier, row_number: int, row_bits: int) -> dict:
+        rtn_dict: dict = {}
+        for index, seat_letter in enumerate(self.get_seat_options(tier)):
+            if (row_bits >> index) & 1:
+                rtn_dict[seat_letter] = self.get_seat(tier=tier, row_number=row_number, seat_letter=seat_letter)
+        return rtn_dict
 
-    def do(self, model: SeatingStructure):
-        return None
+    def get_seat(self, tier: Tier, row_number: int, seat_letter: str) -> Seat:
+        index: int = self.__get_bit_index(tier=tier, row_number=row_number, seat_letter=seat_letter)
+        seat: Seat = self.__booked_seats[tier].get(index)
+        if seat is None:
+            seat = Seat(row_number=row_number, seat_letter=seat_letter, tier=tier)
+            seat.set_owner(self.get_owner())
+        return seat
 
+    def set_seat(self, new_seat: Seat):
+        tier: Tier = new_seat.get_tier()
+        index: int = self.__get_bit_index(tier=tier,
+                                          row_number=new_seat.get_row_number(),
+                                          seat_letter=new_seat.get_seat_letter())
+        if new_seat.is_taken():
+            self.__occupancy[tier] |= 1 << index
+            self.__booked_seats[tier][index] = new_seat
+        else:
+            self.__occupancy[tier] &= ~(1 << index)
+            self.__booked_seats[tier].pop(index, None)
 
-def prompt_user_for_tier() -> Tier:
-    while True:
-        print(f"{linesep}\tWhat is the tier of the seat?")
-        for tier in Tier:
-            print(f"\t{tier.get_menu_display_text()}")
-        print(f"\t: ", end=EMPTY_STR)
-        text = input()
-        try:
-            check_for_quit_or_return(text)
-            tier = Tier.get_tier(text)
-            print(f"You chose '{tier.get_tier_name()}'{linesep}")
-            return tier
-        except QuitApplication:
-            raise QuitApplication
-        except ReturnToMainMenu:
-            raise ReturnToMainMenu
-        except Exception as e:
-            print(e)
+    def get_row(self, tier: Tier, row_number: int) -> SeatRowView:
+        return SeatRowView(storage=self, tier=tier, row_number=row_number)
 
+    def is_seat_booked(self, tier: Tier, row_number: int, seat_letter: str) -> bool:
+        index: int = self.__get_bit_index(tier=tier, row_number=row_number, seat_letter=seat_letter)
+        return (self.__occupancy[tier] >> index) & 1 == 1
 
-class ReturnToMainMenu(Exception):
-    pass
+    def get_occupied_seats(self, tier: Tier, row_number: int) -> dict:
+        row_bits: int = self.__get_row_bits(tier=tier, row_number=row_number)
+        return self.__get_seats_from_row_bits(tier=tier, row_number=row_number, row_bits=row_bits)
 
+    def get_available_seats(self, tier: Tier, row_number: int) -> dict:
+        row_bits: int = ~self.__get_row_bits(tier=tier, row_number=row_number) & self.__row_masks[tier]
+        return self.__get_seats_from_row_bits(tier=tier, row_number=row_number, row_bits=row_bits)
 
-class QuitApplication(Exception):
-    pass
+    def get_occupied_rows(self, tier: Tier) -> dict:
+        return self.__get_rows_from_mask(tier=tier, row_start_bits=self.__fold_rows(tier=tier, match_all=False))
 
+    def get_available_rows(self, tier: Tier) -> dict:
+        full_rows: int = self.__fold_rows(tier=tier, match_all=True)
+        return self.__get_rows_from_mask(tier=tier, row_start_bits=self.__row_start_masks[tier] & ~full_rows)
 
-class NoMoreBookings(Exception):
+    def get_full_rows(self, tier: Tier) -> dict:
+        return self.__get_rows_from_mask(tier=tier, row_start_bits=self.__fold_rows(tier=tier, match_all=True))
+
+    def get_empty_rows(self, tier: Tier) -> dict:
+        occupied_rows: int = self.__fold_rows(tier=tier, match_all=False)
+        return self.__get_rows_from_mask(tier=tier, row_start_bits=self.__row_start_masks[tier] & ~occupied_rows)
+
+    def is_tier_full(self, tier: Tier) -> bool:
+        return self.__occupancy[tier] == self.__full_masks[tier]
+
+    def is_tier_empty(self, tier: Tier) -> bool:
+        return self.__occupancy[tier] == self.NO_SEATS
+
+    def count_booked_seats(self, tier: Tier) -> int:
+        return self.__occupancy[tier].bit_count()
+
+
+class SeatMapFile:
+    """
+    Binary seat-map file format: a fixed header describing the layout, followed by one fixed-size record per seat,
+    ordered by tier, then row, then seat-letter. Any seat can be read or updated in place at a computed offset.
+    Passenger names are stored in a MAX_NAME_DISPLAY_LEN slot, so longer names are truncated just as on the chart.
+    """
+    MAGIC: bytes = b'CSEATMAP'
+    VERSION: int = 2
+    HEADER_FORMAT: struct.Struct = struct.Struct('<8sHHHHH')
+    RECORD_FORMAT: struct.Struct = struct.Struct(f'<BHHBBdI{MAX_NAME_DISPLAY_LEN}s')
+    NO_FARE_CENTS: int = 0
+    OCCUPIED_OFFSET: int = struct.calcsize('<BHH')
+    NAME_ENCODING: str = 'utf-8'
+
+    @classmethod
+    def get_record_offset(cls, tier_start: int, seat_index: int) -> int:
+        return cls.HEADER_FORMAT.size + (tier_start + seat_index) * cls.RECORD_FORMAT.size
+
+    @classmethod
+    def create(cls, path: str, fc_rows: int, fc_seats: int, coach_rows: int, coach_seats: int):
+        """
+        Writes a seat-map file with every seat open
+        """
+        layout: AircraftLayout = AircraftLayout.from_counts(fc_rows=fc_rows, fc_seats=fc_seats,
+                                                            coach_rows=coach_rows, coach_seats=coach_seats)
+        if any(len(seat_letter) > 1 for tier in Tier for seat_letter in layout.get_seat_options(tier)):
+            raise Exception("Seat-map files only hold single-character seat letters")
+        with open(path, 'wb') as map_file:
+            map_file.write(cls.HEADER_FORMAT.pack(cls.MAGIC, cls.VERSION, fc_rows, fc_seats, coach_rows, coach_seats))
+            for seat_id in range(layout.count_seats()):
+                tier, row_number, seat_letter = layout.get_seat_location(seat_id)
+                map_file.write(cls.pack_record(tier=tier, row_number=row_number, seat_letter=seat_letter))
+
+    @classmethod
+    def save(cls, model: 'SeatingStructure', path: str):
+        """
+        Writes the layout and every booking of a seating structure to a new seat-map file
+        """
+        fc_rows, fc_seats, coach_rows, coach_seats = model.get_layout()
+        cls.create(path=path, fc_rows=fc_rows, fc_seats=fc_seats, coach_rows=coach_rows, coach_seats=coach_seats)
+        mapped: SeatingStructure = SeatingStructure.open_mapped(path=path)
+        try:
+            for tier in Tier:
+                for row_number in model.get_occupied_rows(tier=tier):
+                    for seat in model.get_occupied_seats(tier=tier, row_number=row_number).values():
+                        copy: Seat = Seat(seat_letter=seat.get_seat_letter(), row_number=row_number, tier=tier)
+                        copy.assign_passenger(seat.get_passenger())
+                        mapped.set_seat(copy)
+        finally:
+            mapped.close()
+
+    @classmethod
+    def read_layout(cls, path: str) -> tuple:
+        """
+        :return: the (fc_rows, fc_seats, coach_rows, coach_seats) layout stored in the file's header
+        """
+        with open(path, 'rb') as map_file:
+            header: bytes = map_file.read(cls.HEADER_FORMAT.size)
+        if len(header) < cls.HEADER_FORMAT.size:
+            raise Exception(f"'{path}' is too short to be a seat-map file")
+        magic, version, fc_rows, fc_seats, coach_rows, coach_seats = cls.HEADER_FORMAT.unpack(header)
+        if magic != cls.MAGIC:
+            raise Exception(f"'{path}' is not a seat-map file")
+        if version != cls.VERSION:
+            raise Exception(f"Seat-map file version {version} is not supported")
+        return fc_rows, fc_seats, coach_rows, coach_seats
+
+    @classmethod
+    def pack_record(cls, tier: Tier, row_number: int, seat_letter: str, passenger: Passenger = None) -> bytes:
+        if passenger is None:
+            return cls.RECORD_FORMAT.pack(ord(tier.value[2]), row_number, ord(seat_letter), 0, 0, 0.0,
+                                          cls.NO_FARE_CENTS, b'')
+        name: bytes = passenger.get_name()[0: MAX_NAME_DISPLAY_LEN].encode(cls.NAME_ENCODING)
+        fare_cents: int = passenger.get_fare_cents()
+        return cls.RECORD_FORMAT.pack(ord(tier.value[2]), row_number, ord(seat_letter), 1,
+                                      passenger.get_age(), passenger.get_tax_rate(),
+                                      cls.NO_FARE_CENTS if fare_cents is Passenger.NO_FARE else fare_cents,
+                                      name[0: MAX_NAME_DISPLAY_LEN])
+
+
+class SeatMapExport:
+    """
+    Machine-readable exports of a seat map for downstream systems, in two encodings of the same content: the layout
+    (aircraft type, and the four counts of a plain grid layout) and every booking's seat, passenger name, age,
+    tax rate, the base fare in cents the passenger was charged, and price in cents.
+
+    Binary: a fixed header holding the export's total size and the aircraft type, then an occupancy bitmap with one
+    bit per seat id (see AircraftLayout.get_seat_id), then the bookings in seat-id order stored column by column:
+    ages, tax rates, fares, prices, and finally the names, NUL-separated. Each column is packed and unpacked in one
+    call.
+    JSON: one object per seat map, on a single line, with a row per booking in the same order as JSON_FIELDS.
+    Either way exports can be concatenated, so many flights can be written to, and read back from, one stream;
+    each flight's export is then preceded by its flight number and date.
+    """
+    MAGIC: bytes = b'CSMX'
+    VERSION: int = 2
+    HEADER_FORMAT: struct.Struct = struct.Struct('<4sBBIHHHHII')
+    FLIGHT_FORMAT: struct.Struct = struct.Struct('<BI')
+    AGE_CODE: str = 'B'
+    TAX_RATE_CODE: str = 'd'
+    FARE_CODE: str = 'I'
+    PRICE_CODE: str = 'I'
+    NAME_SEPARATOR: str = '\0'
+    JSON_FIELDS: list = ["tier", "row", "seat", "name", "age", "tax_rate", "fare_cents", "price_cents"]
+    NAME_ENCODING: str = 'utf-8'
+    NO_COUNTS: tuple = (0, 0, 0, 0)
+
+    @staticmethod
+    def get_bookings(model: 'SeatingStructure') -> list:
+        """
+        :return: (seat id, seat) for every booked seat, in seat-id order
+        """
+        layout: AircraftLayout = model.get_aircraft_layout()
+        bookings: list = []
+        for tier in Tier:
+            first_letter: str = layout.get_seat_options(tier)[0]
+            seat_positions: dict = layout.get_seat_positions(tier)
+            for row_number in model.get_occupied_rows(tier=tier):
+                first_id: int = layout.get_seat_id(tier=tier, row_number=row_number, seat_letter=first_letter)
+                for seat_letter, seat in model.get_occupied_seats(tier=tier, row_number=row_number).items():
+                    bookings.append((first_id + seat_positions[seat_letter], seat))
+        return bookings
+
+    @staticmethod
+    def price_bookings(bookings: list) -> list:
+        """
+        :param bookings: (seat id, seat) pairs, as returned by get_bookings
+        :return: the passenger, the base fare in cents they were charged, and the price in cents, of each booking
+        """
+        passengers: list = [seat.get_passenger() for seat_id, seat in bookings]
+        fares: list = [seat.get_fare_cents() for seat_id, seat in bookings]
+        prices: list = FarePricer.price_cents_batch(tiers=[seat.get_tier() for seat_id, seat in bookings],
+                                                    ages=[passenger.get_age() for passenger in passengers],
+                                                    tax_rates=[passenger.get_tax_rate() for passenger in passengers],
+                                                    fares=fares)
+        return list(zip(passengers, fares, prices))
+
+    @classmethod
+    def get_layout(cls, aircraft_type: str, counts: tuple) -> 'AircraftLayout':
+        if tuple(counts) == cls.NO_COUNTS:
+            return AircraftLayout.get_registered(aircraft_type)
+        return AircraftLayout.from_counts(*counts)
+
+    @classmethod
+    def encode_binary(cls, model: 'SeatingStructure') -> bytes:
+        layout: AircraftLayout = model.get_aircraft_layout()
+        counts: tuple = layout.get_grid_counts()
+        counts = cls.NO_COUNTS if counts is AircraftLayout.NO_GRID else counts
+        aircraft_type: bytes = layout.get_aircraft_type().encode(cls.NAME_ENCODING)
+        bookings: list = cls.get_bookings(model)
+        priced: list = cls.price_bookings(bookings)
+        num_booked: int = len(bookings)
+        occupancy: bytearray = bytearray((layout.count_seats() + 7) // 8)
+        for seat_id, seat in bookings:
+            occupancy[seat_id >> 3] |= 1 << (seat_id & 7)
+        body: bytes = b''.join([
+            aircraft_type,
+            occupancy,
+            struct.pack(f'<{num_booked}{cls.AGE_CODE}', *[passenger.get_age() for passenger, fare, price in priced]),
+            struct.pack(f'<{num_booked}{cls.TAX_RATE_CODE}',
+                        *[passenger.get_tax_rate() for passenger, fare, price in priced]),
+            struct.pack(f'<{num_booked}{cls.FARE_CODE}', *[fare for passenger, fare, price in priced]),
+            struct.pack(f'<{num_booked}{cls.PRICE_CODE}', *[price for passenger, fare, price in priced]),
+            cls.NAME_SEPARATOR.join(passenger.get_name()
+                                    for passenger, fare, price in priced).encode(cls.NAME_ENCODING)])
+        header: bytes = cls.HEADER_FORMAT.pack(cls.MAGIC, cls.VERSION, len(aircraft_type),
+                                               cls.HEADER_FORMAT.size + len(body), *counts,
+                                               layout.count_seats(), num_booked)
+        return header + body
+
+    @classmethod
+    def decode_binary(cls, data: bytes, offset: int = 0) -> tuple:
+        """
+        :param data: A buffer holding a binary export at the given offset
+        :return: (layout, bookings, the offset just past the export), where bookings holds a
+        (tier, row number, seat letter, name, age, tax rate, fare cents, price cents) tuple per booking, in seat-id
+        order
+        """
+        if len(data) - offset < cls.HEADER_FORMAT.size:
+            raise Exception("Seat-map export is truncated")
+        magic, version, type_len, size, *counts, num_seats, num_booked = cls.HEADER_FORMAT.unpack_from(data, offset)
+        if magic != cls.MAGIC:
+            raise Exception("Data is not a seat-map export")
+        if version != cls.VERSION:
+            raise Exception(f"Seat-map export version {version} is not supported")
+        end: int = offset + size
+        if len(data) < end:
+            raise Exception("Seat-map export is truncated")
+        position: int = offset + cls.HEADER_FORMAT.size
+        aircraft_type: str = bytes(data[position: position + type_len]).decode(cls.NAME_ENCODING)
+        position += type_len
+        layout: AircraftLayout = cls.get_layout(aircraft_type=aircraft_type, counts=counts)
+        if layout.count_seats() != num_seats:
+            raise Exception(f"Seat-map export does not match the {layout.get_aircraft_type()} layout")
+        occupancy_len: int = (num_seats + 7) // 8
+        occupancy: int = int.from_bytes(data[position: position + occupancy_len], 'little')
+        position += occupancy_len
+        # the bitmap's digits, lowest seat id first
+        seat_ids: list = [seat_id for seat_id, digit in enumerate(bin(occupancy)[:1:-1]) if digit == '1']
+        columns: list = []
+        for code in (cls.AGE_CODE, cls.TAX_RATE_CODE, cls.FARE_CODE, cls.PRICE_CODE):
+            column_format: struct.Struct = struct.Struct(f'<{num_booked}{code}')
+            if position + column_format.size > end:
+                raise Exception("Seat-map export is corrupt")
+            columns.append(column_format.unpack_from(data, position))
+            position += column_format.size
+        names: list = bytes(data[position: end]).decode(cls.NAME_ENCODING).split(cls.NAME_SEPARATOR)
+        if num_booked == 0:
+            names = []
+        if not len(seat_ids) == len(names) == num_booked:
+            raise Exception("Seat-map export is corrupt")
+        bookings: list = [(*layout.get_seat_location(seat_id), name, age, tax_rate, fare_cents, price_cents)
+                          for seat_id, name, age, tax_rate, fare_cents, price_cents in zip(seat_ids, names, *columns)]
+        return layout, bookings, end
+
+    @classmethod
+    def write_json(cls, model: 'SeatingStructure', out):
+        """
+        Streams a seat map to a file-like object as one line of JSON, a row of seats at a time
+        :param out: Anything with a write(str) method
+        """
+        layout: AircraftLayout = model.get_aircraft_layout()
+        counts: tuple = layout.get_grid_counts()
+        out.write(f'{{"aircraft":{json.dumps(layout.get_aircraft_type())},'
+                  f'"counts":{json.dumps(None if counts is AircraftLayout.NO_GRID else list(counts))},'
+                  f'"fields":{json.dumps(cls.JSON_FIELDS, separators=(",", ":"))},"seats":[')
+        separator: str = EMPTY_STR
+        row_records: list = []
+        last_row: tuple = None
+        bookings: list = cls.get_bookings(model)
+        for (seat_id, seat), (passenger, fare, price) in zip(bookings, cls.price_bookings(bookings)):
+            row: tuple = (seat.get_tier(), seat.get_row_number())
+            if row != last_row and len(row_records) > 0:
+                out.write(separator)
+                out.write(json.dumps(row_records, separators=(',', ':'))[1:-1])
+                separator = ','
+                row_records = []
+            last_row = row
+            row_records.append([seat.get_tier().value[2], seat.get_row_number(), seat.get_seat_letter(),
+                                passenger.get_name(), passenger.get_age(), passenger.get_tax_rate(), fare, price])
+        if len(row_records) > 0:
+            out.write(separator)
+            out.write(json.dumps(row_records, separators=(',', ':'))[1:-1])
+        out.write(']}')
+
+    @classmethod
+    def decode_json(cls, export) -> tuple:
+        """
+        :param export: A JSON export, as text or already parsed
+        :return: (layout, bookings), with bookings as returned by decode_binary
+        """
+        if isinstance(export, (str, bytes)):
+            export = json.loads(export)
+        counts: list = export["counts"]
+        layout: AircraftLayout = cls.get_layout(aircraft_type=export["aircraft"],
+                                                counts=cls.NO_COUNTS if counts is None else counts)
+        tiers: dict = {tier.value[2]: tier for tier in Tier}
+        bookings: list = [(tiers[tier_code], row_number, seat_letter, name, age, tax_rate, fare_cents, price_cents)
+                          for tier_code, row_number, seat_letter, name, age, tax_rate, fare_cents, price_cents
+                          in export["seats"]]
+        return layout, bookings
+
+    @classmethod
+    def write_binary_flight(cls, out, flight_number: str, flight_date: date, model: 'SeatingStructure'):
+        """
+        :param out: Anything with a write(bytes) method
+        """
+        number: bytes = flight_number.encode(cls.NAME_ENCODING)
+        out.write(cls.FLIGHT_FORMAT.pack(len(number), flight_date.toordinal()))
+        out.write(number)
+        out.write(cls.encode_binary(model))
+
+    @classmethod
+    def iterate_binary_flights(cls, in_file):
+        """
+        Reads back the flights written by write_binary_flight, one at a time
+        :param in_file: Anything with a read(size) method returning bytes
+        :return: a generator of (flight number, flight date, layout, bookings)
+        """
+        while True:
+            flight_header: bytes = in_file.read(cls.FLIGHT_FORMAT.size)
+            if len(flight_header) == 0:
+                return
+            if len(flight_header) < cls.FLIGHT_FORMAT.size:
+                raise Exception("Seat-map export stream is truncated")
+            number_len, ordinal = cls.FLIGHT_FORMAT.unpack(flight_header)
+            flight_number: str = in_file.read(number_len).decode(cls.NAME_ENCODING)
+            header: bytes = in_file.read(cls.HEADER_FORMAT.size)
+            if len(header) < cls.HEADER_FORMAT.size:
+                raise Exception("Seat-map export stream is truncated")
+            size: int = cls.HEADER_FORMAT.unpack(header)[3]
+            layout, bookings, _ = cls.decode_binary(header + in_file.read(size - len(header)))
+            yield flight_number, date.fromordinal(ordinal), layout, bookings
+
+    @classmethod
+    def write_json_flight(cls, out, flight_number: str, flight_date: date, model: 'SeatingStructure'):
+        """
+        :param out: Anything with a write(str) method
+        """
+        out.write(f'{{"flight":{json.dumps(flight_number)},"date":"{flight_date.isoformat()}","seat_map":')
+        cls.write_json(model=model, out=out)
+        out.write(f'}}{linesep}')
+
+    @classmethod
+    def iterate_json_flights(cls, in_file):
+        """
+        Reads back the flights written by write_json_flight, one line at a time
+        :return: a generator of (flight number, flight date, layout, bookings)
+        """
+        for line in in_file:
+            if line.strip() == EMPTY_STR:
+                continue
+            export: dict = json.loads(line)
+            layout, bookings = cls.decode_json(export["seat_map"])
+            yield export["flight"], date.fromisoformat(export["date"]), layout, bookings
+
+
+class MappedSeatStorage(SeatStorage):
+    """
+    Reads and updates seats in place inside a memory-mapped seat-map file (see SeatMapFile).
+    Nothing is parsed up front, and several processes mapping the same file share the same pages.
+    """
+
+    def __init__(self, owner: 'SeatingStructure', row_options: dict, seat_options: dict,
+                 path: str, read_only: bool = False):
+        super().__init__(owner=owner, row_options=row_options, seat_options=seat_options)
+        self.__read_only: bool = read_only
+        self.__map_file = open(path, 'rb' if read_only else 'r+b')
+        self.__map = mmap.mmap(self.__map_file.fileno(), 0, access=mmap.ACCESS_READ if read_only else mmap.ACCESS_WRITE)
+        self.__tier_starts: dict = {}
+        self.__row_indexes: dict = {}
+        self.__seat_indexes: dict = {}
+        tier_start: int = 0
+        for tier in Tier:
+            self.__tier_starts[tier] = tier_start
+            self.__row_indexes[tier] = {row_number: index for index, row_number in enumerate(row_options[tier])}
+            self.__seat_indexes[tier] = {seat_letter: index for index, seat_letter in enumerate(seat_options[tier])}
+            tier_start += len(row_options[tier]) * len(seat_options[tier])
+        expected_size: int = SeatMapFile.get_record_offset(tier_start=tier_start, seat_index=0)
+        if len(self.__map) != expected_size:
+            self.close()
+            raise Exception(f"Seat-map file '{path}' does not match its layout ({expected_size} bytes expected)")
+
+    def close(self):
+        if not self.__map.closed:
+            self.__map.close()
+        self.__map_file.close()
+
+    def flush(self):
+        if not self.__read_only:
+            self.__map.flush()
+
+    def __get_offset(self, tier: Tier, row_number: int, seat_letter: str) -> int:
+        width: int = len(self.get_seat_options(tier))
+        seat_index: int = self.__row_indexes[tier][row_number] * width + self.__seat_indexes[tier][seat_letter]
+        return SeatMapFile.get_record_offset(tier_start=self.__tier_starts[tier], seat_index=seat_index)
+
+    def __get_tier_flags(self, tier: Tier) -> bytes:
+        start: int = SeatMapFile.get_record_offset(tier_start=self.__tier_starts[tier], seat_index=0)
+        num_seats: int = len(self.get_row_options(tier)) * len(self.get_seat_options(tier))
+        end: int = start + num_seats * SeatMapFile.RECORD_FORMAT.size
+        return self.__map[start + SeatMapFile.OCCUPIED_OFFSET: end: SeatMapFile.RECORD_FORMAT.size]
+
+    def __get_row_flags(self, tier: Tier, row_number: int) -> bytes:
+        width: int = len(self.get_seat_options(tier))
+        start: int = self.__get_offset(tier=tier, row_number=row_number, seat_letter=self.get_seat_options(tier)[0])
+        end: int = start + width * SeatMapFile.RECORD_FORMAT.size
+        return self.__map[start + SeatMapFile.OCCUPIED_OFFSET: end: SeatMapFile.RECORD_FORMAT.size]
+
+    def __get_rows_where(self, tier: Tier, row_test) -> dict:
+        width: int = len(self.get_seat_options(tier))
+        flags: bytes = self.__get_tier_flags(tier)
+        rtn_dict: dict = {}
+        for index, row_number in enumerate(self.get_row_options(tier)):
+            if row_test(flags[index * width: (index + 1) * width]):
+                rtn_dict[row_number] = self.get_row(tier=tier, row_number=row_number)
+        return rtn_dict
+
+    def __get_seats_where(self, tier: Tier, row_number: int, booked: bool) -> dict:
+        flags: bytes = self.__get_row_flags(tier=tier, row_number=row_number)
+        rtn_dict: dict = {}
+        for index, seat_letter in enumerate(self.get_seat_options(tier)):
+            if (flags[index] != 0) == booked:
+                rtn_dict[seat_letter] = self.get_seat(tier=tier, row_number=row_number, seat_letter=seat_letter)
+        return rtn_dict
+
+    def get_seat(self, tier: Tier, row_number: int, seat_letter: str) -> Seat:
+        offset: int = self.__get_offset(tier=tier, row_number=row_number, seat_letter=seat_letter)
+        _, _, _, occupied, age, tax_rate, fare_cents, name = SeatMapFile.RECORD_FORMAT.unpack_from(self.__map, offset)
+        seat: Seat = Seat(row_number=row_number, seat_letter=seat_letter, tier=tier)
+        if occupied:
+            name_str: str = name.rstrip(b'\0').decode(SeatMapFile.NAME_ENCODING, errors='ignore').strip()
+            passenger: Passenger = Passenger(name=name_str, age=age)
+            passenger.set_tax_rate(tax_rate)
+            if fare_cents != SeatMapFile.NO_FARE_CENTS:
+                passenger.set_fare_cents(fare_cents)
+            seat.assign_passenger(passenger)
+        seat.set_owner(self.get_owner())
+        return seat
+
+    def set_seat(self, new_seat: Seat):
+        if self.__read_only:
+            raise Exception("This seat-map file was opened read-only")
+        tier: Tier = new_seat.get_tier()
+        row_number: int = new_seat.get_row_number()
+        seat_letter: str = new_seat.get_seat_letter()
+        offset: int = self.__get_offset(tier=tier, row_number=row_number, seat_letter=seat_letter)
+        record: bytes = SeatMapFile.pack_record(tier=tier, row_number=row_number, seat_letter=seat_letter,
+                                                passenger=new_seat.get_passenger())
+        self.__map[offset: offset + len(record)] = record
+
+    def get_row(self, tier: Tier, row_number: int) -> SeatRowView:
+        return SeatRowView(storage=self, tier=tier, row_number=row_number)
+
+    def is_seat_booked(self, tier: Tier, row_number: int, seat_letter: str) -> bool:
+        offset: int = self.__get_offset(tier=tier, row_number=row_number, seat_letter=seat_letter)
+        return self.__map[offset + SeatMapFile.OCCUPIED_OFFSET] != 0
+
+    def get_occupied_seats(self, tier: Tier, row_number: int) -> dict:
+        return self.__get_seats_where(tier=tier, row_number=row_number, booked=True)
+
+    def get_available_seats(self, tier: Tier, row_number: int) -> dict:
+        return self.__get_seats_where(tier=tier, row_number=row_number, booked=False)
+
+    def get_occupied_rows(self, tier: Tier) -> dict:
+        return self.__get_rows_where(tier=tier, row_test=any)
+
+    def get_available_rows(self, tier: Tier) -> dict:
+        return self.__get_rows_where(tier=tier, row_test=lambda flags: not all(flags))
+
+    def get_full_rows(self, tier: Tier) -> dict:
+        return self.__get_rows_where(tier=tier, row_test=all)
+
+    def get_empty_rows(self, tier: Tier) -> dict:
+        return self.__get_rows_where(tier=tier, row_test=lambda flags: not any(flags))
+
+    def is_tier_full(self, tier: Tier) -> bool:
+        return all(self.__get_tier_flags(tier))
+
+    def is_tier_empty(self, tier: Tier) -> bool:
+        return not any(self.__get_tier_flags(tier))
+
+    def count_booked_seats(self, tier: Tier) -> int:
+        flags: bytes = self.__get_tier_flags(tier)
+        return len(flags) - flags.count(0)
+
+    def get_occupied_letters(self, tier: Tier) -> dict:
+        """
+        Reads only the occupied flags, without decoding any seat's record
+        """
+        seat_options: list = self.get_seat_options(tier)
+        width: int = len(seat_options)
+        flags: bytes = self.__get_tier_flags(tier)
+        rtn_dict: dict = {}
+        for index, row_number in enumerate(self.get_row_options(tier)):
+            row_flags: bytes = flags[index * width: (index + 1) * width]
+            if any(row_flags):
+                rtn_dict[row_number] = {seat_options[position] for position, flag in enumerate(row_flags) if flag}
+        return rtn_dict
+
+
+class SeatStorageType(Enum):
+    objects = ["Seat Objects", ObjectSeatStorage]
+    bitmap = ["Occupancy Bitmap", BitmapSeatStorage]
+    mapped = ["Memory-Mapped File", MappedSeatStorage]
+
+    def get_storage_name(self) -> str:
+        return self.value[0]
+
+    def create_storage(self, owner: 'SeatingStructure', row_options: dict, seat_options: dict,
+                       storage_options: dict = None) -> SeatStorage:
+        """
+        :param storage_options: Extra keyword arguments for the storage, such as the path of a mapped file
+        """
+        storage_options = {} if storage_options is None else storage_options
+        return self.value[1](owner=owner, row_options=row_options, seat_options=seat_options, **storage_options)
+
+
+class FreeRunIndex:
+    """
+    Tracks the runs of adjacent open seats in every row, for finding a block of seats for a group.
+    A run never crosses an aisle, since seats across an aisle are not adjacent.
+    Each row keeps a bitmask of its open seats and the length of its longest open run; per tier, a max segment tree
+    over the rows' longest runs finds the first row that fits a group in logarithmic time, and rows bucketed by
+    their longest run find the tightest fit. Both are updated one seat at a time.
+    """
+    NO_RUN = None
+
+    def __init__(self, row_options: dict, seat_options: dict, aisles: dict = None):
+        """
+        :param aisles: Each tier's aisle positions, as returned by AircraftLayout.get_aisles; none if not given
+        """
+        self.__row_widths: dict = {}
+        self.__row_options: dict = {}
+        self.__row_positions: dict = {}
+        self.__seat_positions: dict = {}
+        self.__block_masks: dict = {}
+        self.__free_masks: dict = {}
+        self.__longest_runs: dict = {}
+        self.__tree_sizes: dict = {}
+        self.__trees: dict = {}
+        self.__rows_by_run: dict = {}
+        for tier in Tier:
+            self.__populate_section(tier=tier, row_options=row_options[tier], seat_options=seat_options[tier],
+                                    aisles=frozenset() if aisles is None else aisles[tier])
+
+    def __populate_section(self, tier: Tier, row_options: list, seat_options: list, aisles: frozenset):
+        width: int = len(seat_options)
+        self.__row_widths[tier] = width
+        self.__row_options[tier] = row_options
+        self.__row_positions[tier] = {row_number: position for position, row_number in enumerate(row_options)}
+        self.__seat_positions[tier] = {seat_letter: position for position, seat_letter in enumerate(seat_options)}
+        # one mask per block of seats between aisles, so runs are found block by block
+        bounds: list = [0] + sorted(aisles) + [width]
+        self.__block_masks[tier] = [((1 << end) - 1) & ~((1 << start) - 1)
+                                    for start, end in zip(bounds, bounds[1:]) if end > start]
+        widest: int = max((end - start for start, end in zip(bounds, bounds[1:])), default=0)
+        self.__free_masks[tier] = {row_number: (1 << width) - 1 for row_number in row_options}
+        self.__longest_runs[tier] = {row_number: widest for row_number in row_options}
+        tree_size: int = 1
+        while tree_size < len(row_options):
+            tree_size *= 2
+        tree: list = [0] * (2 * tree_size)
+        for position in range(len(row_options)):
+            tree[tree_size + position] = widest
+        for node in range(tree_size - 1, 0, -1):
+            tree[node] = max(tree[2 * node], tree[2 * node + 1])
+        self.__tree_sizes[tier] = tree_size
+        self.__trees[tier] = tree
+        self.__rows_by_run[tier] = [[] for _ in range(width + 1)]
+        self.__rows_by_run[tier][widest] = list(row_options)
+
+    def record_change(self, tier: Tier, row_number: int, seat_letter: str, is_taken: bool):
+        bit: int = 1 << self.__seat_positions[tier][seat_letter]
+        free_mask: int = self.__free_masks[tier][row_number]
+        self.__set_free_mask(tier=tier, row_number=row_number,
+                             free_mask=free_mask & ~bit if is_taken else free_mask | bit)
+
+    def record_row(self, tier: Tier, row_number: int, occupied_letters: set):
+        """
+        Records every seat of a row at once
+        :param occupied_letters: The letters of the row's booked seats
+        """
+        taken_mask: int = sum(1 << self.__seat_positions[tier][seat_letter] for seat_letter in occupied_letters)
+        self.__set_free_mask(tier=tier, row_number=row_number,
+                             free_mask=((1 << self.__row_widths[tier]) - 1) & ~taken_mask)
+
+    def __set_free_mask(self, tier: Tier, row_number: int, free_mask: int):
+        self.__free_masks[tier][row_number] = free_mask
+        old_run: int = self.__longest_runs[tier][row_number]
+        new_run: int = max((length for start, length in self.__iterate_runs(tier, free_mask)), default=0)
+        if new_run == old_run:
+            return
+        self.__longest_runs[tier][row_number] = new_run
+        rows_by_run: list = self.__rows_by_run[tier]
+        del rows_by_run[old_run][bisect_left(rows_by_run[old_run], row_number)]
+        insort(rows_by_run[new_run], row_number)
+        tree: list = self.__trees[tier]
+        node: int = self.__tree_sizes[tier] + self.__row_positions[tier][row_number]
+        tree[node] = new_run
+        node //= 2
+        while node > 0:
+            tree[node] = max(tree[2 * node], tree[2 * node + 1])
+            node //= 2
+
+    def __iterate_runs(self, tier: Tier, free_mask: int):
+        """
+        Yields (first seat position, length) for every run of open seats in a row's bitmask, left to right,
+        splitting runs at the tier's aisles
+        """
+        for block_mask in self.__block_masks[tier]:
+            yield from self.__iterate_mask_runs(free_mask & block_mask)
+
+    @staticmethod
+    def __iterate_mask_runs(free_mask: int):
+        position: int = 0
+        while free_mask:
+            skipped: int = (free_mask & -free_mask).bit_length() - 1
+            free_mask >>= skipped
+            position += skipped
+            length: int = (~free_mask & (free_mask + 1)).bit_length() - 1
+            yield position, length
+            free_mask >>= length
+            position += length
+
+    def get_longest_run(self, tier: Tier, row_number: int) -> int:
+        return self.__longest_runs[tier][row_number]
+
+    def find_run(self, tier: Tier, num_seats: int, best_fit: bool = False) -> tuple:
+        """
+        :param num_seats: The number of adjacent open seats wanted
+        :param best_fit: False for the first row that fits, True for the row whose longest open run fits most
+        tightly (ties go to the first such row), leaving bigger runs for bigger groups
+        :return: (row number, position of the first seat) for the run chosen, or NO_RUN if no row fits
+        """
+        if num_seats < 1 or num_seats > self.__row_widths[tier]:
+            return self.NO_RUN
+        if best_fit:
+            row_number: int = self.NO_RUN
+            for rows in self.__rows_by_run[tier][num_seats:]:
+                if len(rows) > 0:
+                    row_number = rows[0]
+                    break
+            if row_number is self.NO_RUN:
+                return self.NO_RUN
+        else:
+            tree: list = self.__trees[tier]
+            if tree[1] < num_seats:
+                return self.NO_RUN
+            node: int = 1
+            while node < self.__tree_sizes[tier]:
+                node = 2 * node if tree[2 * node] >= num_seats else 2 * node + 1
+            row_number = self.__row_options[tier][node - self.__tree_sizes[tier]]
+        runs: list = [(length, start)
+                      for start, length in self.__iterate_runs(tier, self.__free_masks[tier][row_number])
+                      if length >= num_seats]
+        start: int = min(runs)[1] if best_fit else runs[0][1]
+        return row_number, start
+
+
+class OccupancyIndex:
+    """
+    Running occupancy counts for a seating structure, updated one seat at a time as passengers are assigned and
+    removed, so that occupancy queries never need to scan the seats themselves.
+    """
+
+    def __init__(self, row_options: dict, seat_options: dict, aisles: dict = None):
+        self.__row_widths: dict = {}
+        self.__capacities: dict = {}
+        self.__booked_counts: dict = {}
+        self.__occupied_letters: dict = {}
+        self.__full_rows: dict = {}
+        self.__empty_rows: dict = {}
+        self.__partial_rows: dict = {}
+        self.__free_runs: FreeRunIndex = FreeRunIndex(row_options=row_options, seat_options=seat_options,
+                                                      aisles=aisles)
+        for tier in Tier:
+            self.__populate_section(tier=tier, row_options=row_options[tier], seat_options=seat_options[tier])
+
+    def __populate_section(self, tier: Tier, row_options: list, seat_options: list):
+        self.__row_widths[tier] = len(seat_options)
+        self.__capacities[tier] = len(row_options) * len(seat_options)
+        self.__booked_counts[tier] = 0
+        self.__occupied_letters[tier] = {row_number: set() for row_number in row_options}
+        self.__full_rows[tier] = set() if len(seat_options) > 0 else set(row_options)
+        self.__empty_rows[tier] = set(row_options)
+        self.__partial_rows[tier] = set()
+
+    def record_change(self, tier: Tier, row_number: int, seat_letter: str, was_taken: bool, is_taken: bool):
+        if was_taken == is_taken:
+            return
+        occupied: set = self.__occupied_letters[tier][row_number]
+        if is_taken:
+            occupied.add(seat_letter)
+            self.__booked_counts[tier] += 1
+        else:
+            occupied.discard(seat_letter)
+            self.__booked_counts[tier] -= 1
+        self.__free_runs.record_change(tier=tier, row_number=row_number, seat_letter=seat_letter, is_taken=is_taken)
+        self.__sort_row(tier=tier, row_number=row_number)
+
+    def record_row(self, tier: Tier, row_number: int, occupied_letters: set):
+        """
+        Records every seat of a row at once, as when building the index from storage
+        :param occupied_letters: The letters of the row's booked seats
+        """
+        occupied: set = self.__occupied_letters[tier][row_number]
+        self.__booked_counts[tier] += len(occupied_letters) - len(occupied)
+        occupied.clear()
+        occupied.update(occupied_letters)
+        self.__free_runs.record_row(tier=tier, row_number=row_number, occupied_letters=occupied)
+        self.__sort_row(tier=tier, row_number=row_number)
+
+    def __sort_row(self, tier: Tier, row_number: int):
+        occupied: set = self.__occupied_letters[tier][row_number]
+        self.__full_rows[tier].discard(row_number)
+        self.__empty_rows[tier].discard(row_number)
+        self.__partial_rows[tier].discard(row_number)
+        free_count: int = self.__row_widths[tier] - len(occupied)
+        if free_count == 0:
+            self.__full_rows[tier].add(row_number)
+        elif len(occupied) == 0:
+            self.__empty_rows[tier].add(row_number)
+        else:
+            self.__partial_rows[tier].add(row_number)
+
+    def get_booked_count(self, tier: Tier) -> int:
+        return self.__booked_counts[tier]
+
+    def get_free_count(self, tier: Tier, row_number: int) -> int:
+        return self.__row_widths[tier] - len(self.__occupied_letters[tier][row_number])
+
+    def get_occupied_letters(self, tier: Tier, row_number: int) -> set:
+        return self.__occupied_letters[tier][row_number]
+
+    def get_free_runs(self) -> FreeRunIndex:
+        return self.__free_runs
+
+    def get_full_rows(self, tier: Tier) -> set:
+        return self.__full_rows[tier]
+
+    def get_empty_rows(self, tier: Tier) -> set:
+        return self.__empty_rows[tier]
+
+    def get_partial_rows(self, tier: Tier) -> set:
+        return self.__partial_rows[tier]
+
+    def is_tier_full(self, tier: Tier) -> bool:
+        return self.__booked_counts[tier] == self.__capacities[tier]
+
+    def is_tier_empty(self, tier: Tier) -> bool:
+        return self.__booked_counts[tier] == 0
+
+
+class PassengerNameIndex:
+    """
+    Finds booked seats by passenger name without scanning the seats. Names are normalized (case-folded and
+    single-spaced) and mapped to the seats booked under them; the full name and each word of it are also kept in one
+    sorted list, so a prefix search such as "smi" bisects straight to "Ann Smith" and "Smithers Bo".
+    """
+    NO_NAME = None
+
+    def __init__(self):
+        self.__names_by_location: dict = {}
+        self.__locations_by_name: dict = {}
+        self.__search_keys: list = []
+
+    @staticmethod
+    def normalize_name(name: str) -> str:
+        return " ".join(name.casefold().split())
+
+    @staticmethod
+    def __get_search_keys(normalized_name: str) -> set:
+        return {normalized_name} | set(normalized_name.split())
+
+    def record_change(self, tier: Tier, row_number: int, seat_letter: str, name: str):
+        """
+        :param name: The name of the passenger now in the seat, or NO_NAME if the seat is now open
+        """
+        location: tuple = (tier, row_number, seat_letter)
+        old_name: str = self.__names_by_location.pop(location, self.NO_NAME)
+        if old_name is not self.NO_NAME:
+            locations: set = self.__locations_by_name[old_name]
+            locations.discard(location)
+            if len(locations) == 0:
+                del self.__locations_by_name[old_name]
+                for key in self.__get_search_keys(old_name):
+                    del self.__search_keys[bisect_left(self.__search_keys, (key, old_name))]
+        if name is not self.NO_NAME:
+            normalized_name: str = self.normalize_name(name)
+            self.__names_by_location[location] = normalized_name
+            if normalized_name not in self.__locations_by_name:
+                self.__locations_by_name[normalized_name] = set()
+                for key in self.__get_search_keys(normalized_name):
+                    insort(self.__search_keys, (key, normalized_name))
+            self.__locations_by_name[normalized_name].add(location)
+
+    def get_name(self, tier: Tier, row_number: int, seat_letter: str) -> str:
+        return self.__names_by_location.get((tier, row_number, seat_letter), self.NO_NAME)
+
+    def find_name(self, name: str) -> list:
+        """
+        :return: the (tier, row number, seat letter) of every seat booked under exactly this name, in seat order
+        """
+        return self.__sort_locations(self.__locations_by_name.get(self.normalize_name(name), set()))
+
+    def search_prefix(self, prefix: str) -> list:
+        """
+        :return: the (tier, row number, seat letter) of every seat booked under a name that, or any word of which,
+        starts with the prefix; ordered by name, then seat
+        """
+        prefix = self.normalize_name(prefix)
+        if prefix == EMPTY_STR:
+            return []
+        names: list = []
+        position: int = bisect_left(self.__search_keys, (prefix,))
+        while position < len(self.__search_keys) and self.__search_keys[position][0].startswith(prefix):
+            names.append(self.__search_keys[position][1])
+            position += 1
+        locations: list = []
+        for name in sorted(set(names)):
+            locations += self.__sort_locations(self.__locations_by_name[name])
+        return locations
+
+    @staticmethod
+    def __sort_locations(locations: set) -> list:
+        tier_order: list = list(Tier)
+        return sorted(locations, key=lambda location: (tier_order.index(location[0]), location[1], location[2]))
+
+
+class WaitlistPriority(Enum):
+    elite = ["Elite", 0, 'E', "(E)lite"]
+    full_fare = ["Full Fare", 1, 'F', "(F)ull Fare"]
+    standard = ["Standard", 2, 'S', "(S)tandard"]
+
+    def get_priority_name(self) -> str:
+        return self.value[0]
+
+    def get_rank(self) -> int:
+        """
+        :return: the priority's place in the waitlist order; lower ranks are promoted first
+        """
+        return self.value[1]
+
+    def get_menu_display_text(self) -> str:
+        return self.value[3]
+
+    @classmethod
+    def get_priority(cls, text: str) -> 'WaitlistPriority':
+        if text != EMPTY_STR:
+            text = text[0].upper()
+            for member in cls:
+                if member.value[2] == text:
+                    return member
+        raise Exception(f"'{text}' is not one of the available options")
+
+
+class WaitlistEntry:
+    """
+    A passenger waiting for a seat in one tier; entries are promoted by priority, then in the order they were made
+    """
+
+    def __init__(self, tier: Tier, passenger: Passenger, priority: WaitlistPriority, sequence: int):
+        self.__tier: Tier = tier
+        self.__passenger: Passenger = passenger
+        self.__priority: WaitlistPriority = priority
+        self.__sequence: int = sequence
+        self.__active: bool = True
+
+    def get_tier(self) -> Tier:
+        return self.__tier
+
+    def get_passenger(self) -> Passenger:
+        return self.__passenger
+
+    def get_priority(self) -> WaitlistPriority:
+        return self.__priority
+
+    def get_sequence(self) -> int:
+        """
+        :return: the entry's place among all the requests made to its waitlist, from 0 for the first
+        """
+        return self.__sequence
+
+    def is_active(self) -> bool:
+        return self.__active
+
+    def deactivate(self):
+        self.__active = False
+
+
+class Waitlist:
+    """
+    The passengers waiting for a seat on one flight, in a binary heap per tier keyed by (priority rank, request
+    sequence), so the next passenger to promote is always at the top. Withdrawn entries are only marked, and dropped
+    when they reach the top of the heap, so both joining and promoting take logarithmic time however long the
+    waitlist grows. The waitlist is held in memory and is not journaled.
+    """
+    NO_ENTRY = None
+
+    def __init__(self):
+        self.__heaps: dict = {tier: [] for tier in Tier}
+        self.__active_counts: dict = {tier: 0 for tier in Tier}
+        self.__sequence: count = count()
+        self.__lock: Lock = Lock()
+
+    def add(self, tier: Tier, passenger: Passenger,
+            priority: WaitlistPriority = WaitlistPriority.standard) -> WaitlistEntry:
+        with self.__lock:
+            entry: WaitlistEntry = WaitlistEntry(tier=tier, passenger=passenger, priority=priority,
+                                                 sequence=next(self.__sequence))
+            heapq.heappush(self.__heaps[tier], (priority.get_rank(), entry.get_sequence(), entry))
+            self.__active_counts[tier] += 1
+            return entry
+
+    def withdraw(self, entry: WaitlistEntry):
+        """
+        Takes a passenger off the waitlist, if the entry is still waiting
+        """
+        with self.__lock:
+            if entry.is_active():
+                entry.deactivate()
+                self.__active_counts[entry.get_tier()] -= 1
+
+    def pop_next(self, tier: Tier) -> WaitlistEntry:
+        """
+        :return: the waiting entry with the best priority that was made first, now taken off the waitlist,
+        or NO_ENTRY if nobody is waiting for the tier
+        """
+        with self.__lock:
+            heap: list = self.__heaps[tier]
+            while len(heap) > 0:
+                entry: WaitlistEntry = heapq.heappop(heap)[2]
+                if entry.is_active():
+                    entry.deactivate()
+                    self.__active_counts[tier] -= 1
+                    return entry
+            return self.NO_ENTRY
+
+    def count_waiting(self, tier: Tier) -> int:
+        return self.__active_counts[tier]
+
+    def get_position(self, entry: WaitlistEntry) -> int:
+        """
+        :return: the number of waiting entries ahead of this one, plus one; for display, so it scans the tier's heap
+        """
+        key: tuple = (entry.get_priority().get_rank(), entry.get_sequence())
+        with self.__lock:
+            return 1 + sum(1 for rank, sequence, other in self.__heaps[entry.get_tier()]
+                           if other.is_active() and (rank, sequence) < key)
+
+    def get_waiting(self, tier: Tier) -> list:
+        """
+        :return: the tier's waiting entries, in the order they would be promoted
+        """
+        with self.__lock:
+            return [entry for rank, sequence, entry in sorted(self.__heaps[tier], key=lambda item: item[:2])
+                    if entry.is_active()]
+
+
+class TimerWheel:
+    """
+    A hierarchical timing wheel: LEVELS wheels of SLOTS slots each, where a slot of level n spans SLOTS ** n ticks.
+    A timer goes into the slot of the coarsest level its deadline needs, and is moved down a level only when that
+    slot comes round, so scheduling, cancelling and each tick cost O(1), however many timers are outstanding;
+    nothing ever sweeps all the timers. Deadlines are in whole ticks of the caller's choosing.
+    """
+    SLOT_BITS: int = 6
+    SLOTS: int = 1 << SLOT_BITS
+    SLOT_MASK: int = SLOTS - 1
+    LEVELS: int = 4
+
+    def __init__(self, start_tick: int = 0):
+        self.__current_tick: int = start_tick
+        self.__wheels: list = [[{} for _ in range(self.SLOTS)] for _ in range(self.LEVELS)]
+        self.__slots_by_key: dict = {}
+
+    def get_current_tick(self) -> int:
+        return self.__current_tick
+
+    def get_max_delay(self) -> int:
+        """
+        :return: the furthest ahead of the current tick that a deadline can be
+        """
+        return (1 << (self.SLOT_BITS * self.LEVELS)) - 1
+
+    def count(self) -> int:
+        return len(self.__slots_by_key)
+
+    def schedule(self, key, deadline_tick: int):
+        """
+        :param key: Any hashable that names the timer, returned by advance when it fires; replaces any timer already
+        scheduled under the same key
+        :param deadline_tick: The tick at which the timer fires; deadlines already passed fire on the next tick
+        """
+        self.cancel(key)
+        deadline_tick = max(deadline_tick, self.__current_tick + 1)
+        if deadline_tick - self.__current_tick > self.get_max_delay():
+            raise Exception(f"A timer cannot be set more than {self.get_max_delay()} ticks ahead")
+        self.__place(key=key, deadline_tick=deadline_tick)
+
+    def __place(self, key, deadline_tick: int):
+        """
+        Puts a timer into its slot; a deadline of the current tick goes into the slot about to fire
+        """
+        delay: int = deadline_tick - self.__current_tick
+        level: int = 0
+        while delay >> (self.SLOT_BITS * (level + 1)) > 0:
+            level += 1
+        slot: dict = self.__wheels[level][(deadline_tick >> (self.SLOT_BITS * level)) & self.SLOT_MASK]
+        slot[key] = deadline_tick
+        self.__slots_by_key[key] = slot
+
+    def cancel(self, key) -> bool:
+        """
+        :return: True if a timer was scheduled under the key
+        """
+        slot: dict = self.__slots_by_key.pop(key, None)
+        if slot is None:
+            return False
+        del slot[key]
+        return True
+
+    def advance(self, to_tick: int) -> list:
+        """
+        Turns the wheel forward, one tick at a time, to to_tick
+        :return: the keys of the timers that fired, in deadline order
+        """
+        fired: list = []
+        while self.__current_tick < to_tick:
+            if self.count() == 0:
+                self.__current_tick = to_tick
+                break
+            self.__current_tick += 1
+            level: int = 1
+            while level < self.LEVELS and (self.__current_tick >> (self.SLOT_BITS * (level - 1))) & self.SLOT_MASK == 0:
+                self.__cascade(level)
+                level += 1
+            slot: dict = self.__wheels[0][self.__current_tick & self.SLOT_MASK]
+            for key in slot:
+                del self.__slots_by_key[key]
+                fired.append(key)
+            slot.clear()
+        return fired
+
+    def __cascade(self, level: int):
+        """
+        Moves the timers in a coarse slot that has come round into the finer levels
+        """
+        index: int = (self.__current_tick >> (self.SLOT_BITS * level)) & self.SLOT_MASK
+        slot: dict = self.__wheels[level][index]
+        self.__wheels[level][index] = {}
+        for key, deadline_tick in slot.items():
+            self.__place(key=key, deadline_tick=deadline_tick)
+
+
+class SeatHold:
+    """
+    A seat set aside for one booking while it is being paid for; until the hold is confirmed, released or expires,
+    nobody else can book or hold the seat
+    """
+
+    def __init__(self, hold_id: int, tier: Tier, row_number: int, seat_letter: str, holder: str, expiry_tick: int):
+        self.__hold_id: int = hold_id
+        self.__tier: Tier = tier
+        self.__row_number: int = row_number
+        self.__seat_letter: str = seat_letter
+        self.__holder: str = holder
+        self.__expiry_tick: int = expiry_tick
+
+    def get_hold_id(self) -> int:
+        return self.__hold_id
+
+    def get_tier(self) -> Tier:
+        return self.__tier
+
+    def get_row_number(self) -> int:
+        return self.__row_number
+
+    def get_seat_letter(self) -> str:
+        return self.__seat_letter
+
+    def get_location(self) -> tuple:
+        return self.__tier, self.__row_number, self.__seat_letter
+
+    def get_holder(self) -> str:
+        return self.__holder
+
+    def get_expiry_tick(self) -> int:
+        return self.__expiry_tick
+
+    def is_for_seat(self, seat: Seat) -> bool:
+        return self.get_location() == (seat.get_tier(), seat.get_row_number(), seat.get_seat_letter())
+
+
+class SeatHolds:
+    """
+    The outstanding seat holds of one flight. Expiry runs on a TimerWheel that is turned forward to the clock
+    whenever holds are looked at, so an expired hold is never seen, and expiring holds costs O(1) per tick
+    rather than a sweep over the holds or the seats.
+    """
+    NO_HOLD = None
+    DEFAULT_TTL_SECONDS: float = 300.0
+    TICK_SECONDS: float = 1.0
+
+    def __init__(self, clock=monotonic, tick_seconds: float = TICK_SECONDS):
+        """
+        :param clock: Returns the current time in seconds; a monotonic clock unless a test needs to control time
+        :param tick_seconds: The resolution of hold expiry
+        """
+        self.__clock = clock
+        self.__tick_seconds: float = tick_seconds
+        self.__wheel: TimerWheel = TimerWheel(start_tick=self.__get_clock_tick())
+        self.__holds_by_location: dict = {}
+        self.__holds_by_id: dict = {}
+        self.__hold_ids: count = count(1)
+        self.__lock: RLock = RLock()
+
+    def __get_clock_tick(self) -> int:
+        return floor(self.__clock() / self.__tick_seconds)
+
+    def count(self) -> int:
+        return len(self.__holds_by_id)
+
+    def expire(self) -> list:
+        """
+        Drops every hold whose time is up
+        :return: the holds that expired
+        """
+        with self.__lock:
+            expired: list = []
+            for hold_id in self.__wheel.advance(self.__get_clock_tick()):
+                hold: SeatHold = self.__holds_by_id.pop(hold_id)
+                del self.__holds_by_location[hold.get_location()]
+                expired.append(hold)
+            return expired
+
+    def get_hold(self, tier: Tier, row_number: int, seat_letter: str) -> SeatHold:
+        """
+        :return: the seat's unexpired hold, or NO_HOLD
+        """
+        if len(self.__holds_by_id) == 0:
+            return self.NO_HOLD
+        self.expire()
+        return self.__holds_by_location.get((tier, row_number, seat_letter), self.NO_HOLD)
+
+    def get_hold_by_id(self, hold_id: int) -> SeatHold:
+        """
+        :return: the unexpired hold with this id, or NO_HOLD
+        """
+        self.expire()
+        return self.__holds_by_id.get(hold_id, self.NO_HOLD)
+
+    def is_active(self, hold: SeatHold) -> bool:
+        return self.get_hold_by_id(hold.get_hold_id()) is hold
+
+    def place(self, tier: Tier, row_number: int, seat_letter: str, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+              holder: str = EMPTY_STR) -> SeatHold:
+        """
+        Holds an open seat; the caller checks that the seat is not booked
+        :param ttl_seconds: How long the hold lasts unless it is confirmed or released first
+        :param holder: Who the seat is being held for, such as an agent or sales channel
+        """
+        if ttl_seconds <= 0:
+            raise Exception(f"A seat hold must last some time, not {ttl_seconds} seconds")
+        with self.__lock:
+            self.expire()
+            location: tuple = (tier, row_number, seat_letter)
+            if location in self.__holds_by_location:
+                raise Exception(f"{tier.get_tier_name()} seat '{row_number}-{seat_letter}' is being held "
+                                f"for another booking")
+            expiry_tick: int = self.__wheel.get_current_tick() + ceil(ttl_seconds / self.__tick_seconds)
+            hold: SeatHold = SeatHold(hold_id=next(self.__hold_ids), tier=tier, row_number=row_number,
+                                      seat_letter=seat_letter, holder=holder, expiry_tick=expiry_tick)
+            self.__wheel.schedule(key=hold.get_hold_id(), deadline_tick=expiry_tick)
+            self.__holds_by_location[location] = hold
+            self.__holds_by_id[hold.get_hold_id()] = hold
+            return hold
+
+    def release(self, hold: SeatHold) -> bool:
+        """
+        :return: True if the hold was still outstanding; releasing a hold that has expired or been released is harmless
+        """
+        with self.__lock:
+            if self.__holds_by_id.get(hold.get_hold_id()) is not hold:
+                return False
+            self.__wheel.cancel(hold.get_hold_id())
+            del self.__holds_by_id[hold.get_hold_id()]
+            del self.__holds_by_location[hold.get_location()]
+            return True
+
+
+class SeatTransaction:
+    """
+    A batch of bookings, cancellations, moves and swaps, committed to a seating structure all together or not at all
+    (see SeatingStructure.commit_transaction). Every change is read against the seat map as it stood before the
+    batch, so moves may chain into seats other moves vacate and may form cycles: moving A to B and B to A swaps two
+    passengers.
+    """
+    BOOK_OP: str = "book"
+    CANCEL_OP: str = "cancel"
+    MOVE_OP: str = "move"
+    NO_LOCATION = None
+
+    def __init__(self):
+        self.__changes: list = []
+
+    @staticmethod
+    def get_location(seat: Seat) -> tuple:
+        return seat.get_tier(), seat.get_row_number(), seat.get_seat_letter()
+
+    def book(self, seat: Seat) -> 'SeatTransaction':
+        """
+        :param seat: The seat to book, with its passenger assigned
+        """
+        if not seat.is_taken():
+            raise Exception(f"{seat.get_tier_row_seat_str()} has no passenger to book")
+        self.__changes.append((self.BOOK_OP, self.NO_LOCATION, self.get_location(seat), seat.get_passenger()))
+        return self
+
+    def cancel(self, seat: Seat) -> 'SeatTransaction':
+        self.__changes.append((self.CANCEL_OP, self.get_location(seat), self.NO_LOCATION, Seat.NO_PASSENGER))
+        return self
+
+    def move(self, from_seat: Seat, to_seat: Seat) -> 'SeatTransaction':
+        """
+        Moves whoever is booked in from_seat, when the batch is committed, into to_seat
+        """
+        self.__changes.append((self.MOVE_OP, self.get_location(from_seat), self.get_location(to_seat),
+                               Seat.NO_PASSENGER))
+        return self
+
+    def swap(self, seat_a: Seat, seat_b: Seat) -> 'SeatTransaction':
+        return self.move(from_seat=seat_a, to_seat=seat_b).move(from_seat=seat_b, to_seat=seat_a)
+
+    def get_changes(self) -> list:
+        """
+        :return: (op, from location, to location, passenger) for every change, in the order they were added; a
+        location is a (tier, row number, seat letter) tuple, or NO_LOCATION, and the passenger is only given for
+        bookings
+        """
+        return list(self.__changes)
+
+    def count_changes(self) -> int:
+        return len(self.__changes)
+
+
+class AircraftLayout:
+    """
+    The seat layout of one aircraft type, compiled once from a declarative description into lookup tables: each
+    tier's rows and seat letters as lists and as validation sets, a seat id for every seat and the seat at every id,
+    and the pre-rendered skeleton of the seating chart (headers, row markers and aisle gaps). Compiled layouts never
+    change, so one is shared by every flight and seating structure of that aircraft type.
+
+    A layout file holds one description, or a list of them, in JSON:
+        {"aircraft": "A320",
+         "cabins": [{"tier": "first_class", "rows": [1, 3], "letters": "ACDF", "aisles": [2]},
+                    {"tier": "coach", "rows": [7, 33], "skip_rows": [13], "seats": 6, "skip_letters": "I",
+                     "aisles": [3]}]}
+    Every cabin names its tier, its first and last row, and either its seat letters or its number of seats, whose
+    letters then run A to Z and on to AA, AB, ..., leaving out any skip_letters and the menus' quit and return
+    letters. Aisles are given as the number of seats to their left. A tier may span several cabins, such as a
+    forward and an aft coach cabin, as long as they share their seat letters and aisles and their rows do not overlap.
+    """
+    CHART_TITLE: str = "SEATING DISPLAY"
+    AISLE: str = SPACE * 2
+    RESERVED_LETTERS: frozenset = frozenset([QUIT_CHAR, RETURN_TO_MAIN_CHAR])
+    NO_GRID = None
+    NO_SKELETON = None
+    __registered_layouts: dict = {}
+    __grid_layouts: dict = {}
+    __registry_lock: Lock = Lock()
+
+    def __init__(self, aircraft_type: str, cabins: list):
+        """
+        Compiles a layout. Use register, load or from_counts instead, so each aircraft type is only compiled once.
+        :param cabins: The cabin descriptions, as in a layout file
+        """
+        self.__aircraft_type: str = aircraft_type
+        self.__cabins: list = cabins
+        self.__row_options: dict = {tier: [] for tier in Tier}
+        self.__seat_options: dict = {}
+        self.__aisles: dict = {}
+        for number, cabin in enumerate(cabins, start=1):
+            tier, rows, letters, aisles = self.__compile_cabin(number=number, cabin=cabin)
+            if tier not in self.__seat_options:
+                self.__seat_options[tier] = letters
+                self.__aisles[tier] = aisles
+            elif letters != self.__seat_options[tier] or aisles != self.__aisles[tier]:
+                raise Exception(f"Cabin {number} of the {aircraft_type} layout does not have the same seats as the "
+                                f"other {tier.get_tier_name()} cabins")
+            overlap: set = set(rows).intersection(self.__row_options[tier])
+            if len(overlap) > 0:
+                raise Exception(f"Cabin {number} of the {aircraft_type} layout repeats {tier.get_tier_name()} "
+                                f"row {min(overlap)}")
+            self.__row_options[tier].extend(rows)
+        for tier in Tier:
+            if tier not in self.__seat_options:
+                raise Exception(f"The {aircraft_type} layout has no {tier.get_tier_name()} cabin")
+            self.__row_options[tier].sort()
+
+        self.__row_sets: dict = {tier: frozenset(self.__row_options[tier]) for tier in Tier}
+        self.__seat_sets: dict = {tier: frozenset(self.__seat_options[tier]) for tier in Tier}
+        self.__row_positions: dict = {}
+        self.__seat_positions: dict = {}
+        self.__tier_starts: dict = {}
+        self.__seat_locations: list = []
+        for tier in Tier:
+            self.__row_positions[tier] = {row_number: index
+                                          for index, row_number in enumerate(self.__row_options[tier])}
+            self.__seat_positions[tier] = {seat_letter: index
+                                           for index, seat_letter in enumerate(self.__seat_options[tier])}
+            self.__tier_starts[tier] = len(self.__seat_locations)
+            self.__seat_locations += [(tier, row_number, seat_letter) for row_number in self.__row_options[tier]
+                                      for seat_letter in self.__seat_options[tier]]
+        self.__grid_counts: tuple = self.__find_grid_counts()
+        self.__chart_skeleton: dict = self.NO_SKELETON
+
+    def __compile_cabin(self, number: int, cabin: dict) -> tuple:
+        """
+        :return: the cabin's (tier, row numbers, seat letters, aisle positions)
+        """
+        try:
+            tier: Tier = parse_tier(str(cabin["tier"]))
+            first_row, last_row = (int(row_number) for row_number in cabin["rows"])
+            skip_rows: set = {int(row_number) for row_number in cabin.get("skip_rows", [])}
+            if "letters" in cabin:
+                letters: list = [str(seat_letter).strip().upper() for seat_letter in cabin["letters"]]
+            else:
+                letters = self.generate_seat_letters(num_seats=int(cabin["seats"]),
+                                                     skip_letters=str(cabin.get("skip_letters", EMPTY_STR)))
+            aisles: frozenset = frozenset(int(position) for position in cabin.get("aisles", []))
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            raise Exception(f"Cabin {number} of the {self.__aircraft_type} layout is not a valid cabin: {e!r}")
+        errs: str = EMPTY_STR
+        rows: list = [row_number for row_number in range(first_row, last_row + 1) if row_number not in skip_rows]
+        if first_row < 1 or len(rows) == 0:
+            errs += f"Rows {first_row} to {last_row} are not a valid range of row numbers.{linesep}"
+        if len(letters) == 0 or EMPTY_STR in letters or len(set(letters)) != len(letters):
+            errs += f"Seat letters {letters} must be distinct and not blank.{linesep}"
+        if not self.RESERVED_LETTERS.isdisjoint(letters):
+            errs += f"Seat letters cannot be '{QUIT_CHAR}' or '{RETURN_TO_MAIN_CHAR}', which the menus reserve."
+            errs += linesep
+        if any(position < 1 or position >= len(letters) for position in aisles):
+            errs += f"Aisles {sorted(aisles)} must fall between two seats.{linesep}"
+        if errs != EMPTY_STR:
+            raise Exception(f"Cabin {number} of the {self.__aircraft_type} layout is not valid:{linesep}"
+                            f"{errs.rstrip()}")
+        return tier, rows, letters, aisles
+
+    @classmethod
+    def generate_seat_letters(cls, num_seats: int, skip_letters: str = EMPTY_STR) -> list:
+        """
+        :return: num_seats seat letters, A to Z and then AA, AB, and so on, leaving out any containing one of the
+        skip_letters and the menus' reserved letters
+        """
+        skipped: set = set(skip_letters.upper())
+        letters: list = []
+        length: int = 1
+        while len(letters) < num_seats:
+            for characters in product(ascii_uppercase, repeat=length):
+                seat_letter: str = EMPTY_STR.join(characters)
+                if seat_letter not in cls.RESERVED_LETTERS and skipped.isdisjoint(characters):
+                    letters.append(seat_letter)
+                    if len(letters) == num_seats:
+                        break
+            length += 1
+        return letters
+
+    def __find_grid_counts(self) -> tuple:
+        """
+        :return: (fc_rows, fc_seats, coach_rows, coach_seats) if every tier is a plain grid, rows numbered from 1 and
+        seats lettered from A, with no aisles; otherwise NO_GRID
+        """
+        counts: list = []
+        for tier in (Tier.first_class, Tier.coach):
+            num_rows: int = len(self.__row_options[tier])
+            num_seats: int = len(self.__seat_options[tier])
+            if (self.__row_options[tier] != list(range(1, num_rows + 1)) or len(self.__aisles[tier]) > 0
+                    or self.__seat_options[tier] != self.generate_seat_letters(num_seats=num_seats)):
+                return self.NO_GRID
+            counts += [num_rows, num_seats]
+        return tuple(counts)
+
+    def __get_chart_skeleton(self) -> dict:
+        """
+        :return: the pre-rendered parts of the seating chart, compiled the first time a chart is drawn
+        """
+        if self.__chart_skeleton is self.NO_SKELETON:
+            self.__chart_skeleton = self.__compile_chart_skeleton()
+        return self.__chart_skeleton
+
+    def __compile_chart_skeleton(self) -> dict:
+        last_row: int = max(row_options[-1] for row_options in self.__row_options.values())
+        marker_len: int = len(str(last_row)) + 1
+        blank_marker: str = SPACE * marker_len
+        skeleton: dict = {"row_markers": {}, "cell_gaps": {}, "tier_headers": {}, "seat_headers": {}}
+        tier_widths: dict = {}
+        for tier in Tier:
+            skeleton["row_markers"][tier] = {row_number: f"{str(row_number).rjust(marker_len - 1)}{SPACE}"
+                                             for row_number in self.__row_options[tier]}
+            cell_gaps: list = [self.AISLE if position in self.__aisles[tier] else EMPTY_STR
+                               for position in range(len(self.__seat_options[tier]))]
+            skeleton["cell_gaps"][tier] = cell_gaps
+            tier_widths[tier] = (len(self.__seat_options[tier]) * OUTER_CELL_WIDTH
+                                 + len(self.__aisles[tier]) * len(self.AISLE))
+            tier_header: str = self.generate_bar_header(width=tier_widths[tier], text=tier.get_tier_name().upper())
+            skeleton["tier_headers"][tier] = f"{blank_marker}{tier_header}"
+            builder: StringIO = StringIO()
+            builder.write(blank_marker)
+            for gap, seat_letter in zip(cell_gaps, self.__seat_options[tier]):
+                builder.write(gap)
+                builder.write(CELL_SEPARATOR)
+                builder.write(self.generate_bar_header(width=INNER_CELL_WIDTH, text=seat_letter))
+                builder.write(CELL_SEPARATOR)
+            skeleton["seat_headers"][tier] = builder.getvalue()
+        chart_width: int = max(tier_widths.values())
+        skeleton["top_bar"] = self.generate_bar_header(width=chart_width, text=self.CHART_TITLE,
+                                                       front_buffer_width=marker_len)
+        skeleton["bottom_line"] = self.generate_bar_header(width=chart_width, front_buffer_width=marker_len)
+        return skeleton
+
+    @staticmethod
+    def generate_bar_header(width: int,
+                            text: str = EMPTY_STR,
+                            rear_buffer_width: int = 0,
+                            front_buffer_width: int = 0) -> str:
+        if text != EMPTY_STR:
+            text = f"{SPACE}{text}{SPACE}"
+        if len(text) > width:
+            raise Exception(f"Cannot fit the text '{text}' within a header of length {width}")
+        side_width: float = (width - len(text)) / 2
+        first_bar: str = floor(side_width) * BAR_CHAR
+        last_bar: str = ceil(side_width) * BAR_CHAR
+        return f"{SPACE * front_buffer_width}{first_bar}{text}{last_bar}{SPACE * rear_buffer_width}"
+
+    @classmethod
+    def register(cls, description: dict) -> 'AircraftLayout':
+        """
+        Compiles a layout description and makes it available under its aircraft type. Registering the same
+        description again returns the layout already compiled.
+        :param description: A dict with the "aircraft" type and its "cabins", as in a layout file
+        """
+        try:
+            aircraft_type: str = str(description["aircraft"]).strip().upper()
+            cabins: list = list(description["cabins"])
+        except (KeyError, TypeError) as e:
+            raise Exception(f"A layout must name its aircraft and list its cabins: {e!r}")
+        with cls.__registry_lock:
+            layout: AircraftLayout = cls.__registered_layouts.get(aircraft_type)
+            if layout is not None:
+                if layout.__cabins != cabins:
+                    raise Exception(f"Aircraft type {aircraft_type} is already registered with a different layout")
+                return layout
+            layout = cls(aircraft_type=aircraft_type, cabins=cabins)
+            cls.__registered_layouts[aircraft_type] = layout
+            return layout
+
+    @classmethod
+    def load(cls, path: str) -> list:
+        """
+        Registers every layout in a layout file
+        :return: the layouts, in file order
+        """
+        with open(path, 'r', encoding='utf-8') as layout_file:
+            try:
+                descriptions = json.load(layout_file)
+            except ValueError as e:
+                raise Exception(f"'{path}' is not a valid layout file: {e}")
+        if isinstance(descriptions, dict):
+            descriptions = [descriptions]
+        return [cls.register(description) for description in descriptions]
+
+    @classmethod
+    def get_registered(cls, aircraft_type: str) -> 'AircraftLayout':
+        layout: AircraftLayout = cls.__registered_layouts.get(aircraft_type.strip().upper())
+        if layout is None:
+            raise Exception(f"No layout has been loaded for aircraft type '{aircraft_type}'")
+        return layout
+
+    @classmethod
+    def from_counts(cls, fc_rows: int, fc_seats: int, coach_rows: int, coach_seats: int) -> 'AircraftLayout':
+        """
+        :return: the shared layout of a plain grid of rows and seats, numbered from row 1 and lettered from A
+        """
+        counts: tuple = (fc_rows, fc_seats, coach_rows, coach_seats)
+        layout: AircraftLayout = cls.__grid_layouts.get(counts)
+        if layout is None:
+            if any(count is None for count in counts):
+                raise Exception("A seating structure needs either a layout or all four row and seat counts")
+            cabins: list = [{"tier": tier.name, "rows": [1, num_rows], "seats": num_seats}
+                            for tier, num_rows, num_seats in ((Tier.first_class, fc_rows, fc_seats),
+                                                              (Tier.coach, coach_rows, coach_seats))]
+            with cls.__registry_lock:
+                layout = cls.__grid_layouts.setdefault(counts, cls(aircraft_type="x".join(map(str, counts)),
+                                                                   cabins=cabins))
+        return layout
+
+    @classmethod
+    def get_default(cls) -> 'AircraftLayout':
+        return cls.from_counts(fc_rows=NUM_FC_ROWS, fc_seats=NUM_FC_SEATS_PER_ROW,
+                               coach_rows=NUM_COACH_ROWS, coach_seats=NUM_COACH_SEATS_PER_ROW)
+
+    def get_aircraft_type(self) -> str:
+        return self.__aircraft_type
+
+    def get_grid_counts(self) -> tuple:
+        """
+        :return: the (fc_rows, fc_seats, coach_rows, coach_seats) of a plain grid layout, or NO_GRID
+        """
+        return self.__grid_counts
+
+    def get_row_options(self, tier: Tier) -> list:
+        return self.__row_options[tier]
+
+    def get_seat_options(self, tier: Tier) -> list:
+        return self.__seat_options[tier]
+
+    def get_aisles(self, tier: Tier) -> frozenset:
+        """
+        :return: the positions, counted from 0 on the left, of the seats with an aisle just before them
+        """
+        return self.__aisles[tier]
+
+    def is_valid_row(self, tier: Tier, row_number: int) -> bool:
+        return row_number in self.__row_sets[tier]
+
+    def is_valid_seat_letter(self, tier: Tier, seat_letter: str) -> bool:
+        return seat_letter in self.__seat_sets[tier]
+
+    def count_seats(self) -> int:
+        return len(self.__seat_locations)
+
+    def count_tier_seats(self, tier: Tier) -> int:
+        return len(self.__row_options[tier]) * len(self.__seat_options[tier])
+
+    def get_seat_positions(self, tier: Tier) -> dict:
+        """
+        :return: each seat letter's position in its row, from 0 on the left
+        """
+        return self.__seat_positions[tier]
+
+    def get_seat_id(self, tier: Tier, row_number: int, seat_letter: str) -> int:
+        """
+        :return: the seat's id, numbering every seat in tier, row and seat-letter order from 0
+        """
+        row_position: int = self.__row_positions[tier][row_number]
+        return (self.__tier_starts[tier] + row_position * len(self.__seat_options[tier])
+                + self.__seat_positions[tier][seat_letter])
+
+    def get_seat_location(self, seat_id: int) -> tuple:
+        """
+        :return: the (tier, row number, seat letter) of the seat with the given id
+        """
+        return self.__seat_locations[seat_id]
+
+    def get_top_bar(self) -> str:
+        return self.__get_chart_skeleton()["top_bar"]
+
+    def get_tier_header(self, tier: Tier) -> str:
+        return self.__get_chart_skeleton()["tier_headers"][tier]
+
+    def get_seat_header(self, tier: Tier) -> str:
+        return self.__get_chart_skeleton()["seat_headers"][tier]
+
+    def get_bottom_line(self) -> str:
+        return self.__get_chart_skeleton()["bottom_line"]
+
+    def get_row_marker(self, tier: Tier, row_number: int) -> str:
+        return self.__get_chart_skeleton()["row_markers"][tier][row_number]
+
+    def get_cell_gaps(self, tier: Tier) -> list:
+        """
+        :return: what to write before each seat's cell in a chart row: an aisle, or nothing
+        """
+        return self.__get_chart_skeleton()["cell_gaps"][tier]
+
+
+class SeatingStructure:
+    NO_JOURNAL = None
+    NO_FARE_LADDER = None
+    NO_NAME_INDEX = None
+    ROW_LOCK_STRIPES: int = 64
+
+    def __init__(self, fc_rows=None, fc_seats=None, coach_rows=None, coach_seats=None,
+                 storage_type: SeatStorageType = SeatStorageType.objects, debug: bool = False,
+                 read_only: bool = False, storage_options: dict = None, layout: AircraftLayout = None):
+        """
+        :param layout: The aircraft's compiled layout; if not given, a plain grid of the four row and seat counts
+        """
+        if layout is None:
+            layout = AircraftLayout.from_counts(fc_rows=fc_rows, fc_seats=fc_seats,
+                                                coach_rows=coach_rows, coach_seats=coach_seats)
+        self.__layout: AircraftLayout = layout
+        self.__row_options: dict = {tier: layout.get_row_options(tier) for tier in Tier}
+        self.__seating_options: dict = {tier: layout.get_seat_options(tier) for tier in Tier}
+        self.__aisles: dict = {tier: layout.get_aisles(tier) for tier in Tier}
+        self.__row_displays: dict = {tier: {} for tier in Tier}
+        self.__chart: str = EMPTY_STR
+
+        self.__row_locks: dict = {tier: [RLock() for _ in range(self.ROW_LOCK_STRIPES)] for tier in Tier}
+        self.__update_locks: dict = {tier: Lock() for tier in Tier}
+        self.__thread_state: local = local()
+        self.__name_index_lock: Lock = Lock()
+
+        self.__storage: SeatStorage = storage_type.create_storage(owner=self,
+                                                                  row_options=self.__row_options,
+                                                                  seat_options=self.__seating_options,
+                                                                  storage_options=storage_options)
+        self.__occupancy_index: OccupancyIndex = OccupancyIndex(row_options=self.__row_options,
+                                                                seat_options=self.__seating_options,
+                                                                aisles=self.__aisles)
+        self.__name_index: PassengerNameIndex = PassengerNameIndex()
+        self.__debug: bool = debug
+        self.__read_only: bool = read_only
+        self.__journal: BookingJournal = self.NO_JOURNAL
+        self.__fare_ladder: FareLadder = self.NO_FARE_LADDER
+        self.__waitlist: Waitlist = Waitlist()
+        self.__seat_holds: SeatHolds = SeatHolds()
+        self.__tier_seat_counts: dict = {tier: layout.count_tier_seats(tier) for tier in Tier}
+
+    @classmethod
+    def open_mapped(cls, path: str, read_only: bool = False) -> 'SeatingStructure':
+        """
+        Opens a seat-map file (see SeatMapFile) in place; seats are read from and written to the mapped file
+        :param path: The seat-map file to open
+        :param read_only: True to map the file read-only, for tools that only print or check availability
+        """
+        fc_rows, fc_seats, coach_rows, coach_seats = SeatMapFile.read_layout(path)
+        model: SeatingStructure = cls(fc_rows=fc_rows, fc_seats=fc_seats, coach_rows=coach_rows,
+                                      coach_seats=coach_seats, storage_type=SeatStorageType.mapped,
+                                      read_only=read_only,
+                                      storage_options={"path": path, "read_only": read_only})
+        model.refresh_occupancy_index()
+        return model
+
+    def get_layout(self) -> tuple:
+        """
+        :return: the (fc_rows, fc_seats, coach_rows, coach_seats) this structure was built with
+        """
+        counts: tuple = self.__layout.get_grid_counts()
+        if counts is AircraftLayout.NO_GRID:
+            raise Exception(f"The {self.__layout.get_aircraft_type()} layout is not a plain grid of rows and seats")
+        return counts
+
+    def get_aircraft_layout(self) -> AircraftLayout:
+        return self.__layout
+
+    def flush(self):
+        self.__get_storage().flush()
+
+    def close(self):
+        self.__get_storage().close()
+
+    def refresh_occupancy_index(self):
+        """
+        Rebuilds the occupancy index from storage, and drops the passenger name index to be rebuilt by the next name
+        search; needed when storage is shared with, and changed by, another process. Only which seats are booked is
+        read, so no seat's record is decoded until it is asked for.
+        """
+        storage: SeatStorage = self.__get_storage()
+        index: OccupancyIndex = OccupancyIndex(row_options=self.__row_options, seat_options=self.__seating_options,
+                                               aisles=self.__aisles)
+        for tier in Tier:
+            for row_number, occupied_letters in storage.get_occupied_letters(tier=tier).items():
+                index.record_row(tier=tier, row_number=row_number, occupied_letters=occupied_letters)
+        self.__occupancy_index = index
+        with self.__name_index_lock:
+            self.__name_index = self.NO_NAME_INDEX
+        for tier in Tier:
+            self.__row_displays[tier].clear()
+        self.__chart = EMPTY_STR
+
+    def lock_rows(self, seats: list) -> ExitStack:
+        """
+        Acquires the locks guarding changes to the rows of all the given seats. A writer first joins the journal's
+        writers, who run side by side but never alongside a compaction, then takes the row locks. Rows share a fixed
+        set of lock stripes per tier; stripes are always taken in the same order, so writers cannot deadlock.
+        Each change and its journal event are made under its row locks, so events for a seat are journaled in the
+        order the changes were made. Readers take no row locks.
+        :param seats: The seats about to be changed
+        :return: a context manager holding the locks
+        """
+        tier_order: list = list(Tier)
+        locks: dict = {}
+        for seat in seats:
+            tier: Tier = seat.get_tier()
+            stripe: int = seat.get_row_number() % self.ROW_LOCK_STRIPES
+            locks[(tier_order.index(tier), stripe)] = self.__row_locks[tier][stripe]
+        stack: ExitStack = ExitStack()
+        stack.enter_context(self.__join_journal_writers())
+        for key in sorted(locks):
+            stack.enter_context(locks[key])
+        return stack
+
+    def set_seat(self, new_seat: Seat):
+        self.__validate_not_read_only()
+        self.__validate_seat_existence(new_seat)
+        with self.lock_rows([new_seat]):
+            tier: Tier = new_seat.get_tier()
+            row_number: int = new_seat.get_row_number()
+            seat_letter: str = new_seat.get_seat_letter()
+            if (new_seat.is_taken() and self.is_seat_held(tier=tier, row_number=row_number, seat_letter=seat_letter)
+                    and not self.is_seat_booked(tier=tier, row_number=row_number, seat_letter=seat_letter)):
+                raise Exception(f"{new_seat.get_tier_row_seat_str()} is being held for another booking")
+            self.__place_seat(new_seat)
+
+    def __place_seat(self, new_seat: Seat):
+        """
+        Replaces the stored seat with new_seat; the caller validates the seat and holds its row lock
+        """
+        old_seat: Seat = self.__get_storage().get_seat(tier=new_seat.get_tier(),
+                                                       row_number=new_seat.get_row_number(),
+                                                       seat_letter=new_seat.get_seat_letter())
+        was_taken: bool = old_seat.is_taken()
+        if old_seat is not new_seat:
+            old_seat.set_owner(Seat.NO_OWNER)
+        new_seat.set_owner(self)
+        self.__commit_change(seat=new_seat, was_taken=was_taken)
+
+    def on_seat_changed(self, seat: Seat, was_taken: bool):
+        """
+        Called by a seat owned by this structure, while holding its row lock,
+        whenever a passenger is assigned to or removed from it
+        :param seat: The seat that changed
+        :param was_taken: Whether the seat was booked before the change
+        """
+        self.__validate_not_read_only()
+        stored_seat: Seat = self.__get_storage().get_seat(tier=seat.get_tier(),
+                                                          row_number=seat.get_row_number(),
+                                                          seat_letter=seat.get_seat_letter())
+        if stored_seat is not seat:
+            # the seat was a copy handed out by storage; storage, not the copy, knows what was booked before
+            was_taken = stored_seat.is_taken()
+        self.__commit_change(seat=seat, was_taken=was_taken)
+        if was_taken and not seat.is_taken() and not getattr(self.__thread_state, "moving", False):
+            self.__promote_waitlisted(seat)
+
+    def __commit_change(self, seat: Seat, was_taken: bool):
+        tier: Tier = seat.get_tier()
+        passenger: Passenger = seat.get_passenger()
+        if not was_taken and seat.is_taken() and passenger.get_fare_cents() is Passenger.NO_FARE:
+            # the fare is fixed at booking, from the load before this seat was taken
+            passenger.set_fare_cents(self.get_fare_cents(tier=tier))
+        with self.__join_journal_writers():
+            with self.__update_locks[tier]:
+                self.__get_storage().set_seat(seat)
+                self.__invalidate_row_display(tier=tier, row_number=seat.get_row_number())
+                self.__get_occupancy_index().record_change(tier=tier,
+                                                           row_number=seat.get_row_number(),
+                                                           seat_letter=seat.get_seat_letter(),
+                                                           was_taken=was_taken,
+                                                           is_taken=seat.is_taken())
+            with self.__name_index_lock:
+                # an index not yet built will read this change from storage when it is
+                if self.__name_index is not self.NO_NAME_INDEX:
+                    self.__name_index.record_change(tier=tier,
+                                                    row_number=seat.get_row_number(),
+                                                    seat_letter=seat.get_seat_letter(),
+                                                    name=PassengerNameIndex.NO_NAME if passenger == Seat.NO_PASSENGER
+                                                    else passenger.get_name())
+            if self.__debug:
+                self.verify_occupancy_index()
+            journal: BookingJournal = self.get_journal()
+            moving: bool = getattr(self.__thread_state, "moving", False)
+            if journal is not self.NO_JOURNAL and not moving and was_taken != seat.is_taken():
+                if seat.is_taken():
+                    journal.record_assign(seat)
+                else:
+                    journal.record_cancel(seat)
+
+    def __join_journal_writers(self):
+        """
+        Joins the journal's writers for the length of a change, so that a compaction never snapshots a change
+        whose event has not been written yet
+        """
+        journal: BookingJournal = self.get_journal()
+        if journal is self.NO_JOURNAL:
+            return nullcontext()
+        return journal.writing()
+
+    def get_journal(self) -> 'BookingJournal':
+        return self.__journal
+
+    def get_seat_holds(self) -> SeatHolds:
+        return self.__seat_holds
+
+    def set_seat_holds(self, seat_holds: SeatHolds):
+        self.__seat_holds = seat_holds
+
+    def hold_seat(self, tier: Tier, row_number: int, seat_letter: str,
+                  ttl_seconds: float = SeatHolds.DEFAULT_TTL_SECONDS, holder: str = EMPTY_STR) -> SeatHold:
+        """
+        Sets an open seat aside while its booking is paid for; nobody else can book or hold it until the hold is
+        confirmed (see confirm_hold), released, or ttl_seconds pass
+        """
+        self.__validate_not_read_only()
+        probe: Seat = Seat(seat_letter=seat_letter, row_number=row_number, tier=tier)
+        self.__validate_seat_existence(probe)
+        with self.lock_rows([probe]):
+            if self.is_seat_booked(tier=tier, row_number=row_number, seat_letter=seat_letter):
+                raise Exception(f"{tier.get_tier_name()} seat '{row_number}-{seat_letter}' is not available.")
+            return self.__seat_holds.place(tier=tier, row_number=row_number, seat_letter=seat_letter,
+                                           ttl_seconds=ttl_seconds, holder=holder)
+
+    def release_hold(self, hold: SeatHold) -> bool:
+        """
+        :return: True if the hold was still outstanding
+        """
+        return self.__seat_holds.release(hold)
+
+    def confirm_hold(self, hold: SeatHold, seat: Seat):
+        """
+        Books the held seat and ends the hold. A hold that has already expired is still honoured if nobody has
+        booked or held the seat since.
+        :param seat: The held seat, with its passenger assigned
+        """
+        if not hold.is_for_seat(seat):
+            raise Exception(f"The hold is for another seat, not {seat.get_tier_row_seat_str()}")
+        with self.lock_rows([seat]):
+            self.__seat_holds.release(hold)
+            self.book_seat(seat)
+
+    def is_seat_held(self, tier: Tier, row_number: int, seat_letter: str) -> bool:
+        return self.__seat_holds.get_hold(tier=tier, row_number=row_number,
+                                          seat_letter=seat_letter) is not SeatHolds.NO_HOLD
+
+    def validate_not_held(self, seat: Seat):
+        """
+        Raises an exception if the seat is held for a booking
+        """
+        if self.is_seat_held(tier=seat.get_tier(), row_number=seat.get_row_number(),
+                             seat_letter=seat.get_seat_letter()):
+            raise Exception(f"{seat.get_tier_row_seat_str()} is being held for another booking")
+
+    def get_waitlist(self) -> Waitlist:
+        return self.__waitlist
+
+    def join_waitlist(self, tier: Tier, passenger: Passenger,
+                      priority: WaitlistPriority = WaitlistPriority.standard) -> WaitlistEntry:
+        """
+        Puts a passenger on the waitlist for a tier; they are booked automatically into the next seat in the tier
+        that a cancellation or a move frees up, ahead of anyone waiting with a lower priority or who joined later
+        """
+        self.__validate_not_read_only()
+        return self.__waitlist.add(tier=tier, passenger=passenger, priority=priority)
+
+    def __promote_waitlisted(self, seat: Seat):
+        """
+        Books the next waitlisted passenger for the seat's tier into the seat, which has just been freed
+        """
+        entry: WaitlistEntry = self.__waitlist.pop_next(seat.get_tier())
+        if entry is not Waitlist.NO_ENTRY:
+            seat.assign_passenger(entry.get_passenger())
+
+    def set_journal(self, journal: 'BookingJournal'):
+        self.__journal = journal
+
+    def move_passenger(self, from_seat: Seat, to_seat: Seat, hold: SeatHold = SeatHolds.NO_HOLD):
+        """
+        Atomically moves the passenger booked in from_seat into to_seat; this is journaled as a single move.
+        Fails without changing anything if from_seat no longer holds that passenger or to_seat has been taken.
+        :param from_seat: The booked seat, as held by this structure
+        :param to_seat: The open seat to move the passenger into
+        :param hold: The hold on to_seat made for this move, if any; it ends with the move
+        """
+        self.__validate_seat_existence(to_seat)
+        with self.lock_rows([from_seat, to_seat]):
+            passenger: Passenger = from_seat.get_passenger()
+            stored_from: Seat = self.get_seat(tier=from_seat.get_tier(),
+                                              row_number=from_seat.get_row_number(),
+                                              seat_letter=from_seat.get_seat_letter())
+            if passenger == Seat.NO_PASSENGER or stored_from.get_passenger() != passenger:
+                raise Exception(f"{from_seat.get_tier_row_seat_str()} is not presently booked by that passenger")
+            if self.is_seat_booked(tier=to_seat.get_tier(),
+                                   row_number=to_seat.get_row_number(),
+                                   seat_letter=to_seat.get_seat_letter()):
+                raise Exception("That seat is already taken")
+            if hold is not SeatHolds.NO_HOLD:
+                if not hold.is_for_seat(to_seat):
+                    raise Exception(f"The hold is for another seat, not {to_seat.get_tier_row_seat_str()}")
+                self.__seat_holds.release(hold)
+            self.validate_not_held(to_seat)
+            fare_cents: int = passenger.get_fare_cents()
+            passenger.set_fare_cents(self.__get_moved_fare_cents(passenger=passenger, from_tier=from_seat.get_tier(),
+                                                                 to_tier=to_seat.get_tier()))
+            self.__thread_state.moving = True
+            try:
+                to_seat.assign_passenger(passenger)
+                from_seat.remove_passenger()
+                self.set_seat(to_seat)
+                self.set_seat(from_seat)
+            except Exception:
+                passenger.set_fare_cents(fare_cents)
+                self.__write_seat_states({SeatTransaction.get_location(from_seat): passenger,
+                                          SeatTransaction.get_location(to_seat): Seat.NO_PASSENGER})
+                raise
+            finally:
+                self.__thread_state.moving = False
+            journal: BookingJournal = self.get_journal()
+            if journal is not self.NO_JOURNAL:
+                journal.record_move(from_seat=from_seat, to_seat=to_seat)
+            self.__promote_waitlisted(from_seat)
+
+    def __get_moved_fare_cents(self, passenger: Passenger, from_tier: Tier, to_tier: Tier) -> int:
+        """
+        :return: the fare a booked passenger has paid once moved into to_tier: the fare there now, or the fare they
+        already paid if that is higher, since no refunds are given for moving to a cheaper seat
+        """
+        fare_cents: int = passenger.get_fare_cents()
+        if fare_cents is Passenger.NO_FARE:
+            fare_cents = self.get_fare_cents(tier=from_tier, seat_booked_here=True)
+        if to_tier is from_tier:
+            return fare_cents
+        return max(fare_cents, self.get_fare_cents(tier=to_tier))
+
+    def commit_transaction(self, transaction: SeatTransaction) -> list:
+        """
+        Validates every change in the batch against one consistent view of the seats it touches, then commits them
+        all, or raises an exception listing every problem and changes nothing. The batch is journaled as one event.
+        Seats it frees go to the waitlist.
+        :return: the seats the batch changed, as they now stand
+        """
+        self.__validate_not_read_only()
+        changes: list = transaction.get_changes()
+        errs: str = EMPTY_STR
+        probes: dict = {}
+        for op, from_location, to_location, passenger in changes:
+            for location in (from_location, to_location):
+                if location is not SeatTransaction.NO_LOCATION and location not in probes:
+                    probes[location] = Seat(seat_letter=location[2], row_number=location[1], tier=location[0])
+        for location, probe in probes.items():
+            try:
+                self.__validate_seat_existence(probe)
+            except Exception as e:
+                errs += f"{e}{linesep}"
+        if errs != EMPTY_STR:
+            raise Exception(errs.rstrip(linesep))
+
+        with self.lock_rows(list(probes.values())):
+            view: dict = {location: self.get_seat(tier=location[0], row_number=location[1],
+                                                  seat_letter=location[2]).get_passenger()
+                          for location in probes}
+            final: dict = {}
+            sources: set = set()
+            destinations: set = set()
+            for number, (op, from_location, to_location, passenger) in enumerate(changes, start=1):
+                if from_location is not SeatTransaction.NO_LOCATION:
+                    passenger = view[from_location]
+                    if from_location in sources:
+                        errs += f"Change {number}: {probes[from_location].get_tier_row_seat_str()} is vacated twice"
+                        errs += linesep
+                    elif passenger is Seat.NO_PASSENGER:
+                        errs += f"Change {number}: {probes[from_location].get_tier_row_seat_str()} is not booked"
+                        errs += linesep
+                    sources.add(from_location)
+                    final.setdefault(from_location, Seat.NO_PASSENGER)
+                if to_location is not SeatTransaction.NO_LOCATION:
+                    if to_location in destinations:
+                        errs += f"Change {number}: {probes[to_location].get_tier_row_seat_str()} is filled twice"
+                        errs += linesep
+                    destinations.add(to_location)
+                    final[to_location] = passenger
+            for location in destinations:
+                seat_str: str = probes[location].get_tier_row_seat_str()
+                if view[location] is not Seat.NO_PASSENGER and location not in sources:
+                    errs += f"{seat_str} is already booked by {view[location].get_name()}{linesep}"
+                elif view[location] is Seat.NO_PASSENGER and self.is_seat_held(*location):
+                    errs += f"{seat_str} is being held for another booking{linesep}"
+            if errs != EMPTY_STR:
+                raise Exception(errs.rstrip(linesep))
+
+            changed: dict = {location: passenger for location, passenger in final.items()
+                             if passenger is not view[location]}
+            # (passenger, fare before, fare after) for every passenger the batch moves
+            fares: list = [(view[from_location], view[from_location].get_fare_cents(),
+                            self.__get_moved_fare_cents(passenger=view[from_location], from_tier=from_location[0],
+                                                        to_tier=to_location[0]))
+                           for op, from_location, to_location, passenger in changes
+                           if SeatTransaction.NO_LOCATION not in (from_location, to_location)]
+            for passenger, fare_cents, moved_fare_cents in fares:
+                passenger.set_fare_cents(moved_fare_cents)
+            self.__thread_state.moving = True
+            try:
+                self.__write_seat_states(changed)
+            except Exception:
+                for passenger, fare_cents, moved_fare_cents in fares:
+                    passenger.set_fare_cents(fare_cents)
+                self.__write_seat_states({location: view[location] for location in changed})
+                raise
+            finally:
+                self.__thread_state.moving = False
+            seats: list = [self.get_seat(tier=location[0], row_number=location[1], seat_letter=location[2])
+                           for location in changed]
+            journal: BookingJournal = self.get_journal()
+            if journal is not self.NO_JOURNAL and len(seats) > 0:
+                journal.record_batch(seats)
+            for seat in seats:
+                if not seat.is_taken() and view[SeatTransaction.get_location(seat)] is not Seat.NO_PASSENGER:
+                    self.__promote_waitlisted(seat)
+            return seats
+
+    def __write_seat_states(self, states: dict):
+        """
+        Sets each location to the given passenger, or opens it, without journaling or waitlist promotion;
+        the caller has validated the locations and holds their row locks
+        :param states: (tier, row number, seat letter) -> passenger or Seat.NO_PASSENGER
+        """
+        for (tier, row_number, seat_letter), passenger in states.items():
+            seat: Seat = Seat(seat_letter=seat_letter, row_number=row_number, tier=tier)
+            if passenger is not Seat.NO_PASSENGER:
+                seat.assign_passenger(passenger)
+            self.__place_seat(seat)
+
+    def __get_occupancy_index(self) -> OccupancyIndex:
+        return self.__occupancy_index
+
+    def __get_name_index(self) -> PassengerNameIndex:
+        """
+        Builds the passenger name index from storage if it has been dropped; call with the name index lock held
+        """
+        if self.__name_index is self.NO_NAME_INDEX:
+            storage: SeatStorage = self.__get_storage()
+            name_index: PassengerNameIndex = PassengerNameIndex()
+            for tier in Tier:
+                for row_number in storage.get_occupied_rows(tier=tier):
+                    for seat_letter, seat in storage.get_occupied_seats(tier=tier, row_number=row_number).items():
+                        name_index.record_change(tier=tier, row_number=row_number, seat_letter=seat_letter,
+                                                 name=seat.get_passenger().get_name())
+            self.__name_index = name_index
+        return self.__name_index
+
+    def set_debug(self, debug: bool):
+        self.__debug = debug
+
+    def verify_occupancy_index(self):
+        """
+        Recounts every seat in storage and compares the result against the running occupancy index
+        Raises an exception describing every mismatch found
+        """
+        errs: str = EMPTY_STR
+        storage: SeatStorage = self.__get_storage()
+        index: OccupancyIndex = self.__get_occupancy_index()
+        name_index: PassengerNameIndex = self.__name_index
+        for tier in Tier:
+            tier_name: str = tier.get_tier_name()
+            if storage.count_booked_seats(tier=tier) != index.get_booked_count(tier=tier):
+                errs += (f"{tier_name}: {storage.count_booked_seats(tier=tier)} seats booked, "
+                         f"but the index counts {index.get_booked_count(tier=tier)}{linesep}")
+            if set(storage.get_full_rows(tier=tier)) != index.get_full_rows(tier=tier):
+                errs += f"{tier_name}: full rows do not match the index{linesep}"
+            if set(storage.get_empty_rows(tier=tier)) != index.get_empty_rows(tier=tier):
+                errs += f"{tier_name}: empty rows do not match the index{linesep}"
+            for row_number in self.get_row_options(tier):
+                occupied: set = set(storage.get_occupied_seats(tier=tier, row_number=row_number))
+                if occupied != index.get_occupied_letters(tier=tier, row_number=row_number):
+                    errs += f"{tier_name}: occupied seats in row {row_number} do not match the index{linesep}"
+                longest_run: int = 0
+                run: int = 0
+                for position, seat_letter in enumerate(self.get_seat_options(tier)):
+                    run = 0 if position in self.__aisles[tier] else run
+                    run = 0 if seat_letter in occupied else run + 1
+                    longest_run = max(longest_run, run)
+                if longest_run != index.get_free_runs().get_longest_run(tier=tier, row_number=row_number):
+                    errs += f"{tier_name}: open seat runs in row {row_number} do not match the index{linesep}"
+                # a name index not yet built has nothing to check
+                for seat_letter in self.get_seat_options(tier) if name_index is not self.NO_NAME_INDEX else []:
+                    name: str = PassengerNameIndex.NO_NAME
+                    if seat_letter in occupied:
+                        passenger: Passenger = self.get_seat(tier=tier, row_number=row_number,
+                                                             seat_letter=seat_letter).get_passenger()
+                        name = PassengerNameIndex.normalize_name(passenger.get_name())
+                    if name != name_index.get_name(tier=tier, row_number=row_number, seat_letter=seat_letter):
+                        errs += (f"{tier_name}: passenger name in seat {row_number}-{seat_letter} "
+                                 f"does not match the name index{linesep}")
+        if errs != EMPTY_STR:
+            errs = errs.rstrip(errs[-1])  # strip off linesep
+            raise Exception(errs)
+
+    def find_seat(self, tier: Tier, row_number: int, seat_letter: str) -> Seat:
+        """
+        Like get_seat, but raises a descriptive exception when the seat does not exist on this flight
+        """
+        self.__validate_seat_existence(Seat(seat_letter=seat_letter, row_number=row_number, tier=tier))
+        return self.get_seat(tier=tier, row_number=row_number, seat_letter=seat_letter)
+
+    def book_seat(self, new_seat: Seat):
+        """
+        Places a booked seat into this structure, refusing to replace a seat that is already booked
+        :param new_seat: A seat with its passenger already assigned
+        """
+        self.__validate_seat_existence(new_seat)
+        tier: Tier = new_seat.get_tier()
+        row_number: int = new_seat.get_row_number()
+        seat_letter: str = new_seat.get_seat_letter()
+        with self.lock_rows([new_seat]):
+            existing: Seat = self.get_seat(tier=tier, row_number=row_number, seat_letter=seat_letter)
+            if existing.is_taken():
+                raise Exception(f"{tier.get_tier_name()} seat '{row_number}-{seat_letter}' is already booked by "
+                                f"{existing.get_passenger().get_name()}")
+            self.set_seat(new_seat)
+
+    def try_book_seat(self, new_seat: Seat) -> bool:
+        """
+        Atomic compare-and-assign: books the seat only if it is still open
+        :param new_seat: A seat with its passenger already assigned
+        :return: True if the seat was booked, False if someone else has booked or is holding it
+        """
+        self.__validate_seat_existence(new_seat)
+        with self.lock_rows([new_seat]):
+            if self.is_seat_booked(tier=new_seat.get_tier(),
+                                   row_number=new_seat.get_row_number(),
+                                   seat_letter=new_seat.get_seat_letter()):
+                return False
+            if self.is_seat_held(tier=new_seat.get_tier(),
+                                 row_number=new_seat.get_row_number(),
+                                 seat_letter=new_seat.get_seat_letter()):
+                return False
+            self.set_seat(new_seat)
+            return True
+
+    def is_read_only(self) -> bool:
+        return self.__read_only
+
+    def __validate_not_read_only(self):
+        if self.is_read_only():
+            raise Exception("This seating chart is a shared layout and cannot be booked")
+
+    def __validate_seat_existence(self, new_seat):
+        errs = EMPTY_STR
+        tier: Tier = new_seat.get_tier()
+        row_number = new_seat.get_row_number()
+        seat_letter = new_seat.get_seat_letter()
+        if not self.is_valid_row(tier=tier, row_number=row_number):
+            range_first = self.get_row_options(tier)[0]
+            range_last = self.get_row_options(tier)[-1]
+            errs += f"Row number '{row_number}'-{tier.get_tier_name()} does not exist on this flight.{linesep}"
+            errs += f"Rows in {tier.get_tier_name()} range from {range_first} to {range_last}.{linesep}"
+        if not self.is_valid_seat_letter(tier=tier, seat_letter=seat_letter):
+            range_first = self.get_seat_options(tier)[0]
+            range_last = self.get_seat_options(tier)[-1]
+            errs += f"Seat letter '{seat_letter}'-({tier.get_tier_name()}) does not exist on this flight.{linesep}"
+            errs += f"Seats in {tier.get_tier_name()} range from {range_first} to {range_last}.{linesep}"
+        if errs != EMPTY_STR:
+            errs = errs.rstrip(errs[-1])  # strip off linesep
+            raise Exception(errs)
+
+    def get_seat(self, tier: Tier, row_number: int, seat_letter: str) -> Seat:
+        return self.__get_storage().get_seat(tier=tier, row_number=row_number, seat_letter=seat_letter)
+
+    def generate_chart(self) -> str:
+        return self.__generate_printout()
+
+    def get_row_options(self, tier: Tier) -> list:
+        return self.__row_options[tier]
+
+    def get_seat_options(self, tier: Tier) -> list:
+        return self.__seating_options[tier]
+
+    def is_valid_row(self, tier: Tier, row_number: int) -> bool:
+        return self.__layout.is_valid_row(tier=tier, row_number=row_number)
+
+    def is_valid_seat_letter(self, tier: Tier, seat_letter: str) -> bool:
+        return self.__layout.is_valid_seat_letter(tier=tier, seat_letter=seat_letter)
+
+    def __generate_printout(self) -> str:
+        if self.__chart == EMPTY_STR:
+            self.__chart = linesep.join(self.__iterate_chart_lines(cache_rows=True))
+        return self.__chart
+
+    def iterate_chart_lines(self):
+        """
+        Yields the chart one line at a time, without line separators. Rows that are not already cached are rendered
+        on the fly and not kept, so memory use does not grow with the number of rows.
+        """
+        return self.__iterate_chart_lines(cache_rows=False)
+
+    def write_chart(self, out):
+        """
+        Streams the chart to a file-like object, ending each line with a line separator
+        :param out: Anything with a write(str) method
+        """
+        for line in self.iterate_chart_lines():
+            out.write(line)
+            out.write(linesep)
+
+    def export_binary(self) -> bytes:
+        """
+        :return: the seat map in the compact binary encoding of SeatMapExport
+        """
+        return SeatMapExport.encode_binary(self)
+
+    def write_json(self, out):
+        """
+        Streams the seat map to a file-like object in the JSON encoding of SeatMapExport, as a single line
+        :param out: Anything with a write(str) method
+        """
+        SeatMapExport.write_json(model=self, out=out)
+
+    def export_json(self) -> str:
+        builder: StringIO = StringIO()
+        self.write_json(builder)
+        return builder.getvalue()
+
+    @classmethod
+    def load_bookings(cls, layout: AircraftLayout, bookings: list,
+                      storage_type: SeatStorageType = SeatStorageType.objects) -> 'SeatingStructure':
+        """
+        :param bookings: (tier, row number, seat letter, name, age, tax rate, fare cents, price cents) for every
+        booking, as decoded by SeatMapExport
+        :return: a new seating structure with the given layout and bookings
+        """
+        model: SeatingStructure = cls(layout=layout, storage_type=storage_type)
+        for tier, row_number, seat_letter, name, age, tax_rate, fare_cents, price_cents in bookings:
+            passenger: Passenger = Passenger(name=name, age=age)
+            passenger.set_tax_rate(tax_rate)
+            passenger.set_fare_cents(fare_cents)
+            seat: Seat = Seat(seat_letter=seat_letter, row_number=row_number, tier=tier)
+            seat.assign_passenger(passenger)
+            model.set_seat(seat)
+        return model
+
+    @classmethod
+    def load_binary(cls, data: bytes, storage_type: SeatStorageType = SeatStorageType.objects) -> 'SeatingStructure':
+        """
+        :return: a new seating structure holding the seat map exported by export_binary
+        """
+        layout, bookings, _ = SeatMapExport.decode_binary(data)
+        return cls.load_bookings(layout=layout, bookings=bookings, storage_type=storage_type)
+
+    @classmethod
+    def load_json(cls, export, storage_type: SeatStorageType = SeatStorageType.objects) -> 'SeatingStructure':
+        """
+        :param export: A seat map exported by write_json, as text or already parsed
+        """
+        layout, bookings = SeatMapExport.decode_json(export)
+        return cls.load_bookings(layout=layout, bookings=bookings, storage_type=storage_type)
+
+    def __iterate_chart_lines(self, cache_rows: bool):
+        layout: AircraftLayout = self.__layout
+        yield layout.get_top_bar()
+        for tier in Tier:
+            yield layout.get_tier_header(tier)
+            yield layout.get_seat_header(tier)
+            for row_number in self.get_row_options(tier=tier):
+                if cache_rows:
+                    yield self.__get_row_display(tier=tier, row_number=row_number)
+                else:
+                    row_display: str = self.__row_displays[tier].get(row_number, EMPTY_STR)
+                    yield row_display if row_display != EMPTY_STR else self.__generate_row_display(tier, row_number)
+        yield layout.get_bottom_line()
+
+    def __invalidate_row_display(self, tier: Tier, row_number: int):
+        self.__row_displays[tier].pop(row_number, None)
+        self.__chart = EMPTY_STR
+
+    def __get_row_display(self, tier: Tier, row_number: int) -> str:
+        row_displays: dict = self.__row_displays[tier]
+        row_display: str = row_displays.get(row_number, EMPTY_STR)
+        if row_display == EMPTY_STR:
+            row_display = self.__generate_row_display(tier=tier, row_number=row_number)
+            row_displays[row_number] = row_display
+        return row_display
+
+    def __get_storage(self) -> SeatStorage:
+        return self.__storage
+
+    def __generate_row_display(self, tier: Tier, row_number: int) -> str:
+        builder: StringIO = StringIO()
+        builder.write(self.__layout.get_row_marker(tier=tier, row_number=row_number))
+        for gap, seat_letter in zip(self.__layout.get_cell_gaps(tier), self.get_seat_options(tier=tier)):
+            seat: Seat = self.get_seat(tier=tier,
+                                       row_number=row_number,
+                                       seat_letter=seat_letter)
+            builder.write(gap)
+            builder.write(seat.generate_seat_display())
+        return builder.getvalue()
+
+    def print_occupied_seats(self, tier: Tier, row_number: int, console: Console = TERMINAL_CONSOLE):
+        console.print(f"\tOccupied Seats for {tier.get_tier_name()}: "
+              f"row-{row_number}: {make_dict_keys_str(self.get_occupied_seats(tier=tier, row_number=row_number))}")
+
+    def print_available_seats(self, tier: Tier, row_number: int, console: Console = TERMINAL_CONSOLE):
+        console.print(f"\tAvailable Seats for {tier.get_tier_name()}: row-{row_number}: "
+              f"{make_dict_keys_str(self.get_available_seats(tier=tier, row_number=row_number))}")
+
+    def print_occupied_rows(self, tier: Tier, console: Console = TERMINAL_CONSOLE):
+        console.print(f"\tOccupied Rows for {tier.get_tier_name()}: "
+              f"{make_dict_keys_str(items=self.get_occupied_rows(tier=tier))}")
+
+    def print_available_rows(self, tier: Tier, console: Console = TERMINAL_CONSOLE):
+        console.print(f"\tAvailable Rows for {tier.get_tier_name()}: "
+              f"{make_dict_keys_str(self.get_available_rows(tier=tier))}")
+
+    def is_seat_booked(self, tier: Tier, row_number: int, seat_letter: str) -> bool:
+        return self.__get_storage().is_seat_booked(tier=tier, row_number=row_number, seat_letter=seat_letter)
+
+    def get_occupied_seats(self, tier: Tier, row_number) -> dict:
+        occupied: set = self.__get_occupancy_index().get_occupied_letters(tier=tier, row_number=row_number)
+        return self.__get_seats_by_letter(tier=tier, row_number=row_number, occupied=occupied, want_taken=True)
+
+    def get_available_seats(self, tier: Tier, row_number) -> dict:
+        occupied: set = self.__get_occupancy_index().get_occupied_letters(tier=tier, row_number=row_number)
+        return self.__get_seats_by_letter(tier=tier, row_number=row_number, occupied=occupied, want_taken=False)
+
+    def __get_seats_by_letter(self, tier: Tier, row_number: int, occupied: set, want_taken: bool) -> dict:
+        rtn_dict: dict = {}
+        for seat_letter in self.get_seat_options(tier):
+            if (seat_letter in occupied) == want_taken:
+                rtn_dict[seat_letter] = self.get_seat(tier=tier, row_number=row_number, seat_letter=seat_letter)
+        return rtn_dict
+
+    def find_passenger_seats(self, name: str) -> list:
+        """
+        :return: every seat booked under the passenger's name, matched regardless of case and spacing
+        """
+        with self.__name_index_lock:
+            locations: list = self.__get_name_index().find_name(name)
+        return self.__get_seats_at(locations)
+
+    def search_passengers(self, prefix: str) -> list:
+        """
+        Unlike the other reads, name searches take the name index's lock, since a writer changing the index mid-search
+        could remove a name the search has already found
+        :return: every seat booked under a name which, or any word of which, starts with the prefix;
+        ordered by name, then seat
+        """
+        with self.__name_index_lock:
+            locations: list = self.__get_name_index().search_prefix(prefix)
+        return self.__get_seats_at(locations)
+
+    def __get_seats_at(self, locations: list) -> list:
+        return [self.get_seat(tier=tier, row_number=row_number, seat_letter=seat_letter)
+                for tier, row_number, seat_letter in locations]
+
+    def find_adjacent_seats(self, tier: Tier, num_seats: int, best_fit: bool = False) -> list:
+        """
+        Finds a block of adjacent open seats in one row, for a group travelling together
+        :param num_seats: The size of the group
+        :param best_fit: False for the first row with room, True for the row with the tightest-fitting open run
+        :return: the open seats, left to right, or an empty list if no row has that many adjacent open seats
+        """
+        run: tuple = self.__get_occupancy_index().get_free_runs().find_run(tier=tier, num_seats=num_seats,
+                                                                            best_fit=best_fit)
+        if run is FreeRunIndex.NO_RUN:
+            return []
+        row_number, start = run
+        return [self.get_seat(tier=tier, row_number=row_number, seat_letter=seat_letter)
+                for seat_letter in self.get_seat_options(tier)[start:start + num_seats]]
+
+    def get_occupied_rows(self, tier) -> dict:
+        index: OccupancyIndex = self.__get_occupancy_index()
+        return self.__get_rows(tier=tier, row_numbers=index.get_full_rows(tier) | index.get_partial_rows(tier))
+
+    def get_available_rows(self, tier) -> dict:
+        index: OccupancyIndex = self.__get_occupancy_index()
+        return self.__get_rows(tier=tier, row_numbers=index.get_empty_rows(tier) | index.get_partial_rows(tier))
+
+    def get_full_rows(self, tier: Tier) -> dict:
+        return self.__get_rows(tier=tier, row_numbers=self.__get_occupancy_index().get_full_rows(tier))
+
+    def get_empty_rows(self, tier: Tier) -> dict:
+        return self.__get_rows(tier=tier, row_numbers=self.__get_occupancy_index().get_empty_rows(tier))
+
+    def __get_rows(self, tier: Tier, row_numbers: set) -> dict:
+        storage: SeatStorage = self.__get_storage()
+        rtn_dict: dict = {}
+        for row_number in sorted(row_numbers):
+            rtn_dict[row_number] = storage.get_row(tier=tier, row_number=row_number)
+        return rtn_dict
+
+    def count_booked_seats(self, tier: Tier) -> int:
+        return self.__get_occupancy_index().get_booked_count(tier=tier)
+
+    def get_fare_ladder(self) -> FareLadder:
+        return self.__fare_ladder
+
+    def set_fare_ladder(self, fare_ladder: FareLadder):
+        """
+        :param fare_ladder: The fares to charge as each cabin fills, or NO_FARE_LADDER for the tiers' static fares
+        """
+        self.__fare_ladder = fare_ladder
+
+    def get_load_factor(self, tier: Tier, seat_booked_here: bool = False) -> float:
+        """
+        :param seat_booked_here: True if the seat being priced is itself booked here, so does not count towards
+        its own load
+        :return: the share of the tier's seats that are booked, from the occupancy index's running count
+        """
+        booked: int = self.__get_occupancy_index().get_booked_count(tier=tier) - (1 if seat_booked_here else 0)
+        return max(0, booked) / self.__tier_seat_counts[tier]
+
+    def get_fare_cents(self, tier: Tier, seat_booked_here: bool = False) -> int:
+        """
+        :return: the base fare in cents of a seat in the tier at its current load, before discounts and taxes
+        """
+        if self.__fare_ladder is self.NO_FARE_LADDER:
+            return tier.get_tier_base_cost_cents()
+        return self.__fare_ladder.get_fare_cents(tier=tier,
+                                                 load_factor=self.get_load_factor(tier=tier,
+                                                                                  seat_booked_here=seat_booked_here))
+
+    def get_open_fares(self) -> dict:
+        """
+        :return: each tier's base fare in cents for its open seats; one ladder lookup per tier, however many seats
+        are on display
+        """
+        return {tier: self.get_fare_cents(tier=tier) for tier in Tier}
+
+    def count_free_seats(self, tier: Tier, row_number: int) -> int:
+        return self.__get_occupancy_index().get_free_count(tier=tier, row_number=row_number)
+
+    def is_full(self):
+        full: bool = True
+        for tier in Tier:
+            if not self.__get_occupancy_index().is_tier_full(tier=tier):
+                full = False
+                break
+        return full
+
+    def is_empty(self):
+        empty: bool = True
+        for tier in Tier:
+            if not self.__get_occupancy_index().is_tier_empty(tier=tier):
+                empty = False
+                break
+        return empty
+
+
+class FlightInventory:
+    """
+    Holds the seating structures for many flights, keyed by flight number and date.
+    Opening a flight only records its layout; its seating structure is built the first time it is requested for
+    booking. Until then, reads are served from a single read-only template shared by every flight with that layout.
+    Flights of the same aircraft type share one compiled AircraftLayout.
+    """
+
+    def __init__(self, storage_type: SeatStorageType = SeatStorageType.bitmap):
+        self.__storage_type: SeatStorageType = storage_type
+        self.__flight_layouts: dict = {}
+        self.__layout_templates: dict = {}
+        self.__seating_structures: dict = {}
+
+    @staticmethod
+    def make_flight_key(flight_number: str, flight_date: date) -> tuple:
+        return flight_number.upper(), flight_date
+
+    def open_flight(self, flight_number: str, flight_date: date,
+                    fc_rows: int = NUM_FC_ROWS,
+                    fc_seats: int = NUM_FC_SEATS_PER_ROW,
+                    coach_rows: int = NUM_COACH_ROWS,
+                    coach_seats: int = NUM_COACH_SEATS_PER_ROW,
+                    aircraft_type: str = None):
+        """
+        :param aircraft_type: The type of aircraft flying, whose layout has been loaded (see AircraftLayout.load);
+        if not given, the flight's layout is a plain grid of the four row and seat counts
+        """
+        key: tuple = self.make_flight_key(flight_number=flight_number, flight_date=flight_date)
+        if key in self.__flight_layouts:
+            raise Exception(f"Flight {key[0]} on {flight_date} is already open for sale")
+        if aircraft_type is not None:
+            layout: AircraftLayout = AircraftLayout.get_registered(aircraft_type)
+        else:
+            layout = AircraftLayout.from_counts(fc_rows=fc_rows, fc_seats=fc_seats,
+                                                coach_rows=coach_rows, coach_seats=coach_seats)
+        self.__flight_layouts[key] = layout
+
+    def close_flight(self, flight_number: str, flight_date: date):
+        key: tuple = self.__validate_flight_exists(flight_number=flight_number, flight_date=flight_date)
+        del self.__flight_layouts[key]
+        self.__seating_structures.pop(key, None)
+
+    def has_flight(self, flight_number: str, flight_date: date) -> bool:
+        return self.make_flight_key(flight_number=flight_number, flight_date=flight_date) in self.__flight_layouts
+
+    def get_flight_keys(self) -> list:
+        return list(self.__flight_layouts.keys())
+
+    def is_materialized(self, flight_number: str, flight_date: date) -> bool:
+        key: tuple = self.make_flight_key(flight_number=flight_number, flight_date=flight_date)
+        return key in self.__seating_structures
+
+    def count_materialized(self) -> int:
+        return len(self.__seating_structures)
+
+    def get_seating_structure(self, flight_number: str, flight_date: date) -> SeatingStructure:
+        """
+        :return: the bookable seating structure for the flight, building it if this is the first request for it
+        """
+        key: tuple = self.__validate_flight_exists(flight_number=flight_number, flight_date=flight_date)
+        model: SeatingStructure = self.__seating_structures.get(key)
+        if model is None:
+            model = SeatingStructure(layout=self.__flight_layouts[key], storage_type=self.__storage_type)
+            self.__seating_structures[key] = model
+        return model
+
+    def peek_seating_structure(self, flight_number: str, flight_date: date) -> SeatingStructure:
+        """
+        :return: the flight's seating structure if it has been built, otherwise the read-only template for its layout
+        """
+        key: tuple = self.__validate_flight_exists(flight_number=flight_number, flight_date=flight_date)
+        model: SeatingStructure = self.__seating_structures.get(key)
+        if model is None:
+            model = self.__get_layout_template(self.__flight_layouts[key])
+        return model
+
+    def __get_layout_template(self, layout: AircraftLayout) -> SeatingStructure:
+        template: SeatingStructure = self.__layout_templates.get(layout)
+        if template is None:
+            # templates are always bitmap-backed; open seats are then handed out as throwaway objects
+            template = SeatingStructure(layout=layout, storage_type=SeatStorageType.bitmap, read_only=True)
+            self.__layout_templates[layout] = template
+        return template
+
+    def release_empty_flights(self) -> int:
+        """
+        Drops the seating structures of flights that have no bookings, so they fall back to the shared template.
+        A flight with seats still held, passengers waitlisted, or a journal attached is kept: its holds could still
+        be confirmed, its waitlist still promoted and its journal still written, and none of them would reach a
+        structure rebuilt from the template.
+        :return: the number of seating structures released
+        """
+        empty_keys: list = [key for key, model in self.__seating_structures.items() if self.__is_releasable(model)]
+        for key in empty_keys:
+            del self.__seating_structures[key]
+        return len(empty_keys)
+
+    @staticmethod
+    def __is_releasable(model: SeatingStructure) -> bool:
+        waitlist: Waitlist = model.get_waitlist()
+        return (model.is_empty() and model.get_seat_holds().count() == 0
+                and all(waitlist.count_waiting(tier) == 0 for tier in Tier)
+                and model.get_journal() is SeatingStructure.NO_JOURNAL)
+
+    def write_charts(self, out):
+        """
+        Streams the chart of every open flight to a file-like object, one flight after another.
+        Flights that have not been built are charted from their layout template, without building them.
+        :param out: Anything with a write(str) method
+        """
+        for flight_number, flight_date in self.get_flight_keys():
+            out.write(f"{build_app_header_string(text=f'Flight {flight_number} on {flight_date}')}{linesep}")
+            self.peek_seating_structure(flight_number=flight_number, flight_date=flight_date).write_chart(out)
+            out.write(linesep)
+
+    def write_binary_exports(self, out):
+        """
+        Streams the binary export of every open flight's seat map (see SeatMapExport.iterate_binary_flights)
+        :param out: Anything with a write(bytes) method
+        """
+        for flight_number, flight_date in self.get_flight_keys():
+            SeatMapExport.write_binary_flight(out=out, flight_number=flight_number, flight_date=flight_date,
+                                              model=self.peek_seating_structure(flight_number=flight_number,
+                                                                                flight_date=flight_date))
+
+    def write_json_exports(self, out):
+        """
+        Streams the JSON export of every open flight's seat map, one flight per line
+        (see SeatMapExport.iterate_json_flights)
+        :param out: Anything with a write(str) method
+        """
+        for flight_number, flight_date in self.get_flight_keys():
+            SeatMapExport.write_json_flight(out=out, flight_number=flight_number, flight_date=flight_date,
+                                            model=self.peek_seating_structure(flight_number=flight_number,
+                                                                              flight_date=flight_date))
+
+    def __validate_flight_exists(self, flight_number: str, flight_date: date) -> tuple:
+        key: tuple = self.make_flight_key(flight_number=flight_number, flight_date=flight_date)
+        if key not in self.__flight_layouts:
+            raise Exception(f"Flight {key[0]} on {flight_date} is not open for sale")
+        return key
+
+
+class SharedExclusiveLock:
+    """
+    A lock that many threads may share at once, or one thread may hold exclusively. Shared holds are reentrant, and
+    a thread holding the lock exclusively may also share it. A waiting exclusive holder stops new threads sharing,
+    so it is not starved by a steady stream of them.
+    """
+
+    def __init__(self):
+        self.__condition: Condition = Condition()
+        self.__shared_count: int = 0
+        self.__exclusive_owner: Thread = None
+        self.__exclusive_waiting: int = 0
+        self.__thread_state: local = local()
+
+    def is_shared_by_current_thread(self) -> bool:
+        return getattr(self.__thread_state, "depth", 0) > 0
+
+    @contextmanager
+    def shared(self):
+        depth: int = getattr(self.__thread_state, "depth", 0)
+        if depth == 0:
+            with self.__condition:
+                while (self.__exclusive_owner is not current_thread()
+                       and (self.__exclusive_owner is not None or self.__exclusive_waiting > 0)):
+                    self.__condition.wait()
+                self.__shared_count += 1
+        self.__thread_state.depth = depth + 1
+        try:
+            yield
+        finally:
+            self.__thread_state.depth = depth
+            if depth == 0:
+                with self.__condition:
+                    self.__shared_count -= 1
+                    if self.__shared_count == 0:
+                        self.__condition.notify_all()
+
+    @contextmanager
+    def exclusive(self):
+        if self.is_shared_by_current_thread():
+            raise Exception("A thread sharing the lock cannot also take it exclusively")
+        with self.__condition:
+            self.__exclusive_waiting += 1
+            try:
+                while self.__exclusive_owner is not None or self.__shared_count > 0:
+                    self.__condition.wait()
+            finally:
+                self.__exclusive_waiting -= 1
+            self.__exclusive_owner = current_thread()
+        try:
+            yield
+        finally:
+            with self.__condition:
+                self.__exclusive_owner = None
+                self.__condition.notify_all()
+
+
+class BookingJournal:
+    """
+    Durable, append-only record of the assignments, moves and cancellations made on a seating structure.
+    Every event is written as one JSON line to the journal file. Every snapshot_interval events, the booked seats
+    are written to a compact snapshot file and the journal is truncated, so recovery only ever loads the latest
+    snapshot and replays the short tail written after it.
+    """
+    JOURNAL_FILE_NAME: str = "journal.log"
+    SNAPSHOT_FILE_NAME: str = "snapshot.json"
+    ASSIGN_OP: str = "assign"
+    MOVE_OP: str = "move"
+    CANCEL_OP: str = "cancel"
+    BATCH_OP: str = "batch"
+    DEFAULT_SNAPSHOT_INTERVAL: int = 1000
+
+    def __init__(self, directory: str, snapshot_interval: int = DEFAULT_SNAPSHOT_INTERVAL, sync: bool = True):
+        """
+        :param directory: The directory holding the journal and snapshot files; created if it does not exist
+        :param snapshot_interval: The number of events to journal before a snapshot is taken
+        :param sync: True to fsync every event to disk before returning
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.__journal_path: str = os.path.join(directory, self.JOURNAL_FILE_NAME)
+        self.__snapshot_path: str = os.path.join(directory, self.SNAPSHOT_FILE_NAME)
+        self.__snapshot_interval: int = snapshot_interval
+        self.__sync: bool = sync
+        self.__sequence: int = 0
+        self.__events_since_snapshot: int = 0
+        self.__model: SeatingStructure = None
+        self.__journal_file = None
+        self.__recovered_length: int = 0
+        self.__lock: RLock = RLock()
+        self.__writers: SharedExclusiveLock = SharedExclusiveLock()
+        self.__compaction_due: bool = False
+
+    def open(self, model: SeatingStructure):
+        """
+        Restores the model from the latest snapshot and journal tail, then journals every later change to it.
+        A torn final line left by a crash is cut off first, so new events do not run on from it.
+        :param model: An empty seating structure with the same layout as the journaled one
+        """
+        self.recover(model)
+        if os.path.exists(self.__journal_path) and os.path.getsize(self.__journal_path) > self.__recovered_length:
+            os.truncate(self.__journal_path, self.__recovered_length)
+        self.__model = model
+        self.__journal_file = open(self.__journal_path, 'a', encoding='utf-8')
+        model.set_journal(self)
+
+    def close(self):
+        if self.__model is not None:
+            self.__model.set_journal(SeatingStructure.NO_JOURNAL)
+            self.__model = None
+        if self.__journal_file is not None:
+            self.__journal_file.close()
+            self.__journal_file = None
+
+    def get_sequence(self) -> int:
+        return self.__sequence
+
+    def recover(self, model: SeatingStructure) -> int:
+        """
+        :return: the number of journal events replayed on top of the snapshot
+        """
+        snapshot_sequence: int = self.__load_snapshot(model)
+        self.__sequence = snapshot_sequence
+        self.__recovered_length = 0
+        replayed: int = 0
+        if os.path.exists(self.__journal_path):
+            with open(self.__journal_path, 'rb') as journal_file:
+                lines: list = journal_file.readlines()
+            for line_number, line in enumerate(lines):
+                try:
+                    if not line.endswith(b'\n'):
+                        raise ValueError("The line was never finished")
+                    event: dict = json.loads(line)
+                except ValueError:
+                    if line_number == len(lines) - 1:
+                        break  # torn final write from a crash; the event never completed
+                    raise Exception(f"Journal '{self.__journal_path}' is corrupt at line {line_number + 1}")
+                self.__recovered_length += len(line)
+                if event["seq"] > snapshot_sequence:
+                    self.__apply_event(model=model, event=event)
+                    self.__sequence = event["seq"]
+                    replayed += 1
+        self.__events_since_snapshot = replayed
+        return replayed
+
+    def __load_snapshot(self, model: SeatingStructure) -> int:
+        if not os.path.exists(self.__snapshot_path):
+            return 0
+        with open(self.__snapshot_path, 'r', encoding='utf-8') as snapshot_file:
+            snapshot: dict = json.load(snapshot_file)
+        for tier_code, row_number, seat_letter, name, age, tax_rate, *fare in snapshot["seats"]:
+            seat: Seat = Seat(seat_letter=seat_letter, row_number=row_number, tier=Tier.get_tier(tier_code))
+            seat.assign_passenger(self.__make_passenger(name=name, age=age, tax_rate=tax_rate,
+                                                        fare_cents=fare[0] if len(fare) > 0 else Passenger.NO_FARE))
+            model.set_seat(seat)
+        return snapshot["seq"]
+
+    def __apply_event(self, model: SeatingStructure, event: dict):
+        if event["op"] == self.BATCH_OP:
+            for seat_record in event["seats"]:
+                seat: Seat = Seat(seat_letter=seat_record[2], row_number=seat_record[1],
+                                  tier=Tier.get_tier(seat_record[0]))
+                if len(seat_record) > 3:
+                    seat.assign_passenger(self.__make_passenger(name=seat_record[3], age=seat_record[4],
+                                                                tax_rate=seat_record[5],
+                                                                fare_cents=seat_record[6] if len(seat_record) > 6
+                                                                else Passenger.NO_FARE))
+                model.set_seat(seat)
+            return
+        tier: Tier = Tier.get_tier(event["tier"])
+        if event["op"] == self.ASSIGN_OP:
+            seat: Seat = Seat(seat_letter=event["seat"], row_number=event["row"], tier=tier)
+            seat.assign_passenger(self.__make_passenger(name=event["name"], age=event["age"],
+                                                        tax_rate=event["tax_rate"],
+                                                        fare_cents=event.get("fare_cents", Passenger.NO_FARE)))
+            model.set_seat(seat)
+        elif event["op"] == self.CANCEL_OP:
+            model.get_seat(tier=tier, row_number=event["row"], seat_letter=event["seat"]).remove_passenger()
+        elif event["op"] == self.MOVE_OP:
+            from_seat: Seat = model.get_seat(tier=tier, row_number=event["row"], seat_letter=event["seat"])
+            to_seat: Seat = Seat(seat_letter=event["to_seat"], row_number=event["to_row"],
+                                 tier=Tier.get_tier(event["to_tier"]))
+            model.move_passenger(from_seat=from_seat, to_seat=to_seat)
+            if event.get("fare_cents", Passenger.NO_FARE) is not Passenger.NO_FARE:
+                # the fare paid when the move was made, not whatever the ladder asks while recovering
+                to_seat.get_passenger().set_fare_cents(event["fare_cents"])
+                model.set_seat(to_seat)
+        else:
+            raise Exception(f"Unknown journal operation '{event['op']}'")
+
+    @staticmethod
+    def __make_passenger(name: str, age: int, tax_rate: float, fare_cents: int = Passenger.NO_FARE) -> Passenger:
+        passenger: Passenger = Passenger(name=name, age=age)
+        passenger.set_tax_rate(tax_rate)
+        passenger.set_fare_cents(fare_cents)
+        return passenger
+
+    @staticmethod
+    def __describe_seat(seat: Seat) -> dict:
+        return {"tier": seat.get_tier().value[2], "row": seat.get_row_number(), "seat": seat.get_seat_letter()}
+
+    def record_assign(self, seat: Seat):
+        passenger: Passenger = seat.get_passenger()
+        event: dict = self.__describe_seat(seat)
+        event["name"] = passenger.get_name()
+        event["age"] = passenger.get_age()
+        event["tax_rate"] = passenger.get_tax_rate()
+        event["fare_cents"] = passenger.get_fare_cents()
+        self.__append(op=self.ASSIGN_OP, event=event)
+
+    def record_move(self, from_seat: Seat, to_seat: Seat):
+        event: dict = self.__describe_seat(from_seat)
+        event["to_tier"] = to_seat.get_tier().value[2]
+        event["to_row"] = to_seat.get_row_number()
+        event["to_seat"] = to_seat.get_seat_letter()
+        event["fare_cents"] = to_seat.get_passenger().get_fare_cents()
+        self.__append(op=self.MOVE_OP, event=event)
+
+    def record_cancel(self, seat: Seat):
+        self.__append(op=self.CANCEL_OP, event=self.__describe_seat(seat))
+
+    def record_batch(self, seats: list):
+        """
+        Journals a committed SeatTransaction as one event, so recovery replays all of it or, after a torn write,
+        none of it
+        :param seats: Every seat the transaction changed, as it now stands
+        """
+        seat_records: list = []
+        for seat in seats:
+            seat_record: list = [seat.get_tier().value[2], seat.get_row_number(), seat.get_seat_letter()]
+            if seat.is_taken():
+                passenger: Passenger = seat.get_passenger()
+                seat_record += [passenger.get_name(), passenger.get_age(), passenger.get_tax_rate(),
+                                passenger.get_fare_cents()]
+            seat_records.append(seat_record)
+        self.__append(op=self.BATCH_OP, event={"seats": seat_records})
+
+    @contextmanager
+    def writing(self):
+        """
+        Held while a change is made to the model and its event is journaled. Any number of writers may hold it at
+        once, but none while a compaction runs, so a snapshot never holds a change whose event is still to come.
+        A compaction that fell due meanwhile runs as the last of a thread's nested holds ends.
+        """
+        with self.__writers.shared():
+            yield
+        if self.__compaction_due and not self.__writers.is_shared_by_current_thread():
+            with self.__writers.exclusive():
+                if self.__compaction_due:
+                    self.__write_snapshot()
+
+    def __append(self, op: str, event: dict):
+        with self.__lock:
+            if self.__journal_file is None:
+                raise Exception("The booking journal has not been opened")
+            self.__sequence += 1
+            event["seq"] = self.__sequence
+            event["op"] = op
+            self.__journal_file.write(f"{json.dumps(event, separators=(',', ':'))}\n")
+            self.__journal_file.flush()
+            if self.__sync:
+                os.fsync(self.__journal_file.fileno())
+            self.__events_since_snapshot += 1
+            self.__compaction_due = self.__events_since_snapshot >= self.__snapshot_interval
+        if self.__compaction_due and not self.__writers.is_shared_by_current_thread():
+            self.compact()
+
+    def compact(self):
+        """
+        Writes a snapshot of every booked seat, then truncates the journal, since every event in it is now covered.
+        Waits for the changes being made to finish, and holds off new ones until it is done.
+        """
+        with self.__writers.exclusive():
+            self.__write_snapshot()
+
+    def __write_snapshot(self):
+        with self.__lock:
+            if self.__model is None:
+                raise Exception("The booking journal has not been opened")
+            seats: list = []
+            for tier in Tier:
+                for row_number in self.__model.get_occupied_rows(tier=tier):
+                    for seat in self.__model.get_occupied_seats(tier=tier, row_number=row_number).values():
+                        passenger: Passenger = seat.get_passenger()
+                        seats.append([tier.value[2], row_number, seat.get_seat_letter(), passenger.get_name(),
+                                      passenger.get_age(), passenger.get_tax_rate(), passenger.get_fare_cents()])
+            temp_path: str = f"{self.__snapshot_path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as snapshot_file:
+                json.dump({"seq": self.__sequence, "seats": seats}, snapshot_file, separators=(',', ':'))
+                snapshot_file.flush()
+                os.fsync(snapshot_file.fileno())
+            os.replace(temp_path, self.__snapshot_path)
+            # a crash before the truncate is harmless: recovery skips events already covered by the snapshot
+            self.__journal_file.close()
+            self.__journal_file = open(self.__journal_path, 'w', encoding='utf-8')
+            self.__events_since_snapshot = 0
+            self.__compaction_due = False
+
+
+class BookingImportReport:
+
+    def __init__(self):
+        self.__imported_count: int = 0
+        self.__errors: list = []
+
+    def record_success(self):
+        self.__imported_count += 1
+
+    def record_error(self, record_number: int, message: str):
+        self.__errors.append((record_number, message))
+
+    def get_imported_count(self) -> int:
+        return self.__imported_count
+
+    def get_errors(self) -> list:
+        """
+        :return: a list of (record-number, error message) tuples, in file order
+        """
+        return self.__errors
+
+    def print_report(self, console: Console = TERMINAL_CONSOLE):
+        console.print(f"Imported {self.get_imported_count()} booking(s); {len(self.get_errors())} record(s) rejected")
+        for record_number, message in self.get_errors():
+            indented: str = message.replace(linesep, f"{linesep}\t\t")
+            console.print(f"\tRecord {record_number}: {indented}")
+
+
+BOOKING_RECORD_FIELDS: list = ["tier", "row", "seat", "name", "age", "tax_rate"]
+
+
+def read_booking_records(path: str):
+    """
+    Streams booking records from a CSV file (with a header row naming BOOKING_RECORD_FIELDS) or a JSON-lines file
+    :return: a generator of (record-number, record) pairs, where record is a dict or the exception from reading it
+    """
+    with open(path, 'r', encoding='utf-8', newline=EMPTY_STR) as record_file:
+        if path.lower().endswith('.csv'):
+            reader: csv.DictReader = csv.DictReader(record_file)
+            for record in reader:
+                yield reader.line_num, record
+        else:
+            for line_number, line in enumerate(record_file, start=1):
+                if line.strip() == EMPTY_STR:
+                    continue
+                try:
+                    yield line_number, json.loads(line)
+                except ValueError as e:
+                    yield line_number, Exception(f"Record is not valid JSON: {e}")
+
+
+def parse_tier(text: str) -> Tier:
+    """
+    Non-interactive version of Tier.get_tier: the return and quit characters are rejected like any other bad entry
+    """
+    text = text.strip()
+    try:
+        return Tier.get_tier(text)
+    except (ReturnToMainMenu, QuitApplication):
+        raise Exception(f"'{text}' is not one of the available options")
+
+
+def parse_booking_record(record: dict) -> Seat:
+    """
+    Builds a booked seat from an import record, applying the same rules as the interactive prompts
+    :return: a seat with its passenger assigned, not yet placed in any seating structure
+    """
+    if not isinstance(record, dict):
+        raise Exception(f"Record must name the fields {', '.join(BOOKING_RECORD_FIELDS)}")
+    missing: list = [field for field in BOOKING_RECORD_FIELDS if record.get(field) in (None, EMPTY_STR)]
+    if len(missing) > 0:
+        raise Exception(f"Record is missing {', '.join(missing)}")
+    tier: Tier = parse_tier(str(record["tier"]))
+    try:
+        row_number: int = int(record["row"])
+        age: int = int(record["age"])
+    except ValueError:
+        raise Exception(f"Row '{record['row']}' and age '{record['age']}' must both be integers")
+    try:
+        tax_rate: float = truncate_tax_rate(float(record["tax_rate"]))
+    except ValueError:
+        raise Exception(f"Value ({record['tax_rate']}) is not interpretable as a tax-rate")
+    passenger: Passenger = Passenger(name=str(record["name"]).strip(), age=age)
+    passenger.set_tax_rate(tax_rate)
+    seat: Seat = Seat(seat_letter=str(record["seat"]).strip().upper(), row_number=row_number, tier=tier)
+    seat.assign_passenger(passenger)
+    return seat
+
+
+def import_bookings(model: SeatingStructure, path: str) -> BookingImportReport:
+    """
+    Books every valid record of a CSV or JSON-lines file into the model in a single pass.
+    Invalid records, and records for seats that are already booked, are skipped and listed in the report.
+    """
+    report: BookingImportReport = BookingImportReport()
+    for record_number, record in read_booking_records(path):
+        try:
+            if isinstance(record, Exception):
+                raise record
+            model.book_seat(parse_booking_record(record))
+            report.record_success()
+        except Exception as e:
+            report.record_error(record_number=record_number, message=str(e))
+    return report
+
+
+class Controller(metaclass=ABCMeta):
+
+    @abstractmethod
+    def do(self, model: SeatingStructure, console: Console) -> 'Controller':
+        """
+        :param model: The model to use for this controller
+        :param console: Where the attendant's entries are read from and the prompts and results written to
+        :return: the next controller that needs to be used, or None if the program is to quit
+        """
+
+
+class QuitController(Controller):
+
+    def do(self, model: SeatingStructure, console: Console):
+        return None
+
+
+def prompt_user_for_tier(console: Console = TERMINAL_CONSOLE) -> Tier:
+    while True:
+        console.print(f"{linesep}\tWhat is the tier of the seat?")
+        for tier in Tier:
+            console.print(f"\t{tier.get_menu_display_text()}")
+        console.print(f"\t: ", end=EMPTY_STR)
+        text = console.read_line()
+        try:
+            check_for_quit_or_return(text)
+            tier = Tier.get_tier(text)
+            console.print(f"You chose '{tier.get_tier_name()}'{linesep}")
+            return tier
+        except QuitApplication:
+            raise QuitApplication
+        except ReturnToMainMenu:
+            raise ReturnToMainMenu
+        except Exception as e:
+            console.print(e)
+
+
+class ReturnToMainMenu(Exception):
+    pass
+
+
+class QuitApplication(Exception):
+    pass
+
+
+class NoMoreBookings(Exception):
     pass
 
 
@@ -676,18 +4233,19 @@ class NoBookingsExist(Exception):
     pass
 
 
-def prompt_user_for_row_number(tier: Tier, model: SeatingStructure, change_booking: bool) -> int:
+def prompt_user_for_row_number(tier: Tier, model: SeatingStructure, change_booking: bool,
+                               console: Console = TERMINAL_CONSOLE) -> int:
     while True:
         if change_booking:
-            model.print_occupied_rows(tier)
+            model.print_occupied_rows(tier, console=console)
         else:
-            model.print_available_rows(tier)
-        print(f"\tPlease select a row number{linesep}\t: ", end=EMPTY_STR)
-        row_str: str = input()
+            model.print_available_rows(tier, console=console)
+        console.print(f"\tPlease select a row number{linesep}\t: ", end=EMPTY_STR)
+        row_str: str = console.read_line()
         try:
             check_for_quit_or_return(row_str)
             row: int = int(row_str)
-            if row not in model.get_row_options(tier=tier):
+            if not model.is_valid_row(tier=tier, row_number=row):
                 raise Exception(f"{linesep}Row '{row}' is not a valid option")
             if change_booking:
                 if row in model.get_empty_rows(tier):
@@ -695,16 +4253,16 @@ def prompt_user_for_row_number(tier: Tier, model: SeatingStructure, change_booki
             else:
                 if row in model.get_full_rows(tier):
                     raise Exception(f"Row {row} in {tier.get_tier_name()} is full for this flight.")
-            print(f"Row {row} in {tier.get_tier_name()} has been selected{linesep}")
+            console.print(f"Row {row} in {tier.get_tier_name()} has been selected{linesep}")
             return row
         except QuitApplication:
             raise QuitApplication
         except ReturnToMainMenu:
             raise ReturnToMainMenu
         except ValueError:
-            print(f'Entry "{row_str}" could not be evaluated as an integer.')
+            console.print(f'Entry "{row_str}" could not be evaluated as an integer.')
         except Exception as e:
-            print(e)
+            console.print(e)
 
 
 def check_for_quit_or_return(row_str):
@@ -714,19 +4272,20 @@ def check_for_quit_or_return(row_str):
         raise ReturnToMainMenu
 
 
-def prompt_user_for_seat_letter(tier: Tier, row_number: int, model: SeatingStructure, change_booking: bool) -> str:
+def prompt_user_for_seat_letter(tier: Tier, row_number: int, model: SeatingStructure, change_booking: bool,
+                                console: Console = TERMINAL_CONSOLE) -> str:
     while True:
         if change_booking:
-            model.print_occupied_seats(tier=tier, row_number=row_number)
+            model.print_occupied_seats(tier=tier, row_number=row_number, console=console)
         else:
-            model.print_available_seats(tier=tier, row_number=row_number)
-        print(f"\tPlease select a seat letter{linesep}\t: ", end=EMPTY_STR)
-        seat_str: str = input().upper()
+            model.print_available_seats(tier=tier, row_number=row_number, console=console)
+        console.print(f"\tPlease select a seat letter{linesep}\t: ", end=EMPTY_STR)
+        seat_str: str = console.read_line().upper()
         try:
             check_for_quit_or_return(seat_str)
             if seat_str == EMPTY_STR:
                 raise Exception("No entry detected")
-            if seat_str not in model.get_seat_options(tier=tier):
+            if not model.is_valid_seat_letter(tier=tier, seat_letter=seat_str):
                 raise_invalid_option_exception(seat_str)
             if change_booking:
                 if not model.is_seat_booked(tier=tier, row_number=row_number, seat_letter=seat_str):
@@ -734,24 +4293,45 @@ def prompt_user_for_seat_letter(tier: Tier, row_number: int, model: SeatingStruc
                         f"{tier.get_tier_name()} seat '{row_number}-{seat_str}' does not have a passenger assigned to "
                         f"it.")
             else:
-                if model.is_seat_booked(tier=tier, row_number=row_number, seat_letter=seat_str):
+                if (model.is_seat_booked(tier=tier, row_number=row_number, seat_letter=seat_str)
+                        or model.is_seat_held(tier=tier, row_number=row_number, seat_letter=seat_str)):
                     raise Exception(
                         f"{tier.get_tier_name()} seat '{row_number}-{seat_str}' is not available.")
-            print(f"You chose seat-letter '{seat_str}'")
+            console.print(f"You chose seat-letter '{seat_str}'")
             return seat_str
         except QuitApplication:
             raise QuitApplication
         except ReturnToMainMenu:
             raise ReturnToMainMenu
         except Exception as e:
-            print(e)
+            console.print(e)
+
+
+def prompt_user_for_waitlist_priority(console: Console = TERMINAL_CONSOLE) -> WaitlistPriority:
+    while True:
+        console.print(f"{linesep}\tWhat is the passenger's waitlist priority?")
+        for priority in WaitlistPriority:
+            console.print(f"\t{priority.get_menu_display_text()}")
+        console.print(f"\t: ", end=EMPTY_STR)
+        text = console.read_line()
+        try:
+            check_for_quit_or_return(text)
+            priority = WaitlistPriority.get_priority(text)
+            console.print(f"You chose '{priority.get_priority_name()}'{linesep}")
+            return priority
+        except QuitApplication:
+            raise QuitApplication
+        except ReturnToMainMenu:
+            raise ReturnToMainMenu
+        except Exception as e:
+            console.print(e)
 
 
-def prompt_user_for_passenger_name() -> str:
+def prompt_user_for_passenger_name(console: Console = TERMINAL_CONSOLE) -> str:
     while True:
-        print(f"{linesep}\tWhat is the passenger's name?{linesep}\t:", end=EMPTY_STR)
+        console.print(f"{linesep}\tWhat is the passenger's name?{linesep}\t:", end=EMPTY_STR)
+        name_str: str = console.read_line()
         try:
-            name_str: str = input()
             check_for_quit_or_return(name_str)
             rtn_name: str = EMPTY_STR
             words: list = name_str.split()
@@ -769,18 +4349,18 @@ def prompt_user_for_passenger_name() -> str:
         except ReturnToMainMenu:
             raise ReturnToMainMenu
         except Exception as e:
-            print(e)
+            console.print(e)
 
 
-def print_exiting_guidance():
-    print(f"\t{QUIT_GUIDANCE_TEXT}")
-    print(f"\t{RETURN_GUIDANCE_TEXT}")
+def print_exiting_guidance(console: Console = TERMINAL_CONSOLE):
+    console.print(f"\t{QUIT_GUIDANCE_TEXT}")
+    console.print(f"\t{RETURN_GUIDANCE_TEXT}")
 
 
-def prompt_user_for_passenger_age() -> int:
+def prompt_user_for_passenger_age(console: Console = TERMINAL_CONSOLE) -> int:
     while True:
-        print(f"\tWhat is the passenger's age? ({MIN_AGE} to {MAX_AGE}){linesep}\t:", end=EMPTY_STR)
-        age_str: str = input()
+        console.print(f"\tWhat is the passenger's age? ({MIN_AGE} to {MAX_AGE}){linesep}\t:", end=EMPTY_STR)
+        age_str: str = console.read_line()
         try:
             check_for_quit_or_return(age_str)
             age: int = int(age_str)
@@ -792,82 +4372,101 @@ def prompt_user_for_passenger_age() -> int:
         except ReturnToMainMenu:
             raise ReturnToMainMenu
         except ValueError:
-            print(f'Entry "{age_str}" could not be evaluated as an integer.')
+            console.print(f'Entry "{age_str}" could not be evaluated as an integer.')
         except Exception as e:
-            print(e)
+            console.print(e)
 
 
-def obtain_passenger_from_attendant() -> Passenger:
-    name: str = prompt_user_for_passenger_name()
-    age: int = prompt_user_for_passenger_age()
+def obtain_passenger_from_attendant(console: Console = TERMINAL_CONSOLE) -> Passenger:
+    name: str = prompt_user_for_passenger_name(console=console)
+    age: int = prompt_user_for_passenger_age(console=console)
     passenger: Passenger = Passenger(name=name, age=age)
-    print(f'Passenger "{passenger}" (age {age}) has been created')
+    console.print(f'Passenger "{passenger}" (age {age}) has been created')
     return passenger
 
 
-def obtain_seat_from_attendant(model: SeatingStructure, change_booking: bool) -> Seat:
-    tier: Tier = prompt_user_for_tier()
-    row_number = prompt_user_for_row_number(tier=tier, model=model, change_booking=change_booking)
+def obtain_seat_from_attendant(model: SeatingStructure, change_booking: bool,
+                               console: Console = TERMINAL_CONSOLE) -> Seat:
+    tier: Tier = prompt_user_for_tier(console=console)
+    row_number = prompt_user_for_row_number(tier=tier, model=model, change_booking=change_booking, console=console)
     seat_letter = prompt_user_for_seat_letter(tier=tier, row_number=row_number, model=model,
-                                              change_booking=change_booking)
+                                              change_booking=change_booking, console=console)
     seat: Seat = Seat(tier=tier, row_number=row_number, seat_letter=seat_letter)
-    print(f"{seat.get_tier_row_seat_str()} has been selected")
+    console.print(f"{seat.get_tier_row_seat_str()} has been selected")
     return seat
 
 
-def prompt_user_for_tax_rate() -> float:
+def truncate_tax_rate(rate: float) -> float:
+    r: int = floor(rate * 1000)
+    return r / 1000
+
+
+def prompt_user_for_tax_rate(console: Console = TERMINAL_CONSOLE) -> float:
     while True:
-        print(f'{linesep}\tPlease enter the tax rate for this transaction.')
-        rate_str = input(f'\tRates are entered in decimal form. ("0.8" = 8.0%){linesep}\t: ')
+        console.print(f'{linesep}\tPlease enter the tax rate for this transaction.')
+        rate_str = console.read_line(f'\tRates are entered in decimal form. ("0.8" = 8.0%){linesep}\t: ')
         try:
             check_for_quit_or_return(rate_str)
-            rate_f: float = float(rate_str)
-            r: int = floor(rate_f * 1000)
-            rate_f: float = r / 1000
+            rate_f: float = truncate_tax_rate(float(rate_str))
             rate_str = f'{rate_f * 100}%'
-            print(f"Rate Entered is {rate_str}")
+            console.print(f"Rate Entered is {rate_str}")
             return rate_f
         except ReturnToMainMenu:
             raise ReturnToMainMenu()
         except QuitApplication:
             raise QuitApplication()
         except ():
-            print(f'Value ({rate_str}) is not interpretable as a tax-rate')
-            print(f'Please only enter numerical values, and a decimal place if appropriate')
+            console.print(f'Value ({rate_str}) is not interpretable as a tax-rate')
+            console.print(f'Please only enter numerical values, and a decimal place if appropriate')
         except Exception as e:
-            print(e)
-
-
-def handle_money_transfer(to_seat: Seat, from_seat: Seat = None):
-    owed_cents: int = to_seat.get_price_cents() if from_seat is None else from_seat.compare_cost_cents(to_seat)
+            console.print(e)
+
+
+def handle_money_transfer(to_seat: Seat, from_seat: Seat = None, model: 'SeatingStructure' = Seat.NO_OWNER,
+                          console: Console = TERMINAL_CONSOLE):
+    """
+    :param model: The seating structure whose fares apply, for seats not yet placed in it
+    """
+    if from_seat is None and to_seat.get_passenger().get_fare_cents() is Passenger.NO_FARE:
+        # the passenger is charged the fare on offer now, and keeps it however the cabin fills afterwards
+        to_seat.get_passenger().set_fare_cents(to_seat.get_fare_cents(model=model))
+    owed_cents: int = (to_seat.get_price_cents(model=model) if from_seat is None
+                       else from_seat.compare_cost_cents(to_seat, model=model))
     if owed_cents < 1:
-        print("No money is owed")
+        console.print("No money is owed")
         return
     while True:
-        print(f"{linesep}Amount owed is {MoneyManipulator.convert_cents_to_dollar_str(owed_cents)}")
-        print(f'\tPlease enter amount paid by customer{linesep}\t:', end=EMPTY_STR)
-        amt_str = input()
+        console.print(f"{linesep}Amount owed is {MoneyManipulator.convert_cents_to_dollar_str(owed_cents)}")
+        console.print(f'\tPlease enter amount paid by customer{linesep}\t:', end=EMPTY_STR)
+        amt_str = console.read_line()
         try:
             check_for_quit_or_return(amt_str)
             amt: float = float(amt_str)
             amt_cents: int = floor(amt * 100)
             diff = amt_cents - owed_cents
+            drawer: CashDrawer = CashDrawer.get_active()
             if diff < 0:
                 owed_str: str = MoneyManipulator.convert_cents_to_dollar_str(amt_cents)
+                if drawer is not CashDrawer.NO_DRAWER:
+                    drawer.take_payment(paid_cents=amt_cents)
                 owed_cents -= amt_cents
                 raise Exception(f"{owed_str} is insufficient to cover the cost of this booking")
+            elif drawer is not CashDrawer.NO_DRAWER:
+                change: dict = drawer.take_payment(paid_cents=amt_cents, change_cents=diff)
+                MoneyManipulator.print_change(change, original_amount_cents=diff, console=console)
+                break
             else:
-                MoneyManipulator.make_change(amount_cents=diff, do_print=True)
+                MoneyManipulator.make_change(amount_cents=diff, do_print=True, console=console)
                 break
         except ReturnToMainMenu:
             raise ReturnToMainMenu()
         except QuitApplication:
             raise QuitApplication()
         except ValueError:
-            print(f'Value ({amt_str}) could not be converted to a dollar amount')
-            print(f'Please only enter numerical values, and a decimal place if appropriate')
+            console.print(f'Value ({amt_str}) could not be converted to a dollar amount')
+            console.print(f'Please only enter numerical values, and a decimal place if appropriate')
         except Exception as e:
-            print(e)
+            console.print(e)
 
 
 def check_model_full(model: SeatingStructure):
@@ -882,21 +4481,49 @@ def check_model_empty(model: SeatingStructure):
 
 class NewBookingController(Controller):
 
-    def do(self, model: SeatingStructure) -> Controller:
+    def do(self, model: SeatingStructure, console: Console) -> Controller:
         try:
             check_model_full(model)
-            print(f"{linesep}Create A New Booking:")
-            print_exiting_guidance()
-            seat: Seat = obtain_seat_from_attendant(model=model, change_booking=False)
-            passenger: Passenger = obtain_passenger_from_attendant()
-            seat.assign_passenger(passenger)
-            tax_rate: float = prompt_user_for_tax_rate()
-            passenger.set_tax_rate(tax_rate)
-            handle_money_transfer(seat)
-            model.set_seat(seat)
-            print(f"{linesep}Booked: {seat.get_full_seat_description()}")
+            console.print(f"{linesep}Create A New Booking:")
+            print_exiting_guidance(console=console)
+            seat: Seat = obtain_seat_from_attendant(model=model, change_booking=False, console=console)
+            hold: SeatHold = model.hold_seat(tier=seat.get_tier(), row_number=seat.get_row_number(),
+                                             seat_letter=seat.get_seat_letter())
+            try:
+                passenger: Passenger = obtain_passenger_from_attendant(console=console)
+                seat.assign_passenger(passenger)
+                tax_rate: float = prompt_user_for_tax_rate(console=console)
+                passenger.set_tax_rate(tax_rate)
+                handle_money_transfer(seat, model=model, console=console)
+                model.confirm_hold(hold=hold, seat=seat)
+            finally:
+                model.release_hold(hold)
+            console.print(f"{linesep}Booked: {seat.get_full_seat_description()}")
         except NoMoreBookings:
-            print("This is a full flight; no more bookings can be made unless there is a cancellation.")
+            console.print("This is a full flight; no more bookings can be made unless there is a cancellation.")
+            return WaitlistController()
+        except ReturnToMainMenu:
+            pass
+        except QuitApplication:
+            return QuitController()
+        except Exception as e:
+            console.print(e)
+        return MainController()
+
+
+class WaitlistController(Controller):
+
+    def do(self, model: SeatingStructure, console: Console) -> Controller:
+        console.print(f"{linesep}Add A Passenger To The Waitlist:")
+        print_exiting_guidance(console=console)
+        try:
+            tier: Tier = prompt_user_for_tier(console=console)
+            passenger: Passenger = obtain_passenger_from_attendant(console=console)
+            passenger.set_tax_rate(prompt_user_for_tax_rate(console=console))
+            priority: WaitlistPriority = prompt_user_for_waitlist_priority(console=console)
+            entry: WaitlistEntry = model.join_waitlist(tier=tier, passenger=passenger, priority=priority)
+            console.print(f'"{passenger.get_name()}" is number {model.get_waitlist().get_position(entry)} '
+                  f'on the {tier.get_tier_name()} waitlist')
         except ReturnToMainMenu:
             pass
         except QuitApplication:
@@ -904,29 +4531,35 @@ class NewBookingController(Controller):
         return MainController()
 
 
-def move_passenger(to_seat: Seat, from_seat: Seat, model: SeatingStructure):
-    to_seat.assign_passenger(from_seat.get_passenger())
-    from_seat.remove_passenger()
-    model.set_seat(to_seat)
-    model.set_seat(from_seat)
+def print_waitlist_promotion(seat: Seat, console: Console = TERMINAL_CONSOLE):
+    """
+    Reports the waitlisted passenger, if any, who was booked into a seat as soon as it was freed
+    """
+    if seat.is_taken():
+        console.print(f"Booked from the waitlist: {seat.get_full_seat_description()}")
+
+
+def move_passenger(to_seat: Seat, from_seat: Seat, model: SeatingStructure, hold: SeatHold = SeatHolds.NO_HOLD):
+    model.move_passenger(from_seat=from_seat, to_seat=to_seat, hold=hold)
 
 
 class DeleteBookingController(Controller):
 
-    def do(self, model: SeatingStructure) -> Controller:
-        print(f"{linesep}Delete An Existing Booking:")
-        print_exiting_guidance()
+    def do(self, model: SeatingStructure, console: Console) -> Controller:
+        console.print(f"{linesep}Delete An Existing Booking:")
+        print_exiting_guidance(console=console)
         try:
             check_model_empty(model=model)
-            seat: Seat = obtain_seat_from_attendant(model=model, change_booking=True)
+            seat: Seat = obtain_seat_from_attendant(model=model, change_booking=True, console=console)
             tier: Tier = seat.get_tier()
             row_number: int = seat.get_row_number()
             seat_letter: str = seat.get_seat_letter()
             seat = model.get_seat(tier=tier, row_number=row_number, seat_letter=seat_letter)
             seat.remove_passenger()
-            print(f'{seat.get_tier_row_seat_str()} booking removed')
+            console.print(f'{seat.get_tier_row_seat_str()} booking removed')
+            print_waitlist_promotion(seat, console=console)
         except NoBookingsExist:
-            print("There are no bookings to delete.")
+            console.print("There are no bookings to delete.")
         except ReturnToMainMenu:
             pass
         except QuitApplication:
@@ -936,48 +4569,104 @@ class DeleteBookingController(Controller):
 
 class ChangeBookingController(Controller):
 
-    def do(self, model: SeatingStructure) -> Controller:
-        print(f"{linesep}Change An Existing Booking:")
-        print_exiting_guidance()
+    def do(self, model: SeatingStructure, console: Console) -> Controller:
+        console.print(f"{linesep}Change An Existing Booking:")
+        print_exiting_guidance(console=console)
         try:
             check_model_full(model)
             check_model_empty(model)
-            print("Please provide the information for the existing booking:")
-            from_seat: Seat = obtain_seat_from_attendant(model=model, change_booking=True)
-            print("Please provide the information that for the seat that is desired:")
-            to_seat: Seat = obtain_seat_from_attendant(model=model, change_booking=False)
+            console.print("Please provide the information for the existing booking:")
+            from_seat: Seat = obtain_seat_from_attendant(model=model, change_booking=True, console=console)
+            console.print("Please provide the information that for the seat that is desired:")
+            to_seat: Seat = obtain_seat_from_attendant(model=model, change_booking=False, console=console)
             row_number: int = from_seat.get_row_number()
             seat_letter: str = from_seat.get_seat_letter()
             tier: Tier = from_seat.get_tier()
             from_seat = model.get_seat(row_number=row_number, seat_letter=seat_letter, tier=tier)
-            diff: int = from_seat.compare_cost_cents(to_seat=to_seat)
-            handle_money_transfer(to_seat=to_seat, from_seat=from_seat)
-            move_passenger(from_seat=from_seat, model=model, to_seat=to_seat)
-            print(f'Passenger "{to_seat.get_passenger().get_name()}" '
+            hold: SeatHold = model.hold_seat(tier=to_seat.get_tier(), row_number=to_seat.get_row_number(),
+                                             seat_letter=to_seat.get_seat_letter())
+            try:
+                diff: int = from_seat.compare_cost_cents(to_seat=to_seat, model=model)
+                handle_money_transfer(to_seat=to_seat, from_seat=from_seat, model=model, console=console)
+                move_passenger(from_seat=from_seat, model=model, to_seat=to_seat, hold=hold)
+            finally:
+                model.release_hold(hold)
+            console.print(f'Passenger "{to_seat.get_passenger().get_name()}" '
                   f'moved from {from_seat.get_tier_row_seat_str()} '
                   f'to {to_seat.get_tier_row_seat_str()} ', end=EMPTY_STR)
 
             if diff == 0:
-                print(f' at no charge."')
+                console.print(f' at no charge."')
             else:
-                print(f" for an additional cost of {MoneyManipulator.convert_cents_to_dollar_str(diff)}")
+                console.print(f" for an additional cost of {MoneyManipulator.convert_cents_to_dollar_str(diff)}")
+            print_waitlist_promotion(from_seat, console=console)
         except NoMoreBookings:
-            print("This is a full flight; There are no seats to move to.")
+            console.print("This is a full flight; There are no seats to move to.")
         except NoBookingsExist:
-            print("No bookings exist to change.")
+            console.print("No bookings exist to change.")
         except ReturnToMainMenu:
             pass
         except QuitApplication:
             return QuitController()
         except Exception as e:
-            print(e)
+            console.print(e)
+        return MainController()
+
+
+class FindPassengerController(Controller):
+
+    def do(self, model: SeatingStructure, console: Console) -> Controller:
+        console.print(f"{linesep}Find A Passenger:")
+        print_exiting_guidance(console=console)
+        try:
+            check_model_empty(model)
+            while True:
+                console.print(f"\tPlease enter the passenger's name, or the start of any part of it{linesep}\t: ",
+                      end=EMPTY_STR)
+                text: str = console.read_line().strip()
+                check_for_quit_or_return(text)
+                seats: list = model.search_passengers(prefix=text)
+                if len(seats) > 0:
+                    break
+                console.print(f'No bookings found for "{text}"')
+            for seat in seats:
+                console.print(f'\t{seat.get_tier_row_seat_str()}: "{seat.get_passenger().get_name()}"')
+        except NoBookingsExist:
+            console.print("There are no bookings to search.")
+        except ReturnToMainMenu:
+            pass
+        except QuitApplication:
+            return QuitController()
         return MainController()
 
 
 class PrintBookingController(Controller):
-    def do(self, model: SeatingStructure) -> Controller:
-        print(f"{linesep}\tBookings Chart:")
-        print(f"{linesep}{model.generate_chart()}")
+    def do(self, model: SeatingStructure, console: Console) -> Controller:
+        console.print(f"{linesep}\tBookings Chart:")
+        console.print(f"{linesep}{model.generate_chart()}")
+        return MainController()
+
+
+class ImportBookingsController(Controller):
+
+    def do(self, model: SeatingStructure, console: Console) -> Controller:
+        console.print(f"{linesep}Import Bookings From A File:")
+        print_exiting_guidance(console=console)
+        while True:
+            console.print(f"\tPlease enter the path of a .csv or .jsonl booking file{linesep}\t: ", end=EMPTY_STR)
+            path: str = console.read_line().strip()
+            try:
+                check_for_quit_or_return(path)
+                if not os.path.isfile(path):
+                    raise Exception(f"'{path}' is not a file")
+                import_bookings(model=model, path=path).print_report(console=console)
+                break
+            except ReturnToMainMenu:
+                break
+            except QuitApplication:
+                return QuitController()
+            except Exception as e:
+                console.print(e)
         return MainController()
 
 
@@ -989,7 +4678,9 @@ class MainMenuChoices(Enum):
     new_booking = ["(N)ew Booking", 'N', NewBookingController]
     change_booking = ["(C)hange Booking", 'C', ChangeBookingController]
     delete_booking = ["(D)elete Booking", 'D', DeleteBookingController]
+    find_passenger = ["(F)ind Passenger", 'F', FindPassengerController]
     print_bookings = ["(P)rint Bookings Chart", 'P', PrintBookingController]
+    import_bookings = ["(I)mport Bookings", 'I', ImportBookingsController]
     quit = ["(Q)uit", 'Q', QuitController]
 
     def get_controller(self) -> Controller:
@@ -1013,24 +4704,205 @@ class MainController(Controller):
     def __init__(self):
         super().__init__()
 
-    def do(self, model: SeatingStructure) -> Controller:
-        print(f"{linesep}Main Menu")
-        return self.prompt_for_choice()
+    def do(self, model: SeatingStructure, console: Console) -> Controller:
+        console.print(f"{linesep}Main Menu")
+        return self.prompt_for_choice(console=console)
 
     @staticmethod
-    def prompt_for_choice() -> Controller:
+    def prompt_for_choice(console: Console = TERMINAL_CONSOLE) -> Controller:
         choice: MainMenuChoices
         while True:
-            print(f"\tOptions:")
+            console.print(f"\tOptions:")
             for member in MainMenuChoices:
-                print(f"\t{member.get_menu_text()}")
-            print(f'\t: ', end=EMPTY_STR)
-            text: str = input()
+                console.print(f"\t{member.get_menu_text()}")
+            console.print(f'\t: ', end=EMPTY_STR)
+            text: str = console.read_line()
             try:
                 choice = MainMenuChoices.get_by_letter(text=text)
                 return choice.get_controller()
             except Exception as e:
-                print(e)
+                console.print(e)
+
+
+class Instrumentation:
+    """
+    Opt-in timing of the hot paths: controller steps, prompt loops, model queries and updates, pricing and chart
+    rendering. Nothing is wrapped until enable() is called; it swaps timed wrappers in for the instrumented
+    functions, and disable() puts the originals back, so instrumentation that is off costs nothing per call.
+    Each metric keeps a call count, the cumulative and maximum time, and its most recent SAMPLE_LIMIT timings
+    for percentiles. It also keeps its self time, which leaves out the time spent in instrumented calls it made,
+    so self times add up across metrics without counting nested calls twice.
+    """
+    SAMPLE_LIMIT: int = 4096
+    PERCENTILES: tuple = (50, 90, 99)
+    METRIC_NAME: str = "chaffey_call_seconds"
+    SELF_METRIC_NAME: str = "chaffey_call_self_seconds_total"
+    MODEL_QUERIES: tuple = ("get_available_rows", "get_occupied_rows", "get_full_rows", "get_empty_rows",
+                            "get_available_seats", "get_occupied_seats", "is_seat_booked", "is_full", "is_empty",
+                            "count_booked_seats", "find_adjacent_seats", "find_passenger_seats", "search_passengers")
+    MODEL_UPDATES: tuple = ("set_seat", "book_seat", "try_book_seat", "move_passenger", "commit_transaction")
+    CHART_CALLS: tuple = ("generate_chart", "write_chart", "_SeatingStructure__generate_row_display")
+    PROMPT_PREFIXES: tuple = ("prompt_user_for_", "obtain_")
+
+    def __init__(self):
+        self.__metrics: dict = {}
+        self.__originals: list = []
+        self.__lock: Lock = Lock()
+        self.__dump_stop: Event = None
+        self.__thread_state: local = local()
+
+    def is_enabled(self) -> bool:
+        return len(self.__originals) > 0
+
+    def __get_targets(self) -> list:
+        """
+        :return: (owner, attribute name, metric name) for every instrumented function
+        """
+        module = sys.modules[__name__]
+        targets: list = []
+        controllers: list = list(Controller.__subclasses__())
+        while len(controllers) > 0:
+            controller = controllers.pop()
+            controllers += controller.__subclasses__()
+            if "do" in vars(controller):
+                targets.append((controller, "do", f"controller.{controller.__name__}"))
+        for name, value in vars(module).items():
+            if callable(value) and name.startswith(self.PROMPT_PREFIXES):
+                targets.append((module, name, f"prompt.{name}"))
+        for name in self.MODEL_QUERIES + self.MODEL_UPDATES:
+            targets.append((SeatingStructure, name, f"model.{name}"))
+        for name in self.CHART_CALLS:
+            targets.append((SeatingStructure, name, f"chart.{name.replace('_SeatingStructure__', EMPTY_STR)}"))
+        targets += [(Seat, "get_price_cents", "pricing.get_price_cents"),
+                    (CashDrawer, "make_change", "pricing.cash_drawer_make_change"),
+                    (Seat, "compare_cost_cents", "pricing.compare_cost_cents"),
+                    (FarePricer, "price_cents_batch", "pricing.price_cents_batch"),
+                    (MoneyManipulator, "make_change", "pricing.make_change")]
+        return targets
+
+    def enable(self):
+        if self.is_enabled():
+            return
+        for owner, attribute, metric_name in self.__get_targets():
+            original = vars(owner)[attribute]
+            if isinstance(original, (classmethod, staticmethod)):
+                wrapper = type(original)(self.__wrap(function=original.__func__, metric_name=metric_name))
+            else:
+                wrapper = self.__wrap(function=original, metric_name=metric_name)
+            setattr(owner, attribute, wrapper)
+            self.__originals.append((owner, attribute, original))
+
+    def disable(self):
+        for owner, attribute, original in reversed(self.__originals):
+            setattr(owner, attribute, original)
+        self.__originals = []
+
+    def __wrap(self, function, metric_name: str):
+        record = self.record
+        thread_state: local = self.__thread_state
+
+        @wraps(function)
+        def timed(*args, **kwargs):
+            # one entry per instrumented call in progress on this thread, totalling the time of its nested calls
+            nested_seconds: list = thread_state.__dict__.setdefault("nested_seconds", [])
+            nested_seconds.append(0.0)
+            start: float = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                seconds: float = perf_counter() - start
+                self_seconds: float = seconds - nested_seconds.pop()
+                if len(nested_seconds) > 0:
+                    nested_seconds[-1] += seconds
+                record(metric_name=metric_name, seconds=seconds, self_seconds=self_seconds)
+
+        return timed
+
+    def record(self, metric_name: str, seconds: float, self_seconds: float = None):
+        with self.__lock:
+            metric: dict = self.__metrics.get(metric_name)
+            if metric is None:
+                metric = {"count": 0, "total": 0.0, "self": 0.0, "max": 0.0,
+                          "samples": deque(maxlen=self.SAMPLE_LIMIT)}
+                self.__metrics[metric_name] = metric
+            metric["count"] += 1
+            metric["total"] += seconds
+            metric["self"] += seconds if self_seconds is None else self_seconds
+            metric["max"] = max(metric["max"], seconds)
+            metric["samples"].append(seconds)
+
+    def reset(self):
+        with self.__lock:
+            self.__metrics = {}
+
+    def get_snapshot(self) -> dict:
+        """
+        :return: for every metric recorded so far, its call count, total, self, mean and maximum seconds,
+        and p50/p90/p99 seconds over its recent calls
+        """
+        with self.__lock:
+            metrics: list = [(name, metric["count"], metric["total"], metric["self"], metric["max"],
+                              sorted(metric["samples"])) for name, metric in self.__metrics.items()]
+        snapshot: dict = {}
+        for name, count, total, self_total, longest, samples in sorted(metrics):
+            summary: dict = {"count": count, "total_seconds": total, "self_seconds": self_total,
+                             "mean_seconds": total / count, "max_seconds": longest}
+            for percentile in self.PERCENTILES:
+                rank: int = max(0, ceil(percentile / 100 * len(samples)) - 1)
+                summary[f"p{percentile}_seconds"] = samples[rank]
+            snapshot[name] = summary
+        return snapshot
+
+    def format_text(self) -> str:
+        """
+        :return: the snapshot in the Prometheus text exposition format: a summary metric and a self time counter,
+        both labelled by call
+        """
+        snapshot: dict = self.get_snapshot()
+        lines: list = [f"# HELP {self.METRIC_NAME} Time spent in instrumented calls",
+                       f"# TYPE {self.METRIC_NAME} summary"]
+        for name, summary in snapshot.items():
+            for percentile in self.PERCENTILES:
+                lines.append(f'{self.METRIC_NAME}{{call="{name}",quantile="{percentile / 100}"}} '
+                             f'{summary[f"p{percentile}_seconds"]!r}')
+            lines.append(f'{self.METRIC_NAME}_sum{{call="{name}"}} {summary["total_seconds"]!r}')
+            lines.append(f'{self.METRIC_NAME}_count{{call="{name}"}} {summary["count"]}')
+        lines += [f"# HELP {self.SELF_METRIC_NAME} Time spent in instrumented calls, less their instrumented calls",
+                  f"# TYPE {self.SELF_METRIC_NAME} counter"]
+        for name, summary in snapshot.items():
+            lines.append(f'{self.SELF_METRIC_NAME}{{call="{name}"}} {summary["self_seconds"]!r}')
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str):
+        """
+        Writes the metrics to a file, replacing it whole so a reader never sees a partial dump
+        """
+        temp_path: str = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as metrics_file:
+            metrics_file.write(self.format_text())
+        os.replace(temp_path, path)
+
+    def start_periodic_dump(self, path: str, interval_seconds: float):
+        """
+        Dumps the metrics to the file every interval_seconds from a background thread, until stop_periodic_dump
+        """
+        self.stop_periodic_dump()
+        stop: Event = Event()
+
+        def dump_until_stopped():
+            while not stop.wait(interval_seconds):
+                self.dump(path)
+
+        Thread(target=dump_until_stopped, name="metrics-dump", daemon=True).start()
+        self.__dump_stop = stop
+
+    def stop_periodic_dump(self):
+        if self.__dump_stop is not None:
+            self.__dump_stop.set()
+            self.__dump_stop = None
+
+
+INSTRUMENTATION: Instrumentation = Instrumentation()
 
 
 """
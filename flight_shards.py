@@ -0,0 +1,243 @@
+"""
+Process-pool sharding: spreads flights across worker processes so bookings on different flights use different
+cores. Every flight is owned by exactly one worker, chosen from its flight key, so each seat map still has a single
+writer and needs no cross-process locking.
+
+    python flight_shards.py [--flights 64] [--requests 20000] [--shards 1,2,4] [--batch 1000]
+
+Requests are the booking service's requests plus "flight" and "date" (ISO format) fields naming the flight,
+and two extra ops: open_flight (with an optional "aircraft" type, or fc_rows, fc_seats, coach_rows and coach_seats)
+and close_flight. Workers are forked, so they know every layout loaded with AircraftLayout.load before the pool starts.
+"""
+
+import argparse
+import os
+import random
+import time
+import zlib
+from datetime import date, timedelta
+from multiprocessing import Pipe, Process
+
+from booking_service import BookingService, make_random_request
+from chaffey_flight_reservation_sys import FlightInventory, SeatStorageType
+
+OPEN_FLIGHT_OP: str = "open_flight"
+CLOSE_FLIGHT_OP: str = "close_flight"
+READ_OPS: tuple = ("availability", "chart")
+LAYOUT_FIELDS: tuple = ("fc_rows", "fc_seats", "coach_rows", "coach_seats")
+
+
+class FlightShard:
+    """
+    The flights owned by one worker, and the booking services over the ones that have taken a booking
+    """
+
+    def __init__(self, storage_type: SeatStorageType = SeatStorageType.bitmap):
+        self.__inventory: FlightInventory = FlightInventory(storage_type=storage_type)
+        self.__services: dict = {}
+
+    def get_inventory(self) -> FlightInventory:
+        return self.__inventory
+
+    def handle_batch(self, requests: list) -> list:
+        return [self.handle_request(request) for request in requests]
+
+    def handle_request(self, request: dict) -> dict:
+        try:
+            flight_number: str = str(request["flight"])
+            flight_date: date = date.fromisoformat(str(request["date"]))
+        except (KeyError, ValueError) as e:
+            return {"ok": False, "error": f"Request must name a flight and an ISO date: {e}"}
+        try:
+            op = request.get("op")
+            if op == OPEN_FLIGHT_OP:
+                layout: dict = {field: int(request[field]) for field in LAYOUT_FIELDS if field in request}
+                if request.get("aircraft") is not None:
+                    layout["aircraft_type"] = str(request["aircraft"])
+                self.__inventory.open_flight(flight_number=flight_number, flight_date=flight_date, **layout)
+                return {"ok": True}
+            key: tuple = self.__inventory.make_flight_key(flight_number=flight_number, flight_date=flight_date)
+            if op == CLOSE_FLIGHT_OP:
+                self.__inventory.close_flight(flight_number=flight_number, flight_date=flight_date)
+                self.__services.pop(key, None)
+                return {"ok": True}
+            service: BookingService = self.__services.get(key)
+            if service is None:
+                if op in READ_OPS and not self.__inventory.is_materialized(flight_number=flight_number,
+                                                                            flight_date=flight_date):
+                    # reads of a flight nobody has booked are served from the shared template, without building it
+                    model = self.__inventory.peek_seating_structure(flight_number=flight_number,
+                                                                    flight_date=flight_date)
+                    return BookingService(model).handle_request(request)
+                service = BookingService(self.__inventory.get_seating_structure(flight_number=flight_number,
+                                                                                flight_date=flight_date))
+                self.__services[key] = service
+            return service.handle_request(request)
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
+
+def run_shard_worker(connection, storage_type_name: str):
+    """
+    Worker process loop: receives batches of requests and sends back their responses, in order, until it receives
+    None or the dispatcher goes away
+    """
+    shard: FlightShard = FlightShard(storage_type=SeatStorageType[storage_type_name])
+    try:
+        while True:
+            requests: list = connection.recv()
+            if requests is None:
+                break
+            connection.send(shard.handle_batch(requests))
+    except EOFError:
+        pass
+    finally:
+        connection.close()
+
+
+class FlightShardPool:
+    """
+    Dispatcher over a pool of worker processes, each owning the flights whose key hashes to it.
+    Requests for one flight always run in the order they were given; requests for flights on different workers
+    run in parallel.
+    """
+
+    def __init__(self, num_shards: int = None, storage_type: SeatStorageType = SeatStorageType.bitmap):
+        """
+        :param num_shards: The number of worker processes; defaults to one per CPU core
+        """
+        num_shards = num_shards if num_shards is not None else os.cpu_count() or 1
+        if num_shards < 1:
+            raise Exception("A shard pool needs at least one worker")
+        self.__connections: list = []
+        self.__processes: list = []
+        for _ in range(num_shards):
+            parent_connection, child_connection = Pipe()
+            process: Process = Process(target=run_shard_worker, args=(child_connection, storage_type.name),
+                                       daemon=True)
+            process.start()
+            child_connection.close()
+            self.__connections.append(parent_connection)
+            self.__processes.append(process)
+
+    def get_num_shards(self) -> int:
+        return len(self.__connections)
+
+    def get_shard_index(self, flight_number: str, flight_date: date) -> int:
+        # crc32 rather than hash(), which is salted differently in every process
+        key: tuple = FlightInventory.make_flight_key(flight_number=flight_number, flight_date=flight_date)
+        return zlib.crc32(f"{key[0]}|{key[1].isoformat()}".encode('utf-8')) % self.get_num_shards()
+
+    def request(self, flight_number: str, flight_date: date, op: str, **fields) -> dict:
+        fields.update({"op": op, "flight": flight_number, "date": flight_date.isoformat()})
+        return self.run_batch([fields])[0]
+
+    def run_batch(self, requests: list) -> list:
+        """
+        Sends every worker its share of the requests in one message, then gathers the responses
+        :param requests: Request dicts, each naming its flight and date
+        :return: the responses, in the same order as the requests
+        """
+        shard_batches: list = [[] for _ in range(self.get_num_shards())]
+        shard_positions: list = [[] for _ in range(self.get_num_shards())]
+        responses: list = [None] * len(requests)
+        for position, request in enumerate(requests):
+            try:
+                shard_index: int = self.get_shard_index(flight_number=str(request["flight"]),
+                                                        flight_date=date.fromisoformat(str(request["date"])))
+            except (KeyError, ValueError) as e:
+                responses[position] = {"ok": False, "error": f"Request must name a flight and an ISO date: {e}"}
+                continue
+            shard_batches[shard_index].append(request)
+            shard_positions[shard_index].append(position)
+        busy_shards: list = [index for index, batch in enumerate(shard_batches) if len(batch) > 0]
+        for index in busy_shards:
+            self.__connections[index].send(shard_batches[index])
+        for index in busy_shards:
+            for position, response in zip(shard_positions[index], self.__connections[index].recv()):
+                responses[position] = response
+        return responses
+
+    def close(self):
+        for connection in self.__connections:
+            try:
+                connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            connection.close()
+        for process in self.__processes:
+            process.join()
+        self.__connections = []
+        self.__processes = []
+
+
+def make_flight_workload(num_flights: int, num_requests: int, seed: int = 0) -> tuple:
+    """
+    :return: the (open_flight requests, booking requests) for a workload spread evenly over many flights
+    """
+    rng: random.Random = random.Random(seed)
+    first_date: date = date.today()
+    flights: list = [(f"CA{100 + number}", (first_date + timedelta(days=number % 7)).isoformat())
+                     for number in range(num_flights)]
+    open_requests: list = [{"op": OPEN_FLIGHT_OP, "flight": number, "date": day} for number, day in flights]
+    requests: list = []
+    for session_number in range(num_requests):
+        op, fields = make_random_request(rng=rng, session_number=session_number % 1000)
+        number, day = rng.choice(flights)
+        fields.update({"op": op, "flight": number, "date": day})
+        requests.append(fields)
+    return open_requests, requests
+
+
+def run_inline(open_requests: list, requests: list, batch_size: int) -> float:
+    """
+    :return: the seconds taken to run the workload in this process, the baseline for the sharded runs
+    """
+    shard: FlightShard = FlightShard()
+    shard.handle_batch(open_requests)
+    start: float = time.perf_counter()
+    for offset in range(0, len(requests), batch_size):
+        shard.handle_batch(requests[offset:offset + batch_size])
+    return time.perf_counter() - start
+
+
+def run_sharded(open_requests: list, requests: list, batch_size: int, num_shards: int) -> float:
+    """
+    :return: the seconds taken to run the workload on a pool of num_shards workers, not counting their start-up
+    """
+    pool: FlightShardPool = FlightShardPool(num_shards=num_shards)
+    try:
+        pool.run_batch(open_requests)
+        start: float = time.perf_counter()
+        for offset in range(0, len(requests), batch_size):
+            pool.run_batch(requests[offset:offset + batch_size])
+        return time.perf_counter() - start
+    finally:
+        pool.close()
+
+
+def main():
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Benchmark sharding flights over cores")
+    parser.add_argument("--flights", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--shards", default=None, help="comma-separated worker counts (default 1, 2, ... cores)")
+    parser.add_argument("--batch", type=int, default=1000, help="requests dispatched per round trip")
+    args = parser.parse_args()
+    if args.shards is not None:
+        shard_counts: list = [int(count) for count in args.shards.split(",")]
+    else:
+        shard_counts = [1]
+        while shard_counts[-1] * 2 <= (os.cpu_count() or 1):
+            shard_counts.append(shard_counts[-1] * 2)
+    open_requests, requests = make_flight_workload(num_flights=args.flights, num_requests=args.requests)
+    print(f"{len(requests)} requests over {args.flights} flights, {os.cpu_count()} cores")
+    seconds: float = run_inline(open_requests=open_requests, requests=requests, batch_size=args.batch)
+    print(f"{'inline':>10}: {len(requests) / seconds:10.0f} req/s")
+    for num_shards in shard_counts:
+        seconds = run_sharded(open_requests=open_requests, requests=requests, batch_size=args.batch,
+                              num_shards=num_shards)
+        print(f"{num_shards:>3} shards: {len(requests) / seconds:10.0f} req/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+"""
+Headless driver for the attendant menus: records agent sessions as keystroke scripts, and replays them through
+MainController and the other controllers at full speed, without a terminal.
+
+    python session_replay.py record SCRIPT
+    python session_replay.py replay SCRIPT_OR_DIRECTORY [...] [--repeat 100] [--storage objects] [--instrument]
+                                    [--show-output]
+
+A keystroke script is a text file holding one attendant entry per line, exactly as typed at the prompts.
+Every replay starts from an empty seat map. A script that ends without quitting simply ends the session.
+With --instrument, the replay reports where the time went, by layer: controllers (menus and messages),
+prompts (input validation), model, pricing and chart. The numbers are self times, so they add up.
+"""
+
+import argparse
+import os
+import sys
+import time
+from io import StringIO
+
+from chaffey_flight_reservation_sys import (INSTRUMENTATION, Console, SeatingStructure, SeatStorageType, NUM_COACH_ROWS,
+                                            NUM_COACH_SEATS_PER_ROW, NUM_FC_ROWS, NUM_FC_SEATS_PER_ROW,
+                                            run_controllers, run_reservation_system_pos)
+
+SCRIPT_EXTENSION: str = ".txt"
+ENCODING: str = 'utf-8'
+
+
+class DiscardOutput:
+    """
+    An output stream that throws everything away, so replays measure the booking flows rather than the terminal
+    """
+
+    def write(self, text: str) -> int:
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+class RecordingInput:
+    """
+    Wraps an input stream, copying every line read from it into a keystroke script
+    """
+
+    def __init__(self, source, script_file):
+        self.__source = source
+        self.__script_file = script_file
+
+    def readline(self) -> str:
+        line: str = self.__source.readline()
+        if line != "":
+            self.__script_file.write(line if line.endswith("\n") else f"{line}\n")
+            self.__script_file.flush()
+        return line
+
+
+def load_scripts(paths: list) -> list:
+    """
+    :param paths: Keystroke script files, or directories whose .txt files are all scripts
+    :return: (name, script text) for every script, directories' scripts in name order
+    """
+    scripts: list = []
+    for path in paths:
+        if os.path.isdir(path):
+            names: list = sorted(name for name in os.listdir(path) if name.endswith(SCRIPT_EXTENSION))
+            file_paths: list = [os.path.join(path, name) for name in names]
+        else:
+            file_paths = [path]
+        for file_path in file_paths:
+            with open(file_path, 'r', encoding=ENCODING) as script_file:
+                scripts.append((file_path, script_file.read()))
+    return scripts
+
+
+def replay_script(script: str, storage_type: SeatStorageType = SeatStorageType.objects,
+                  output_stream=None) -> SeatingStructure:
+    """
+    Runs one keystroke script through the controllers against a new, empty seat map
+    :param output_stream: Where the prompts and results go; discarded by default
+    :return: the seat map as the session left it
+    """
+    model: SeatingStructure = SeatingStructure(fc_rows=NUM_FC_ROWS, fc_seats=NUM_FC_SEATS_PER_ROW,
+                                               coach_rows=NUM_COACH_ROWS, coach_seats=NUM_COACH_SEATS_PER_ROW,
+                                               storage_type=storage_type)
+    output_stream = output_stream if output_stream is not None else DiscardOutput()
+    try:
+        run_controllers(model, console=Console(input_stream=StringIO(script), output_stream=output_stream))
+    except EOFError:
+        pass
+    return model
+
+
+def replay_scripts(scripts: list, repeat: int = 1, storage_type: SeatStorageType = SeatStorageType.objects) -> dict:
+    """
+    Replays every script, repeat times over
+    :param scripts: (name, script text) pairs, as returned by load_scripts
+    :return: the sessions and entries replayed, the seconds taken, and sessions and entries per second
+    """
+    entries_per_pass: int = sum(len(script.splitlines()) for name, script in scripts)
+    start: float = time.perf_counter()
+    for _ in range(repeat):
+        for name, script in scripts:
+            replay_script(script=script, storage_type=storage_type)
+    elapsed: float = time.perf_counter() - start
+    sessions: int = len(scripts) * repeat
+    entries: int = entries_per_pass * repeat
+    return {"sessions": sessions,
+            "entries": entries,
+            "seconds": elapsed,
+            "sessions_per_second": sessions / elapsed if elapsed > 0 else 0.0,
+            "entries_per_second": entries / elapsed if elapsed > 0 else 0.0}
+
+
+def get_layer_seconds(snapshot: dict) -> dict:
+    """
+    :param snapshot: An instrumentation snapshot
+    :return: the self seconds of every layer (the metric name's prefix, such as "prompt" or "model")
+    """
+    layer_seconds: dict = {}
+    for name, summary in snapshot.items():
+        layer: str = name.split(".")[0]
+        layer_seconds[layer] = layer_seconds.get(layer, 0.0) + summary["self_seconds"]
+    return layer_seconds
+
+
+def record_session(script_path: str):
+    """
+    Runs the reservation system at the terminal, saving every entry the attendant makes to a keystroke script
+    """
+    with open(script_path, 'w', encoding=ENCODING) as script_file:
+        try:
+            run_reservation_system_pos(input_stream=RecordingInput(source=sys.stdin, script_file=script_file))
+        except EOFError:
+            pass
+    print(f"Session saved to {script_path}")
+
+
+def main():
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Record or replay attendant sessions")
+    parser.add_argument("mode", choices=["record", "replay"])
+    parser.add_argument("paths", nargs="+", help="the script to record, or the scripts and directories to replay")
+    parser.add_argument("--repeat", type=int, default=1, help="times to replay every script (replay)")
+    parser.add_argument("--storage", default=SeatStorageType.objects.name,
+                        choices=[SeatStorageType.objects.name, SeatStorageType.bitmap.name],
+                        help="seat storage engine to replay against (replay)")
+    parser.add_argument("--instrument", action="store_true", help="report the time spent in each layer (replay)")
+    parser.add_argument("--show-output", action="store_true", help="print each script's session once (replay)")
+    args = parser.parse_args()
+    if args.mode == "record":
+        if len(args.paths) != 1:
+            parser.error("record takes exactly one script path")
+        record_session(args.paths[0])
+        return
+
+    scripts: list = load_scripts(args.paths)
+    storage_type: SeatStorageType = SeatStorageType[args.storage]
+    if args.show_output:
+        for name, script in scripts:
+            print(f"===== {name} =====")
+            replay_script(script=script, storage_type=storage_type, output_stream=sys.stdout)
+    if args.instrument:
+        INSTRUMENTATION.reset()
+        INSTRUMENTATION.enable()
+    try:
+        results: dict = replay_scripts(scripts=scripts, repeat=args.repeat, storage_type=storage_type)
+    finally:
+        INSTRUMENTATION.disable()
+    print(f"{results['sessions']} sessions, {results['entries']} entries in {results['seconds']:.3f}s: "
+          f"{results['sessions_per_second']:.0f} sessions/s, {results['entries_per_second']:.0f} entries/s")
+    if args.instrument:
+        layer_seconds: dict = get_layer_seconds(INSTRUMENTATION.get_snapshot())
+        for layer, seconds in sorted(layer_seconds.items(), key=lambda item: item[1], reverse=True):
+            print(f"\t{layer:>10}: {seconds:8.3f}s ({seconds / results['seconds']:6.1%})")
+
+
+if __name__ == '__main__':
+    main()
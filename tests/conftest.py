@@ -0,0 +1,36 @@
+import pytest
+
+from chaffey_flight_reservation_sys import Passenger, Seat, SeatingStructure, Tier
+
+
+def make_model() -> SeatingStructure:
+    return SeatingStructure(fc_rows=2, fc_seats=2, coach_rows=8, coach_seats=4)
+
+
+def make_seat(row_number: int, seat_letter: str, name: str = None, tier: Tier = Tier.coach) -> Seat:
+    seat: Seat = Seat(seat_letter=seat_letter, row_number=row_number, tier=tier)
+    if name is not None:
+        seat.assign_passenger(Passenger(name=name, age=30))
+    return seat
+
+
+def book(model: SeatingStructure, row_number: int, seat_letter: str, name: str = None, tier: Tier = Tier.coach):
+    if name is None:
+        name = f"Flier {row_number}{seat_letter}"
+    model.book_seat(make_seat(row_number=row_number, seat_letter=seat_letter, name=name, tier=tier))
+
+
+def get_name(model: SeatingStructure, row_number: int, seat_letter: str, tier: Tier = Tier.coach) -> str:
+    seat: Seat = model.get_seat(tier=tier, row_number=row_number, seat_letter=seat_letter)
+    return seat.get_passenger().get_name() if seat.is_taken() else None
+
+
+def get_booked_names(model: SeatingStructure, tier: Tier = Tier.coach) -> dict:
+    return {(row_number, seat_letter): seat.get_passenger().get_name()
+            for row_number in model.get_occupied_rows(tier)
+            for seat_letter, seat in model.get_occupied_seats(tier=tier, row_number=row_number).items()}
+
+
+@pytest.fixture
+def model() -> SeatingStructure:
+    return make_model()
@@ -0,0 +1,46 @@
+import pytest
+
+from booking_service import BookingService
+from chaffey_flight_reservation_sys import AircraftLayout, SeatingStructure, Tier
+from tests.conftest import book
+
+
+@pytest.fixture
+def model() -> SeatingStructure:
+    layout: AircraftLayout = AircraftLayout.register(
+        {"aircraft": "TEST-AISLE",
+         "cabins": [{"tier": "first_class", "rows": [1, 2], "letters": "AC", "aisles": [1]},
+                    {"tier": "coach", "rows": [3, 5], "seats": 6, "aisles": [3]}]})
+    return SeatingStructure(layout=layout, debug=True)
+
+
+def get_letters(seats: list) -> list:
+    return [seat.get_seat_letter() for seat in seats]
+
+
+def test_adjacent_seats_never_cross_an_aisle(model):
+    assert model.find_adjacent_seats(tier=Tier.coach, num_seats=6) == []
+    assert model.find_adjacent_seats(tier=Tier.coach, num_seats=4) == []
+    assert get_letters(model.find_adjacent_seats(tier=Tier.coach, num_seats=3)) == ["A", "B", "C"]
+    assert model.find_adjacent_seats(tier=Tier.first_class, num_seats=2) == []
+
+
+def test_runs_are_split_at_the_aisle_as_seats_change(model):
+    for row_number in (3, 4, 5):
+        book(model, row_number=row_number, seat_letter="B")
+    book(model, row_number=4, seat_letter="E")
+    # B is taken in every row, so only the D-F blocks fit three, and row 4's is broken by E
+    seats: list = model.find_adjacent_seats(tier=Tier.coach, num_seats=3)
+    assert seats[0].get_row_number() == 3 and get_letters(seats) == ["D", "E", "F"]
+    # rows 3 and 5 have a run of three, row 4 only runs of one, so the tightest fit for one is in row 4
+    seats = model.find_adjacent_seats(tier=Tier.coach, num_seats=1, best_fit=True)
+    assert seats[0].get_row_number() == 4
+    model.verify_occupancy_index()
+
+
+def test_booking_service_adjacent_request_respects_aisles(model):
+    service: BookingService = BookingService(model)
+    response: dict = service.handle_request({"op": "availability", "tier": "C", "adjacent": 6})
+    assert response["ok"] and response["seats"] == []
+    response = service.handle_request({"op": "availability", "tier": "C", "adjacent": 3})
+    assert response["row"] == 3 and response["seats"] == ["A", "B", "C"]
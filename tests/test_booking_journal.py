@@ -0,0 +1,114 @@
+import json
+import os
+from datetime import date
+from threading import Event, Thread
+
+from chaffey_flight_reservation_sys import BookingJournal, FlightInventory, SeatingStructure
+from tests.conftest import book, get_booked_names, make_model
+
+
+def test_recover_append_recover_after_torn_tail(tmp_path):
+    directory: str = str(tmp_path)
+    model: SeatingStructure = make_model()
+    journal: BookingJournal = BookingJournal(directory=directory, sync=False)
+    journal.open(model)
+    book(model, row_number=5, seat_letter="A", name="Ann Lee")
+    journal.close()
+    journal_path: str = os.path.join(directory, BookingJournal.JOURNAL_FILE_NAME)
+    with open(journal_path, 'a', encoding='utf-8') as journal_file:
+        journal_file.write('{"tier":"C","row":6,"se')
+
+    model = make_model()
+    journal = BookingJournal(directory=directory, sync=False)
+    journal.open(model)
+    assert get_booked_names(model) == {(5, "A"): "Ann Lee"}
+    book(model, row_number=7, seat_letter="B", name="Bob Smith")
+    journal.close()
+    with open(journal_path, 'r', encoding='utf-8') as journal_file:
+        for line in journal_file:
+            json.loads(line)
+
+    model = make_model()
+    journal = BookingJournal(directory=directory, sync=False)
+    journal.open(model)
+    assert get_booked_names(model) == {(5, "A"): "Ann Lee", (7, "B"): "Bob Smith"}
+    book(model, row_number=8, seat_letter="C", name="Carla Diaz")
+    journal.close()
+
+    model = make_model()
+    journal = BookingJournal(directory=directory, sync=False)
+    journal.open(model)
+    assert get_booked_names(model) == {(5, "A"): "Ann Lee", (7, "B"): "Bob Smith", (8, "C"): "Carla Diaz"}
+    journal.close()
+
+
+def test_unfinished_final_line_is_not_replayed(model, tmp_path):
+    directory: str = str(tmp_path)
+    journal_path: str = os.path.join(directory, BookingJournal.JOURNAL_FILE_NAME)
+    event: dict = {"tier": "C", "row": 1, "seat": "A", "name": "Ann Lee", "age": 30, "tax_rate": 0.0,
+                   "seq": 1, "op": BookingJournal.ASSIGN_OP}
+    with open(journal_path, 'w', encoding='utf-8') as journal_file:
+        journal_file.write(json.dumps(event))
+    assert BookingJournal(directory=directory, sync=False).recover(model) == 0
+    assert model.is_empty()
+
+
+def test_concurrent_writers_and_compactions_recover_every_booking(model, tmp_path):
+    directory: str = str(tmp_path)
+    journal: BookingJournal = BookingJournal(directory=directory, snapshot_interval=5, sync=False)
+    journal.open(model)
+    threads: list = [Thread(target=lambda letter=letter: [book(model, row_number=row_number, seat_letter=letter,
+                                                               name=f"Flier {letter}")
+                                                          for row_number in range(1, 9)])
+                     for letter in "ABCD"]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    journal.close()
+
+    recovered: SeatingStructure = make_model()
+    BookingJournal(directory=directory, sync=False).recover(recovered)
+    assert get_booked_names(recovered) == get_booked_names(model)
+    assert len(get_booked_names(recovered)) == 32
+
+
+def test_writers_share_the_journal_but_compaction_waits_for_them(model, tmp_path):
+    journal: BookingJournal = BookingJournal(directory=str(tmp_path), sync=False)
+    journal.open(model)
+    writing: Event = Event()
+    finish_writing: Event = Event()
+    compacted: Event = Event()
+
+    def hold_writing():
+        with journal.writing():
+            writing.set()
+            finish_writing.wait(5)
+
+    def compact():
+        journal.compact()
+        compacted.set()
+
+    writer: Thread = Thread(target=hold_writing)
+    writer.start()
+    assert writing.wait(5)
+    # another writer is not held up by the one in flight
+    book(model, row_number=1, seat_letter="A", name="Ann Lee")
+    compactor: Thread = Thread(target=compact)
+    compactor.start()
+    assert not compacted.wait(0.2)
+    finish_writing.set()
+    writer.join()
+    compactor.join()
+    assert compacted.is_set()
+    journal.close()
+
+
+def test_flight_with_a_journal_is_not_released(tmp_path):
+    inventory: FlightInventory = FlightInventory()
+    inventory.open_flight(flight_number="CH100", flight_date=date(2026, 1, 1))
+    model: SeatingStructure = inventory.get_seating_structure(flight_number="CH100", flight_date=date(2026, 1, 1))
+    journal: BookingJournal = BookingJournal(directory=str(tmp_path), sync=False)
+    journal.open(model)
+    assert inventory.release_empty_flights() == 0
+    journal.close()
@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+from chaffey_flight_reservation_sys import CashDrawer, MoneyManipulator
+
+NO_CHANGE: int = -1
+
+
+def count_fewest_pieces(counts: dict, amount_cents: int) -> int:
+    """
+    Tries every way of taking each denomination out of the drawer
+    :return: the fewest pieces that make the amount, or NO_CHANGE if none do
+    """
+    fewest: dict = {0: 0}
+    for member, count in counts.items():
+        reachable: dict = dict(fewest)
+        for paid_cents, pieces in fewest.items():
+            for taken in range(1, count + 1):
+                total_cents: int = paid_cents + taken * member.value
+                if total_cents > amount_cents:
+                    break
+                if pieces + taken < reachable.get(total_cents, pieces + taken + 1):
+                    reachable[total_cents] = pieces + taken
+        fewest = reachable
+    return fewest.get(amount_cents, NO_CHANGE)
+
+
+def test_short_drawer_still_gives_the_fewest_pieces():
+    drawer: CashDrawer = CashDrawer({MoneyManipulator.tens: 2, MoneyManipulator.fives: 1,
+                                     MoneyManipulator.dollars: 3, MoneyManipulator.quarters: 2,
+                                     MoneyManipulator.dimes: 3, MoneyManipulator.pennies: 20})
+    change: dict = drawer.make_change(amount_cents=2734)
+    assert sum(change.values()) == 12
+    assert change[MoneyManipulator.dimes] == 3 and change[MoneyManipulator.pennies] == 4
+
+
+def test_change_matches_a_brute_force_search():
+    rng: random.Random = random.Random(2024)
+    for _ in range(300):
+        counts: dict = {member: rng.choice((0, 0, 1, 2, 3, 5)) for member in MoneyManipulator
+                        if member.value <= 2000}
+        drawer: CashDrawer = CashDrawer(counts)
+        for amount_cents in rng.sample(range(1, 5000), 5):
+            fewest: int = count_fewest_pieces(counts=counts, amount_cents=amount_cents)
+            if fewest == NO_CHANGE:
+                with pytest.raises(Exception):
+                    drawer.make_change(amount_cents=amount_cents)
+                continue
+            change: dict = drawer.make_change(amount_cents=amount_cents)
+            assert sum(member.value * count for member, count in change.items()) == amount_cents
+            assert all(count <= counts[member] for member, count in change.items())
+            assert sum(change.values()) == fewest, (counts, amount_cents)
@@ -0,0 +1,83 @@
+import pytest
+
+from chaffey_flight_reservation_sys import (BookingJournal, FareLadder, FarePricer, Seat, SeatingStructure,
+                                            SeatMapExport, Tier)
+from tests.conftest import book, make_model
+
+COACH_FARE_CENTS: int = Tier.coach.get_tier_base_cost_cents()
+
+
+def make_priced_model() -> SeatingStructure:
+    model: SeatingStructure = make_model()
+    model.set_fare_ladder(FareLadder.from_multipliers([(0, 1.0), (0.5, 2.0)]))
+    return model
+
+
+@pytest.fixture
+def model() -> SeatingStructure:
+    return make_priced_model()
+
+
+def fill_half_of_coach(model: SeatingStructure):
+    for row_number in range(2, 6):
+        for seat_letter in "ABCD":
+            book(model, row_number=row_number, seat_letter=seat_letter, name=f"Filler {row_number}{seat_letter}")
+
+
+def get_first_seat(model: SeatingStructure) -> Seat:
+    return model.get_seat(tier=Tier.coach, row_number=1, seat_letter="A")
+
+
+def test_booked_seat_keeps_the_fare_it_was_charged(model):
+    book(model, row_number=1, seat_letter="A", name="Ann Lee")
+    fill_half_of_coach(model)
+    assert model.get_open_fares()[Tier.coach] == 2 * COACH_FARE_CENTS
+    assert get_first_seat(model).get_price_cents() == COACH_FARE_CENTS
+    assert FarePricer.price_booked_seats(model)[(Tier.coach, 1, "A")] == COACH_FARE_CENTS
+    book(model, row_number=6, seat_letter="A", name="Late Booker")
+    late_seat: Seat = model.get_seat(tier=Tier.coach, row_number=6, seat_letter="A")
+    assert late_seat.get_price_cents() == 2 * COACH_FARE_CENTS
+
+
+def test_exports_carry_the_recorded_fare(model):
+    book(model, row_number=1, seat_letter="A", name="Ann Lee")
+    fill_half_of_coach(model)
+    for layout, bookings in (SeatMapExport.decode_json(model.export_json()),
+                             SeatMapExport.decode_binary(model.export_binary())[0:2]):
+        ann: tuple = next(booking for booking in bookings if booking[3] == "Ann Lee")
+        assert ann[-2:] == (COACH_FARE_CENTS, COACH_FARE_CENTS)
+    loaded: SeatingStructure = SeatingStructure.load_binary(model.export_binary())
+    loaded.set_fare_ladder(model.get_fare_ladder())
+    assert get_first_seat(loaded).get_price_cents() == COACH_FARE_CENTS
+
+
+def test_recorded_fare_survives_recovery(tmp_path):
+    for compact in (False, True):
+        directory: str = str(tmp_path / str(compact))
+        model: SeatingStructure = make_priced_model()
+        journal: BookingJournal = BookingJournal(directory=directory, sync=False)
+        journal.open(model)
+        book(model, row_number=1, seat_letter="A", name="Ann Lee")
+        fill_half_of_coach(model)
+        model.move_passenger(from_seat=get_first_seat(model),
+                             to_seat=Seat(seat_letter="B", row_number=8, tier=Tier.coach))
+        if compact:
+            journal.compact()
+        journal.close()
+
+        recovered: SeatingStructure = make_priced_model()
+        BookingJournal(directory=directory, sync=False).recover(recovered)
+        moved: Seat = recovered.get_seat(tier=Tier.coach, row_number=8, seat_letter="B")
+        assert moved.get_passenger().get_name() == "Ann Lee"
+        assert moved.get_price_cents() == COACH_FARE_CENTS
+
+
+def test_tier_change_is_charged_from_the_recorded_fare(model):
+    book(model, row_number=1, seat_letter="A", name="Ann Lee")
+    fill_half_of_coach(model)
+    to_seat: Seat = Seat(seat_letter="A", row_number=1, tier=Tier.first_class)
+    first_class_fare_cents: int = model.get_fare_cents(tier=Tier.first_class)
+    assert get_first_seat(model).compare_cost_cents(to_seat) == first_class_fare_cents - COACH_FARE_CENTS
+    model.move_passenger(from_seat=get_first_seat(model), to_seat=to_seat)
+    moved: Seat = model.get_seat(tier=Tier.first_class, row_number=1, seat_letter="A")
+    assert moved.get_fare_cents() == first_class_fare_cents
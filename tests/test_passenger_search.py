@@ -0,0 +1,42 @@
+import sys
+from threading import Thread
+
+from chaffey_flight_reservation_sys import Tier
+from tests.conftest import book, make_seat
+
+ROUNDS: int = 200
+
+
+def test_name_search_runs_alongside_writers(model):
+    errors: list = []
+
+    def book_move_cancel(writer: int):
+        seat_letter: str = "ABCD"[writer % 4]
+        from_row: int = writer // 4 + 1
+        to_row: int = from_row + 4
+        try:
+            for _ in range(ROUNDS):
+                book(model, row_number=from_row, seat_letter=seat_letter, name=f"P{writer}")
+                model.search_passengers("P")
+                model.move_passenger(from_seat=model.get_seat(tier=Tier.coach, row_number=from_row,
+                                                              seat_letter=seat_letter),
+                                     to_seat=make_seat(to_row, seat_letter))
+                model.find_passenger_seats(f"p{writer}")
+                model.get_seat(tier=Tier.coach, row_number=to_row, seat_letter=seat_letter).remove_passenger()
+        except Exception as error:
+            errors.append(error)
+
+    threads: list = [Thread(target=book_move_cancel, args=(writer,)) for writer in range(16)]
+    # switch threads often, so writers land in the middle of each other's searches
+    switch_interval: float = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+    assert errors == []
+    assert model.is_empty()
+    assert model.search_passengers("P") == []
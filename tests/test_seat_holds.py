@@ -0,0 +1,136 @@
+from datetime import date
+
+import pytest
+
+from booking_service import BookingService
+from chaffey_flight_reservation_sys import (FlightInventory, SeatHold, SeatHolds, SeatingStructure, SeatTransaction,
+                                            Tier, TimerWheel)
+from tests.conftest import get_name, make_model, make_seat
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.seconds: float = 1000.0
+
+    def __call__(self) -> float:
+        return self.seconds
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+def model(clock: FakeClock) -> SeatingStructure:
+    model: SeatingStructure = make_model()
+    model.set_seat_holds(SeatHolds(clock=clock))
+    return model
+
+
+def test_timers_fire_on_their_deadline_across_cascades():
+    slots: int = TimerWheel.SLOTS
+    start_tick: int = slots ** 2 - 3
+    wheel: TimerWheel = TimerWheel(start_tick=start_tick)
+    delays: list = [1, 2, 3, 4, slots - 1, slots, slots + 1, 2 * slots + 5, slots ** 2 - 1, slots ** 2,
+                    slots ** 2 + 1, slots ** 3 + 7]
+    for delay in delays:
+        wheel.schedule(key=delay, deadline_tick=start_tick + delay)
+    fired_at: dict = {}
+    tick: int = start_tick
+    while wheel.count() > 0:
+        tick += 1
+        for key in wheel.advance(tick):
+            fired_at[key] = tick
+    assert fired_at == {delay: start_tick + delay for delay in delays}
+
+
+def test_timers_fired_in_one_advance_come_in_deadline_order():
+    wheel: TimerWheel = TimerWheel()
+    for key, deadline_tick in (("late", 5000), ("early", 3), ("middle", 70)):
+        wheel.schedule(key=key, deadline_tick=deadline_tick)
+    wheel.schedule(key="cancelled", deadline_tick=10)
+    assert wheel.cancel("cancelled")
+    wheel.schedule(key="moved", deadline_tick=4)
+    wheel.schedule(key="moved", deadline_tick=100)
+    assert wheel.advance(5000) == ["early", "middle", "moved", "late"]
+    wheel.schedule(key="overdue", deadline_tick=10)
+    assert wheel.advance(5001) == ["overdue"]
+    with pytest.raises(Exception):
+        wheel.schedule(key="too far", deadline_tick=wheel.get_current_tick() + wheel.get_max_delay() + 1)
+
+
+def test_hold_expires_after_its_time_to_live(clock, model):
+    hold: SeatHold = model.hold_seat(tier=Tier.coach, row_number=1, seat_letter="A", ttl_seconds=30)
+    clock.seconds += 29
+    assert model.is_seat_held(tier=Tier.coach, row_number=1, seat_letter="A")
+    clock.seconds += 1
+    assert not model.is_seat_held(tier=Tier.coach, row_number=1, seat_letter="A")
+    assert model.get_seat_holds().get_hold_by_id(hold.get_hold_id()) is SeatHolds.NO_HOLD
+    assert model.get_seat_holds().count() == 0
+    assert not model.release_hold(hold)
+
+
+def test_confirm_after_expiry_is_honoured_only_while_the_seat_is_still_free(clock, model):
+    hold: SeatHold = model.hold_seat(tier=Tier.coach, row_number=1, seat_letter="A", ttl_seconds=30)
+    clock.seconds += 60
+    model.confirm_hold(hold=hold, seat=make_seat(row_number=1, seat_letter="A", name="Ann"))
+    assert get_name(model, row_number=1, seat_letter="A") == "Ann"
+
+    lapsed: SeatHold = model.hold_seat(tier=Tier.coach, row_number=2, seat_letter="A", ttl_seconds=30)
+    clock.seconds += 60
+    model.hold_seat(tier=Tier.coach, row_number=2, seat_letter="A", ttl_seconds=30)
+    with pytest.raises(Exception):
+        model.confirm_hold(hold=lapsed, seat=make_seat(row_number=2, seat_letter="A", name="Bob"))
+    assert get_name(model, row_number=2, seat_letter="A") is None
+
+    lapsed = model.hold_seat(tier=Tier.coach, row_number=3, seat_letter="A", ttl_seconds=30)
+    clock.seconds += 60
+    model.book_seat(make_seat(row_number=3, seat_letter="A", name="Cat"))
+    with pytest.raises(Exception):
+        model.confirm_hold(hold=lapsed, seat=make_seat(row_number=3, seat_letter="A", name="Dan"))
+    assert get_name(model, row_number=3, seat_letter="A") == "Cat"
+
+
+def test_held_seat_is_refused_by_every_booking_path(model):
+    model.book_seat(make_seat(row_number=4, seat_letter="D", name="Ann"))
+    hold: SeatHold = model.hold_seat(tier=Tier.coach, row_number=1, seat_letter="A")
+    attempts: list = [
+        lambda: model.book_seat(make_seat(row_number=1, seat_letter="A", name="Bob")),
+        lambda: model.set_seat(make_seat(row_number=1, seat_letter="A", name="Bob")),
+        lambda: model.hold_seat(tier=Tier.coach, row_number=1, seat_letter="A"),
+        lambda: model.move_passenger(from_seat=model.get_seat(tier=Tier.coach, row_number=4, seat_letter="D"),
+                                     to_seat=make_seat(row_number=1, seat_letter="A")),
+        lambda: model.commit_transaction(SeatTransaction().book(make_seat(row_number=1, seat_letter="A",
+                                                                          name="Bob"))),
+        lambda: model.commit_transaction(SeatTransaction().move(from_seat=make_seat(row_number=4, seat_letter="D"),
+                                                                to_seat=make_seat(row_number=1, seat_letter="A"))),
+    ]
+    for attempt in attempts:
+        with pytest.raises(Exception, match="held for another booking"):
+            attempt()
+    service: BookingService = BookingService(model)
+    for request in ({"op": "book", "tier": "C", "row": 1, "seat": "A", "name": "Bob", "age": 30, "tax_rate": 0},
+                    {"op": "change", "tier": "C", "row": 4, "seat": "D", "to_tier": "C", "to_row": 1,
+                     "to_seat": "A"}):
+        response: dict = service.handle_request(request)
+        assert not response["ok"] and "held for another booking" in response["error"]
+    assert get_name(model, row_number=1, seat_letter="A") is None
+    assert get_name(model, row_number=4, seat_letter="D") == "Ann"
+
+    # the holder's own booking goes through, and ends the hold
+    model.confirm_hold(hold=hold, seat=make_seat(row_number=1, seat_letter="A", name="Bob"))
+    assert get_name(model, row_number=1, seat_letter="A") == "Bob"
+    assert not model.is_seat_held(tier=Tier.coach, row_number=1, seat_letter="A")
+
+
+def test_flight_with_seats_held_is_not_released():
+    inventory: FlightInventory = FlightInventory()
+    inventory.open_flight(flight_number="CH100", flight_date=date(2026, 1, 1))
+    model: SeatingStructure = inventory.get_seating_structure(flight_number="CH100", flight_date=date(2026, 1, 1))
+    hold: SeatHold = model.hold_seat(tier=Tier.coach, row_number=1, seat_letter="A")
+    assert inventory.release_empty_flights() == 0
+    model.confirm_hold(hold=hold, seat=make_seat(row_number=1, seat_letter="A", name="Ann"))
+    booked: SeatingStructure = inventory.get_seating_structure(flight_number="CH100", flight_date=date(2026, 1, 1))
+    assert get_name(booked, row_number=1, seat_letter="A") == "Ann"
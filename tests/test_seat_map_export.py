@@ -0,0 +1,80 @@
+import pytest
+
+from chaffey_flight_reservation_sys import AircraftLayout, Passenger, Seat, SeatingStructure, SeatMapExport, Tier
+from tests.conftest import book, get_booked_names, make_model
+
+
+def make_registered_model() -> SeatingStructure:
+    layout: AircraftLayout = AircraftLayout.register(
+        {"aircraft": "TEST-EXPORT",
+         "cabins": [{"tier": "first_class", "rows": [1, 2], "letters": "AC", "aisles": [1]},
+                    {"tier": "coach", "rows": [10, 14], "skip_rows": [13], "seats": 6, "aisles": [3]}]})
+    return SeatingStructure(layout=layout)
+
+
+@pytest.fixture(params=[make_model, make_registered_model], ids=["grid", "registered"])
+def model(request) -> SeatingStructure:
+    return request.param()
+
+
+def book_some(model: SeatingStructure):
+    for tier in Tier:
+        row_number: int = model.get_row_options(tier)[-1]
+        seat_letter: str = model.get_seat_options(tier)[0]
+        passenger: Passenger = Passenger(name=f"Zoe {tier.value[2]}", age=67)
+        passenger.set_tax_rate(0.0825)
+        seat: Seat = Seat(seat_letter=seat_letter, row_number=row_number, tier=tier)
+        seat.assign_passenger(passenger)
+        model.book_seat(seat)
+    book(model, row_number=model.get_row_options(Tier.coach)[0], seat_letter=model.get_seat_options(Tier.coach)[-1])
+
+
+def book_all(model: SeatingStructure):
+    for tier in Tier:
+        for row_number in model.get_row_options(tier):
+            for seat_letter in model.get_seat_options(tier):
+                book(model, row_number=row_number, seat_letter=seat_letter, tier=tier)
+
+
+def assert_round_trips(model: SeatingStructure, num_booked: int):
+    layout, bookings, end = SeatMapExport.decode_binary(model.export_binary())
+    assert end == len(model.export_binary())
+    assert layout is model.get_aircraft_layout()
+    assert len(bookings) == num_booked
+    assert SeatMapExport.decode_json(model.export_json()) == (layout, bookings)
+    for loaded in (SeatingStructure.load_binary(model.export_binary()),
+                   SeatingStructure.load_json(model.export_json())):
+        assert loaded.get_aircraft_layout() is layout
+        for tier in Tier:
+            assert get_booked_names(loaded, tier=tier) == get_booked_names(model, tier=tier)
+        assert loaded.export_binary() == model.export_binary()
+        assert loaded.export_json() == model.export_json()
+
+
+def test_empty_map_round_trips(model):
+    assert_round_trips(model, num_booked=0)
+
+
+def test_partly_booked_map_round_trips(model):
+    book_some(model)
+    assert_round_trips(model, num_booked=3)
+    layout, bookings, _ = SeatMapExport.decode_binary(model.export_binary())
+    tier, row_number, seat_letter, name, age, tax_rate, fare_cents, price_cents = bookings[0]
+    assert (tier, row_number, seat_letter) == (Tier.first_class, model.get_row_options(Tier.first_class)[-1],
+                                               model.get_seat_options(Tier.first_class)[0])
+    assert (name, age, tax_rate) == (f"Zoe {Tier.first_class.value[2]}", 67, 0.0825)
+
+
+def test_full_map_round_trips(model):
+    book_all(model)
+    assert_round_trips(model, num_booked=model.get_aircraft_layout().count_seats())
+
+
+def test_unsupported_version_is_refused(model):
+    book_some(model)
+    export: bytearray = bytearray(model.export_binary())
+    export[len(SeatMapExport.MAGIC)] = SeatMapExport.VERSION + 1
+    with pytest.raises(Exception, match="version"):
+        SeatMapExport.decode_binary(bytes(export))
+    with pytest.raises(Exception, match="version"):
+        SeatingStructure.load_binary(bytes(export))
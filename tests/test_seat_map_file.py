@@ -0,0 +1,82 @@
+import pytest
+
+from chaffey_flight_reservation_sys import MappedSeatStorage, Passenger, Seat, SeatingStructure, SeatMapFile, Tier
+from tests.conftest import book, get_booked_names, get_name, make_seat
+
+
+@pytest.fixture
+def map_path(tmp_path) -> str:
+    path: str = str(tmp_path / "flight.map")
+    SeatMapFile.create(path=path, fc_rows=2, fc_seats=2, coach_rows=8, coach_seats=4)
+    return path
+
+
+def test_bookings_survive_create_open_update_reopen(map_path):
+    model: SeatingStructure = SeatingStructure.open_mapped(map_path)
+    assert model.is_empty()
+    passenger: Passenger = Passenger(name="Ann Lee", age=41)
+    passenger.set_tax_rate(0.05)
+    seat: Seat = make_seat(row_number=1, seat_letter="A")
+    seat.assign_passenger(passenger)
+    model.book_seat(seat)
+    for seat_letter in "ABCD":
+        book(model, row_number=2, seat_letter=seat_letter)
+    book(model, row_number=1, seat_letter="B", name="Bob Smith", tier=Tier.first_class)
+    model.close()
+
+    model = SeatingStructure.open_mapped(map_path)
+    assert get_booked_names(model) == {(1, "A"): "Ann Lee", (2, "A"): "Flier 2A", (2, "B"): "Flier 2B",
+                                       (2, "C"): "Flier 2C", (2, "D"): "Flier 2D"}
+    ann: Passenger = model.get_seat(tier=Tier.coach, row_number=1, seat_letter="A").get_passenger()
+    assert (ann.get_age(), ann.get_tax_rate()) == (41, 0.05)
+    assert ann.get_fare_cents() == Tier.coach.get_tier_base_cost_cents()
+    assert get_name(model, row_number=1, seat_letter="B", tier=Tier.first_class) == "Bob Smith"
+    assert set(model.get_full_rows(Tier.coach)) == {2}
+    assert set(model.get_occupied_rows(Tier.coach)) == {1, 2}
+    model.verify_occupancy_index()
+    # update before the first name search, so the name index is built from the file as it now stands
+    model.get_seat(tier=Tier.coach, row_number=2, seat_letter="B").remove_passenger()
+    book(model, row_number=8, seat_letter="D", name="Cat Jones")
+    assert [seat.get_seat_letter() for seat in model.search_passengers("flier")] == ["A", "C", "D"]
+    model.close()
+
+    model = SeatingStructure.open_mapped(map_path, read_only=True)
+    assert get_booked_names(model) == {(1, "A"): "Ann Lee", (2, "A"): "Flier 2A", (2, "C"): "Flier 2C",
+                                       (2, "D"): "Flier 2D", (8, "D"): "Cat Jones"}
+    assert [seat.get_row_number() for seat in model.find_passenger_seats("cat jones")] == [8]
+    assert model.find_adjacent_seats(tier=Tier.coach, num_seats=4)[0].get_row_number() == 3
+    model.verify_occupancy_index()
+    with pytest.raises(Exception):
+        book(model, row_number=3, seat_letter="A")
+    model.close()
+
+
+def test_refresh_picks_up_another_writer(map_path):
+    reader: SeatingStructure = SeatingStructure.open_mapped(map_path, read_only=True)
+    assert reader.search_passengers("ann") == []
+    writer: SeatingStructure = SeatingStructure.open_mapped(map_path)
+    book(writer, row_number=4, seat_letter="C", name="Ann Lee")
+    writer.flush()
+    reader.refresh_occupancy_index()
+    assert set(reader.get_occupied_rows(Tier.coach)) == {4}
+    assert [seat.get_seat_letter() for seat in reader.search_passengers("ann")] == ["C"]
+    reader.verify_occupancy_index()
+    writer.close()
+    reader.close()
+
+
+def test_open_reads_occupancy_without_decoding_seats(map_path, monkeypatch):
+    model: SeatingStructure = SeatingStructure.open_mapped(map_path)
+    book(model, row_number=5, seat_letter="B", name="Ann Lee")
+    model.close()
+
+    def refuse_to_decode(*args, **kwargs):
+        raise AssertionError("a seat record was decoded")
+
+    monkeypatch.setattr(MappedSeatStorage, "get_seat", refuse_to_decode)
+    model = SeatingStructure.open_mapped(map_path, read_only=True)
+    assert set(model.get_occupied_rows(Tier.coach)) == {5}
+    assert model.count_booked_seats(Tier.coach) == 1
+    monkeypatch.undo()
+    assert [seat.get_seat_letter() for seat in model.search_passengers("lee")] == ["B"]
+    model.close()
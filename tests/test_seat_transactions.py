@@ -0,0 +1,76 @@
+import pytest
+
+from chaffey_flight_reservation_sys import BookingJournal, Seat, SeatingStructure, SeatTransaction
+from tests.conftest import book, get_booked_names, make_model, make_seat
+
+
+def book_three(model: SeatingStructure):
+    for row_number, name in ((1, "Ann"), (2, "Bob"), (3, "Cat")):
+        book(model, row_number=row_number, seat_letter="A", name=name)
+
+
+def test_swap_and_move_cycle_commit_together(model, tmp_path):
+    journal: BookingJournal = BookingJournal(directory=str(tmp_path), sync=False)
+    journal.open(model)
+    book_three(model)
+    model.commit_transaction(SeatTransaction().swap(seat_a=make_seat(1, "A"), seat_b=make_seat(2, "A")))
+    assert get_booked_names(model) == {(1, "A"): "Bob", (2, "A"): "Ann", (3, "A"): "Cat"}
+    transaction: SeatTransaction = SeatTransaction()
+    transaction.move(from_seat=make_seat(1, "A"), to_seat=make_seat(2, "A"))
+    transaction.move(from_seat=make_seat(2, "A"), to_seat=make_seat(3, "A"))
+    transaction.move(from_seat=make_seat(3, "A"), to_seat=make_seat(1, "A"))
+    model.commit_transaction(transaction)
+    assert get_booked_names(model) == {(1, "A"): "Cat", (2, "A"): "Bob", (3, "A"): "Ann"}
+    model.verify_occupancy_index()
+    journal.close()
+
+    recovered: SeatingStructure = make_model()
+    BookingJournal(directory=str(tmp_path), sync=False).recover(recovered)
+    assert get_booked_names(recovered) == get_booked_names(model)
+
+
+def test_bad_batch_is_rejected_whole_with_every_problem_listed(model):
+    book_three(model)
+    transaction: SeatTransaction = SeatTransaction()
+    transaction.book(make_seat(row_number=4, seat_letter="A", name="Dan"))
+    transaction.cancel(make_seat(3, "A"))
+    transaction.move(from_seat=make_seat(4, "B"), to_seat=make_seat(4, "C"))
+    transaction.book(make_seat(row_number=1, seat_letter="A", name="Eve"))
+    with pytest.raises(Exception) as error:
+        model.commit_transaction(transaction)
+    assert "Change 3" in str(error.value) and "is not booked" in str(error.value)
+    assert "already booked by Ann" in str(error.value)
+    assert get_booked_names(model) == {(1, "A"): "Ann", (2, "A"): "Bob", (3, "A"): "Cat"}
+
+    transaction = SeatTransaction().book(make_seat(row_number=4, seat_letter="A", name="Dan"))
+    transaction.move(from_seat=make_seat(1, "A"), to_seat=make_seat(4, "A"))
+    with pytest.raises(Exception, match="filled twice"):
+        model.commit_transaction(transaction)
+    assert get_booked_names(model) == {(1, "A"): "Ann", (2, "A"): "Bob", (3, "A"): "Cat"}
+
+
+def test_failed_write_rolls_every_seat_back(model, monkeypatch, tmp_path):
+    journal: BookingJournal = BookingJournal(directory=str(tmp_path), sync=False)
+    journal.open(model)
+    book_three(model)
+    sequence: int = journal.get_sequence()
+    place_seat = model._SeatingStructure__place_seat
+    writes: list = []
+
+    def fail_on_third_write(seat: Seat):
+        writes.append(seat)
+        if len(writes) == 3:
+            raise Exception("disk full")
+        place_seat(seat)
+
+    monkeypatch.setattr(model, "_SeatingStructure__place_seat", fail_on_third_write)
+    transaction: SeatTransaction = SeatTransaction().swap(seat_a=make_seat(1, "A"), seat_b=make_seat(2, "A"))
+    transaction.cancel(make_seat(3, "A"))
+    transaction.book(make_seat(row_number=4, seat_letter="D", name="Dan"))
+    with pytest.raises(Exception, match="disk full"):
+        model.commit_transaction(transaction)
+    monkeypatch.undo()
+    assert get_booked_names(model) == {(1, "A"): "Ann", (2, "A"): "Bob", (3, "A"): "Cat"}
+    assert journal.get_sequence() == sequence
+    model.verify_occupancy_index()
+    journal.close()
@@ -0,0 +1,44 @@
+import sys
+from io import StringIO
+from threading import Thread
+
+from session_replay import replay_script
+
+REPLAY_TIMEOUT_SECONDS: float = 10.0
+
+
+def replay_within_timeout(script: str) -> bool:
+    replay: Thread = Thread(target=replay_script, args=(script,), daemon=True)
+    replay.start()
+    replay.join(REPLAY_TIMEOUT_SECONDS)
+    return not replay.is_alive()
+
+
+def test_script_truncated_at_each_prompt_ends_the_session():
+    full_script: list = ["N", "C", "1", "A", "Ann Lee", "30", "0.05"]
+    for length in range(len(full_script)):
+        script: str = "".join(f"{entry}\n" for entry in full_script[0: length])
+        assert replay_within_timeout(script), f"replaying {script!r} never finished"
+
+
+def test_concurrent_replays_keep_to_their_own_console():
+    stdin, stdout = sys.stdin, sys.stdout
+    scripts: dict = {"chart": "P\n" * 200 + "Q\n", "find": "F\n" * 200 + "Q\n"}
+    outputs: dict = {name: StringIO() for name in scripts}
+    threads: list = [Thread(target=replay_script, args=(script,), kwargs={"output_stream": outputs[name]})
+                     for name, script in scripts.items()]
+    # switch threads often, so the two sessions interleave
+    switch_interval: float = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(REPLAY_TIMEOUT_SECONDS)
+    finally:
+        sys.setswitchinterval(switch_interval)
+    assert (sys.stdin, sys.stdout) == (stdin, stdout)
+    assert outputs["chart"].getvalue().count("Bookings Chart:") == 200
+    assert "no bookings to search" not in outputs["chart"].getvalue()
+    assert outputs["find"].getvalue().count("There are no bookings to search.") == 200
+    assert "Bookings Chart:" not in outputs["find"].getvalue()
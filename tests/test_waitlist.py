@@ -0,0 +1,74 @@
+from datetime import date
+
+from chaffey_flight_reservation_sys import (FlightInventory, Passenger, Seat, SeatingStructure, Tier, Waitlist,
+                                            WaitlistEntry, WaitlistPriority)
+from tests.conftest import book, get_name
+
+
+def join(model: SeatingStructure, name: str, priority: WaitlistPriority, tier: Tier = Tier.coach) -> WaitlistEntry:
+    return model.join_waitlist(tier=tier, passenger=Passenger(name=name, age=30), priority=priority)
+
+
+def test_waitlist_orders_by_priority_then_by_request():
+    waitlist: Waitlist = Waitlist()
+    for name, priority in (("Sam", WaitlistPriority.standard), ("Eve", WaitlistPriority.elite),
+                           ("Fay", WaitlistPriority.full_fare), ("Stu", WaitlistPriority.standard),
+                           ("Eli", WaitlistPriority.elite)):
+        waitlist.add(tier=Tier.coach, passenger=Passenger(name=name, age=30), priority=priority)
+    withdrawn: WaitlistEntry = waitlist.get_waiting(Tier.coach)[3]
+    assert withdrawn.get_passenger().get_name() == "Sam"
+    waitlist.withdraw(withdrawn)
+    assert waitlist.count_waiting(Tier.coach) == 4
+    assert waitlist.get_position(waitlist.get_waiting(Tier.coach)[-1]) == 4
+    names: list = []
+    while waitlist.count_waiting(Tier.coach) > 0:
+        names.append(waitlist.pop_next(Tier.coach).get_passenger().get_name())
+    assert names == ["Eve", "Eli", "Fay", "Stu"]
+    assert waitlist.pop_next(Tier.coach) is Waitlist.NO_ENTRY
+
+
+def test_cancellation_books_the_first_waitlisted_passenger(model):
+    book(model, row_number=1, seat_letter="A", name="Ann")
+    book(model, row_number=1, seat_letter="B", name="Bob")
+    join(model, name="Sam", priority=WaitlistPriority.standard)
+    join(model, name="Fay", priority=WaitlistPriority.full_fare)
+    join(model, name="Eve", priority=WaitlistPriority.elite)
+    join(model, name="Fir", priority=WaitlistPriority.elite, tier=Tier.first_class)
+
+    model.get_seat(tier=Tier.coach, row_number=1, seat_letter="A").remove_passenger()
+    assert get_name(model, row_number=1, seat_letter="A") == "Eve"
+    model.get_seat(tier=Tier.coach, row_number=1, seat_letter="B").remove_passenger()
+    assert get_name(model, row_number=1, seat_letter="B") == "Fay"
+    assert model.get_waitlist().count_waiting(Tier.coach) == 1
+    assert model.get_waitlist().count_waiting(Tier.first_class) == 1
+
+
+def test_move_books_the_waitlist_into_the_seat_it_frees(model):
+    book(model, row_number=1, seat_letter="A", name="Ann")
+    book(model, row_number=2, seat_letter="A", name="Bob", tier=Tier.first_class)
+    join(model, name="Sam", priority=WaitlistPriority.standard)
+    join(model, name="Fay", priority=WaitlistPriority.full_fare)
+    join(model, name="Fir", priority=WaitlistPriority.standard, tier=Tier.first_class)
+
+    model.move_passenger(from_seat=model.get_seat(tier=Tier.coach, row_number=1, seat_letter="A"),
+                         to_seat=Seat(seat_letter="D", row_number=4, tier=Tier.coach))
+    assert get_name(model, row_number=4, seat_letter="D") == "Ann"
+    assert get_name(model, row_number=1, seat_letter="A") == "Fay"
+
+    # a move to another cabin frees a seat for the waitlist of the cabin left behind
+    model.move_passenger(from_seat=model.get_seat(tier=Tier.first_class, row_number=2, seat_letter="A"),
+                         to_seat=Seat(seat_letter="C", row_number=4, tier=Tier.coach))
+    assert get_name(model, row_number=4, seat_letter="C") == "Bob"
+    assert get_name(model, row_number=2, seat_letter="A", tier=Tier.first_class) == "Fir"
+    assert model.get_waitlist().count_waiting(Tier.coach) == 1
+    model.verify_occupancy_index()
+
+
+def test_empty_flight_with_a_waitlist_is_not_released():
+    inventory: FlightInventory = FlightInventory()
+    inventory.open_flight(flight_number="CH100", flight_date=date(2026, 1, 1))
+    model: SeatingStructure = inventory.get_seating_structure(flight_number="CH100", flight_date=date(2026, 1, 1))
+    join(model, name="Sam", priority=WaitlistPriority.standard)
+    assert inventory.release_empty_flights() == 0
+    model.get_waitlist().withdraw(model.get_waitlist().get_waiting(Tier.coach)[0])
+    assert inventory.release_empty_flights() == 1